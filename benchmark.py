@@ -0,0 +1,199 @@
+#!/usr/bin/python
+
+##########################################################################
+#                                    ELDEST                              #
+#        Investigating Electronic Decay Processes with Streaking         #
+##########################################################################
+# Purpose:                                                               #
+#          - Benchmark and regression suite for nuclear_dyn.simulate:    #
+#            runs the pinned input files benchmarks/<size>_*.in,         #
+#            times the stages of each run (FC setup, W_lambda, time      #
+#            loop, output) and compares the spectra with the reference   #
+#            arrays in benchmarks/ref.                                   #
+#          - Every case can be run with several outer-integration        #
+#            backends (quadrature, gauss_legendre, ...), all compared    #
+#            with the same reference.                                    #
+#          - The results go to a JSON file; with -c an older results     #
+#            file is compared and slower runs are reported.              #
+#                                                                        #
+##########################################################################
+
+import argparse
+from datetime import datetime
+import glob
+import json
+import numpy as np
+import os
+import platform
+import scipy
+import subprocess
+import sys
+import tempfile
+import time
+import warnings
+
+import in_out
+import nuclear_dyn
+import sciconv
+
+bench_dir = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'benchmarks')
+ref_dir = os.path.join(bench_dir, 'ref')
+backends = ('quadrature', 'romberg', 'gauss_legendre', 'clenshaw_curtis', 'spectral', 'analytic')
+
+# set up argument parser
+parser = argparse.ArgumentParser(
+        description='''ELDEST -- benchmark.py :
+        Times nuclear_dyn.simulate on the pinned inputs in benchmarks/ and checks the spectra against references.''',
+        epilog='''Example: python benchmark.py -s small,medium -b gauss_legendre,analytic -o bench.json -c old_bench.json''')
+parser.add_argument('-s', '--sizes', default='small', help='''Comma-separated sizes (small, medium, large)
+                    or names of cases (input files benchmarks/NAME.in) to run (default: small)''')
+parser.add_argument('-b', '--backends', help='''Comma-separated outer-integration schemes every case is run with
+                    (options: ''' + ', '.join(backends) + '''; default: the integ_outer of each input file).
+                    The analytic scheme is skipped for sinsq pulses.''')
+parser.add_argument('-o', '--outfile', default='benchmark.json', help='''JSON file for the results (default: benchmark.json)''')
+parser.add_argument('-c', '--compare', help='''JSON results file of an earlier benchmark to compare the run times with''')
+parser.add_argument('-t', '--tol', type=float, default=1E-6, help='''Maximum deviation of a spectrum from its reference,
+                    relative to the largest value of the reference (default: 1E-6)''')
+parser.add_argument('--slowdown', type=float, default=1.25, help='''Run-time ratio to the compared results above which
+                    a run counts as a performance regression (default: 1.25)''')
+parser.add_argument('--min_time', type=float, default=0.1, help='''Runs faster than this (in s) in both results
+                    are not checked for performance regressions (default: 0.1)''')
+parser.add_argument('-u', '--update', action='store_true', help='''Store the spectra of the runs with the input's own
+                    integ_outer as new references instead of checking them''')
+args = parser.parse_args()
+
+if not sys.warnoptions:
+    warnings.simplefilter("ignore")
+
+
+#-------------------------------------------------------------------------
+# cases and runs
+def select_cases(selection):
+    cases = []
+    for item in selection.split(','):
+        if os.path.isfile(os.path.join(bench_dir, item + '.in')):
+            cases.append(item)
+        else:
+            cases.extend(sorted(os.path.basename(name)[:-3]
+                                for name in glob.glob(os.path.join(bench_dir, item + '_*.in'))))
+    if not cases:
+        sys.exit('!!! No benchmark inputs found for ' + selection + '. Programme terminated.')
+    return cases
+
+def run_case(config, work_dir):
+    # one simulation with the text output of nuclear_dyn.py; returns the result dict of simulate
+    with open(os.path.join(work_dir, 'eldest.out'), 'w') as outfile, \
+         open(os.path.join(work_dir, 'full.dat'), 'w') as pure_out, \
+         open(os.path.join(work_dir, 'movie.dat'), 'w') as movie_out:
+        axes = {}
+        def on_start(Ekins_au, t_aus):
+            axes['E_kin_au'] = Ekins_au
+        def on_step(t_au, squares, wp_ampls):
+            if config.wavepac_only:
+                return
+            movie_out.write('"' + format(sciconv.atu_to_second(t_au)*1E15, '.3f') + ' fs' + '"' + '\n')
+            outlines = [in_out.prep_output(sum_square, E_kin_au, t_au)
+                        for sum_square, E_kin_au in zip(squares, axes['E_kin_au'])]
+            in_out.doout_1f(pure_out, outlines)
+            in_out.doout_movie(movie_out, outlines)
+        return nuclear_dyn.simulate(config, outfile=outfile, quiet=True, on_start=on_start, on_step=on_step)
+
+def deviation(result, ref):
+    # largest deviation of the spectrum from the reference, relative to the largest reference value
+    if (result['spectrum'].shape != ref['spectrum'].shape
+        or not np.allclose(result['E_kin_au'], ref['E_kin_au']) or not np.allclose(result['t_au'], ref['t_au'])):
+        return np.inf
+    return float(np.max(np.abs(result['spectrum'] - ref['spectrum'])) / np.max(np.abs(ref['spectrum'])))
+
+def git_commit():
+    try:
+        return subprocess.check_output(['git', 'rev-parse', 'HEAD'], cwd=bench_dir,
+                                       stderr=subprocess.DEVNULL).decode().strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+#-------------------------------------------------------------------------
+cases = select_cases(args.sizes)
+run_backends = args.backends.split(',') if args.backends else [None]
+for backend in run_backends:
+    if backend not in (None,) + backends:
+        sys.exit('!!! Unknown outer-integration scheme ' + backend + '. Programme terminated.')
+os.makedirs(ref_dir, exist_ok=True)
+
+results = {'date': str(datetime.now()), 'commit': git_commit(),
+           'host': platform.node(), 'python': platform.python_version(),
+           'numpy': np.__version__, 'scipy': scipy.__version__,
+           'tol': args.tol, 'runs': []}
+failed = []
+
+print('{:24s} {:16s} {:>8s} {:>8s} {:>8s} {:>8s} {:>8s} {:>9s}  {}'.format(
+    'case', 'integ_outer', 'fc [s]', 'W_l [s]', 'loop [s]', 'out [s]', 'total', 'max dev', 'check'))
+for case in cases:
+    config = in_out.parse_input(os.path.join(bench_dir, case + '.in'))
+    ref_file = os.path.join(ref_dir, case + '.npz')
+    for backend in run_backends:
+        backend = backend or config.integ_outer
+        if (backend == 'analytic' and not config.X_gauss):
+            continue
+        run_config = config._replace(integ_outer=backend)
+        with tempfile.TemporaryDirectory() as work_dir:
+            t_start = time.perf_counter()
+            result = run_case(run_config, work_dir)
+            total = time.perf_counter() - t_start
+        timings = result['timings']
+
+        if args.update and (backend == config.integ_outer):
+            np.savez(ref_file, spectrum=result['spectrum'], E_kin_au=result['E_kin_au'], t_au=result['t_au'],
+                     wp_res=result['wp_res'])
+            dev, check = 0., 'stored'
+        elif os.path.isfile(ref_file):
+            dev = deviation(result, np.load(ref_file))
+            check = 'ok' if (dev <= args.tol) else 'FAILED'
+        else:
+            dev, check = None, 'no reference'      # counts as failed, store one with -u
+        if (check in ('FAILED', 'no reference')):
+            failed.append(case + ' ' + backend)
+
+        results['runs'].append({'case': case, 'integ_outer': backend,
+                                'fin_pot_type': config.fin_pot_type, 'X_shape': 'sinsq' if config.X_sinsq else 'gauss',
+                                'fc_method': config.fc_method,
+                                'n_t': len(result['t_au']), 'n_E': len(result['E_kin_au']), 'n_mu': len(result['E_mus']),
+                                'timings': timings, 'evals': result['evals'], 'total': total,
+                                'max_rel_dev': dev, 'check': check})
+        print('{:24s} {:16s} {:8.3f} {:8.3f} {:8.3f} {:8.3f} {:8.3f} {:>9s}  {}'.format(
+            case, backend, timings['setup'] + timings['fc'], timings['W_lambda'],
+            timings['prepare'] + timings['time_loop'], timings.get('output', 0.), total,
+            '{:.2E}'.format(dev) if dev is not None else '-', check), flush=True)
+
+with open(args.outfile, 'w') as f:
+    json.dump(results, f, indent=1)
+print('Results written to ' + args.outfile)
+
+
+#-------------------------------------------------------------------------
+# comparison with an earlier benchmark
+slower = []
+if args.compare:
+    with open(args.compare, 'r') as f:
+        old_runs = dict(((run['case'], run['integ_outer']), run) for run in json.load(f)['runs'])
+    print()
+    print('Comparison with ' + args.compare)
+    print('{:24s} {:16s} {:>9s} {:>9s} {:>7s}'.format('case', 'integ_outer', 'old [s]', 'new [s]', 'ratio'))
+    for run in results['runs']:
+        old = old_runs.get((run['case'], run['integ_outer']))
+        if old is None:
+            continue
+        ratio = run['total'] / old['total']
+        regression = (ratio > args.slowdown and max(run['total'], old['total']) > args.min_time)
+        print('{:24s} {:16s} {:9.3f} {:9.3f} {:7.2f}  {}'.format(
+            run['case'], run['integ_outer'], old['total'], run['total'], ratio, 'SLOWER' if regression else ''))
+        if regression:
+            slower.append(run['case'] + ' ' + run['integ_outer'])
+
+if failed:
+    print('!!! Spectra deviating from or without a reference: ' + ', '.join(failed))
+if slower:
+    print('!!! Performance regressions: ' + ', '.join(slower))
+if failed or slower:
+    sys.exit(1)
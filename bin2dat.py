@@ -0,0 +1,25 @@
+#!/usr/bin/python
+
+##########################################################################
+#                                    ELDEST                              #
+#        Investigating Electronic Decay Processes with Streaking         #
+##########################################################################
+# Purpose:                                                               #
+#          - Regenerates the text files full.dat and movie.dat from the  #
+#            binary output (full.npy, full.json) of nuclear_dyn.py -b.   #
+#                                                                        #
+##########################################################################
+
+import argparse
+
+import in_out
+
+parser = argparse.ArgumentParser(
+        description='''ELDEST -- bin2dat.py :
+        Converts the binary spectrum of nuclear_dyn.py -b into full.dat and movie.dat.''')
+parser.add_argument('name', nargs='?', default='full', help='Name of the binary output without extension (default: full)')
+parser.add_argument('-o', '--full', default='full.dat', help='Name of the full.dat-style output file (default: full.dat)')
+parser.add_argument('-m', '--movie', default='movie.dat', help='Name of the movie.dat-style output file (default: movie.dat)')
+args = parser.parse_args()
+
+in_out.binary_to_text(args.name, args.full, args.movie)
@@ -0,0 +1,60 @@
+##########################################################################
+#                     CLASSICAL NUCLEAR DYNAMICS                         #
+##########################################################################
+# Purpose:                                                               #
+#          - Velocity Verlet propagation of the internuclear distance R  #
+#            on a potential curve with analytic gradient (see            #
+#            potentials.expr6_grad etc.).                                #
+#          - The Verlet substep is independent of the output time step,  #
+#            one call propagates over a whole output step.               #
+#          - R and v may be NumPy arrays: a whole ensemble of            #
+#            trajectories is propagated at once.                         #
+#          - Wigner sampling of the initial conditions for the           #
+#            vibrational ground state of a harmonic curve.               #
+#          - Works with python 2 and 3 (used by the legacy scripts).     #
+#                                                                        #
+##########################################################################
+
+import numpy as np
+
+#-------------------------------------------------------------------------
+#   propagation
+def verlet(R, v, grad, mass, dt, n_sub=10):
+    # propagates R, v over dt in n_sub velocity Verlet steps; grad(R) = dV/dR
+    h = float(dt) / n_sub
+    a = - grad(R) / mass
+    for i in range(0,n_sub):
+        v = v + 0.5 * h * a
+        R = R + h * v
+        a = - grad(R) / mass
+        v = v + 0.5 * h * a
+    return R, v
+
+def trajectories(R, v, grad, mass, timestep, n_steps, n_sub=10):
+    # R and v of all trajectories on the output grid t = 0, timestep, ..., n_steps*timestep
+    # returns arrays of shape (n_steps+1,) + np.shape(R)
+    Rs = np.empty((n_steps+1,) + np.shape(R))
+    vs = np.empty((n_steps+1,) + np.shape(R))
+    Rs[0] = R
+    vs[0] = v
+    for n in range(1,n_steps+1):
+        R, v = verlet(R, v, grad, mass, timestep, n_sub)
+        Rs[n] = R
+        vs[n] = v
+    return Rs, vs
+
+
+#-------------------------------------------------------------------------
+#   initial conditions
+def harmonic_omega(grad, R_eq, mass, delta=1E-4):
+    # vibrational frequency of a curve at its minimum R_eq, V''(R_eq) as the central difference of the analytic V'
+    curv = (grad(R_eq + delta) - grad(R_eq - delta)) / (2 * delta)
+    return np.sqrt(curv / mass)
+
+def wigner_sample(n_traj, R_eq, mass, omega, seed=None):
+    # Wigner distribution of the harmonic vibrational ground state:
+    # Gaussians with sigma_R = 1 / sqrt(2 m omega), sigma_p = sqrt(m omega / 2)
+    rng = np.random.RandomState(seed)
+    R = rng.normal(R_eq, 1. / np.sqrt(2 * mass * omega), n_traj)
+    p = rng.normal(0., np.sqrt(mass * omega / 2), n_traj)
+    return R, p / mass
@@ -8,6 +8,7 @@
 # written by: Elke Fasshauer May 2018                                    #
 ##########################################################################
 
+import math
 import numpy
 import scipy.integrate as integrate
 
@@ -36,6 +37,111 @@ def complex_romberg(func, a, b, **kwargs):
     imag_integral = integrate.romberg(imag_func, a, b, **kwargs)
     return real_integral + 1j*imag_integral
 
+#-------------------------------------------------------------------------
+#   fixed-grid integration
+#   The integrand is evaluated once on all nodes (func has to accept a NumPy
+#   array of times); the integral is taken along the last axis of func(x),
+#   so that integrands broadcasting over further parameters are integrated
+#   in the same call. Real and imaginary part are done in one complex pass.
+
+fixed_nodes_cache = {}     # (n, rule) -> (x, w); plain dict so that the module stays importable with python 2
+
+def fixed_nodes(n, rule='gauss_legendre'):      # nodes and weights on [-1,1]
+    if (n, rule) in fixed_nodes_cache:
+        return fixed_nodes_cache[(n, rule)]
+    if (rule == 'gauss_legendre'):
+        x, w = numpy.polynomial.legendre.leggauss(n)
+    elif (rule == 'clenshaw_curtis'):
+        N = n - 1 + (n - 1) % 2                 # the weight formula below needs an even number of intervals
+        k = numpy.arange(0, N+1)
+        x = numpy.cos(k * numpy.pi / N)
+        j = numpy.arange(1, N//2 + 1)
+        b = numpy.where(j == N//2, 1., 2.)
+        c = numpy.where((k == 0) | (k == N), 1., 2.)
+        w = c / N * (1 - numpy.sum(b[:,None] / (4*j[:,None]**2 - 1)
+                                   * numpy.cos(2 * j[:,None] * k[None,:] * numpy.pi / N),
+                                   axis=0))
+    else:
+        raise ValueError('unknown fixed-grid quadrature rule: ' + str(rule))
+    x.flags.writeable = False
+    w.flags.writeable = False
+    fixed_nodes_cache[(n, rule)] = (x, w)
+    return x, w
+
+def nodes_for_bandwidth(omega_max, a, b, n_min=64):
+    # number of nodes to resolve exp(i omega t), |omega| <= omega_max, on (a,b):
+    # twice the number of oscillations plus a safety margin
+    return int(n_min + 2 * omega_max * abs(b - a) / numpy.pi)
+
+def complex_fixed_quad(func, a, b, n=200, rule='gauss_legendre'):
+    x, w = fixed_nodes(n, rule)
+    half = (b - a) / 2.
+    t = half * x + (a + b) / 2.
+    return half * numpy.dot(func(t), w)
+
+#-------------------------------------------------------------------------
+#   Fourier integrals of smooth functions (Filon trapezoidal rule)
+#   int_a^b dt g(t) exp(i omega t) is taken as the exact integral of the
+#   piecewise-linear interpolant of g on n+1 equidistant nodes, so that the
+#   error only depends on the smoothness of g, not on omega.
+#   With theta = omega h the result is
+#     h * ( (I(theta) + I(-theta)) sum_j g_j exp(i omega t_j)
+#           - I(-theta) g_0 exp(i omega a) - I(theta) g_n exp(i omega b) ),
+#   I(theta) = int_0^1 ds (1-s) exp(i theta s); for omega on a uniform grid
+#   the sums over the nodes for all omega are one chirp-z transform.
+#   The O(h**2) error is removed by one Richardson step with every second
+#   node (n even), which leaves O(h**4).
+
+def filon_endpoint(theta):     # I(theta), theta may be complex
+    theta = numpy.asarray(theta, dtype=complex)
+    I = numpy.empty(theta.shape, dtype=complex)
+    small = (numpy.abs(theta) < 1)
+    th = theta[~small]
+    I[~small] = (1 + 1j*th - numpy.exp(1j*th)) / th**2
+    series = 0                  # closed form cancels for small theta: I = sum_m (i theta)**m / (m+2)!
+    for m in range(17, -1, -1):
+        series = series * 1j*theta[small] + 1. / math.factorial(m+2)
+    I[small] = series
+    return I
+
+def filon_sums(g, a, b, omegas, node_sums):
+    # node_sums(g, h) = sum_j g_j exp(i omega t_j) for all omegas
+    def single(g):
+        h = (b - a) / (len(g) - 1)
+        I_plus = filon_endpoint(omegas * h)
+        I_minus = filon_endpoint(-omegas * h)
+        return h * ((I_plus + I_minus) * node_sums(g, h)
+                    - I_minus * g[0] * numpy.exp(1j * omegas * a)
+                    - I_plus * g[-1] * numpy.exp(1j * omegas * b))
+    if (len(g) % 2 == 1 and len(g) >= 5):
+        return (4 * single(g) - single(g[::2])) / 3
+    return single(g)
+
+def filon_fourier(g, a, b, omegas, chunk=2**22):
+    # int_a^b dt g(t) exp(i omega t) for all omega in omegas (any, also complex),
+    # g: samples of the integrand on numpy.linspace(a, b, len(g))
+    omegas = numpy.asarray(omegas)
+    if (a == b):
+        return numpy.zeros(omegas.shape, dtype=complex)
+    flat = omegas.ravel()
+    def node_sums(g, h):
+        t = numpy.linspace(a, b, len(g))
+        step = max(1, chunk // len(g))      # limits the (omega x node) array
+        return numpy.concatenate([numpy.dot(numpy.exp(1j * flat[i:i+step,None] * t[None,:]), g)
+                                  for i in range(0, len(flat), step)])
+    return filon_sums(g, a, b, flat, node_sums).reshape(omegas.shape)
+
+def filon_fourier_grid(g, a, b, omega0, d_omega, m):
+    # same for the m equidistant omega0 + k d_omega, k = 0..m-1, by a chirp-z transform (O((n+m) log(n+m)))
+    from scipy.signal import czt        # scipy >= 1.8, only needed here
+    omegas = omega0 + d_omega * numpy.arange(m)
+    if (a == b):
+        return numpy.zeros(m, dtype=complex)
+    def node_sums(g, h):
+        # sum_j g_j exp(i omega_k (a + j h)) = exp(i omega_k a) sum_j g_j exp(i omega0 h)**j exp(i d_omega h)**(j k)
+        return numpy.exp(1j * omegas * a) * czt(g, m, w=numpy.exp(1j * d_omega * h), a=numpy.exp(-1j * omega0 * h))
+    return filon_sums(g, a, b, omegas, node_sums)
+
 def complex_double_quadrature(outer, inner, a, b, gfun, hfun, **kwargs):
     first_real = lambda y,x: numpy.real(outer(x)) * numpy.real(inner(y))
     sec_real   = lambda y,x: - numpy.imag(outer(x)) * numpy.imag(inner(y))
@@ -0,0 +1,2 @@
+# pytest configuration: the python 2 scripts named like tests are not test modules
+collect_ignore = ['test_example.py', 'test_integrals.py', 'erf_test.py']
@@ -0,0 +1,58 @@
+##########################################################################
+#                       FRANCK-CONDON CACHE                              #
+##########################################################################
+# Purpose:                                                               #
+#          - Persistent, content-addressed store (.npz) for the          #
+#            Franck-Condon overlaps gs_res, gs_fin, res_fin and          #
+#            res_fin_woVR of nuclear_dyn.py.                             #
+#          - The key is the hash of everything the overlaps depend on:   #
+#            potential parameters, reduced mass, R range, integration    #
+#            settings and the values of V(R) = sqrt(Gamma(R)/2pi)        #
+#            on a probe grid (so that also functions read by -g are      #
+#            distinguished).                                             #
+#          - fc_format is part of the key: it is increased whenever the  #
+#            calculation of the overlaps changes their values, so that   #
+#            entries of older versions are never reused.                 #
+#                                                                        #
+##########################################################################
+
+import hashlib
+import json
+import numpy as np
+import os
+
+fc_names = ('gs_res', 'gs_fin', 'res_fin', 'res_fin_woVR', 'E_mus', 'R_hyp_steps')
+fc_format = 2       # 2: hyperbolic continuum states from wellenfkt.coulomb_f0
+
+#-------------------------------------------------------------------------
+def fc_key(params, V_of_R, R_min, R_max, n_probe=1001):
+    R_probe = np.linspace(R_min, R_max, n_probe)
+    try:
+        V_probe = np.broadcast_to(np.asarray(V_of_R(R_probe), dtype=complex), R_probe.shape)
+    except (TypeError, ValueError):     # V_of_R not vectorized (e.g. Gamma(R) read by -g)
+        V_probe = np.array([complex(V_of_R(R)) for R in R_probe])
+    h = hashlib.sha256()
+    h.update(json.dumps(dict(params, fc_format=fc_format), sort_keys=True).encode())
+    h.update(np.ascontiguousarray(V_probe).tobytes())
+    return h.hexdigest()
+
+def fc_path(cache_dir, key):
+    return os.path.join(cache_dir, 'fc_' + key[:20] + '.npz')
+
+def load_fc(cache_dir, key):     # returns dict of nested lists (as used in nuclear_dyn.py) or None
+    path = fc_path(cache_dir, key)
+    if not os.path.isfile(path):
+        return None
+    with np.load(path) as data:
+        if (str(data['key']) != key):
+            return None
+        return {name: data[name].tolist() for name in fc_names if name in data.files}
+
+def save_fc(cache_dir, key, params, **fcs):
+    os.makedirs(cache_dir, exist_ok=True)
+    path = fc_path(cache_dir, key)
+    arrays = {name: np.array(fcs[name]) for name in fc_names if fcs.get(name) is not None}
+    tmp_path = path + '.' + str(os.getpid()) + '.tmp.npz'
+    np.savez(tmp_path, key=key, fc_format=fc_format, params=json.dumps(params, sort_keys=True), **arrays)
+    os.replace(tmp_path, path)      # atomic, so that concurrent runs never read half-written files
+    return path
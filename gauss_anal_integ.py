@@ -0,0 +1,86 @@
+##########################################################################
+#                ANALYTIC INTEGRALS Gaussian XUV pulse                   #
+##########################################################################
+# Purpose:                                                               #
+#          - Closed-form time integrals over the convoluted Gaussian     #
+#            XUV field FX(t1) = -(A0X cos(Omega t1) f(t1))' times a      #
+#            (complex) exponential, used as outer integrals in           #
+#            nuclear_dyn.py.                                             #
+#          - erf of complex arguments is evaluated through the Faddeeva  #
+#            function w(z) = exp(-z**2) erfc(-iz), which stays finite    #
+#            where exp(-sigma**2 kappa**2 / 2) underflows and erf        #
+#            overflows.                                                  #
+#                                                                        #
+##########################################################################
+
+import numpy as np
+from scipy.special import wofz
+
+import complex_integration as ci
+
+#-------------------------------------------------------------------------
+#   building blocks
+def gauss_exp_primitive(t, kappa, sigma):
+    # G(t) = exp(-sigma**2 kappa**2 / 2) * exp(-z**2) * w(iz),  z = (t - i sigma**2 kappa) / (sqrt(2) sigma)
+    # = exp(-t**2 / (2 sigma**2) + i kappa t) * w(iz)
+    # for Im(iz) < 0 use w(iz) = 2 exp(z**2) - w(-iz), so that only w in the upper half plane is needed
+    iz = (1j * t + sigma**2 * kappa) / (np.sqrt(2) * sigma)
+    upper = (np.imag(iz) >= 0)
+    pref = np.exp(-t**2 / (2 * sigma**2) + 1j * kappa * t)
+    with np.errstate(over='ignore', invalid='ignore'):
+        G = np.where(upper,
+                     pref * wofz(np.where(upper, iz, -iz)),
+                     2 * np.exp(-sigma**2 * kappa**2 / 2) - pref * wofz(np.where(upper, iz, -iz)))
+    return G
+
+def gauss_fourier(kappa, a, b, sigma):
+    # int_a^b dt f(t) exp(i kappa t),  f(t) = exp(-t**2 / (2 sigma**2)) / sqrt(2 pi sigma**2)
+    # = 1/2 exp(-sigma**2 kappa**2 / 2) (erf(z_b) - erf(z_a)) = 1/2 (G(a) - G(b))
+    return 0.5 * (gauss_exp_primitive(a, kappa, sigma) - gauss_exp_primitive(b, kappa, sigma))
+
+def FX_fourier(kappa, a, b, A0X, Omega, sigma):
+    # int_a^b dt1 FX(t1) exp(i kappa t1) for the convoluted Gaussian pulse
+    # FX = -g'  with  g(t1) = A0X cos(Omega t1) f(t1)  ->  integrate by parts
+    g = lambda t1: (A0X * np.cos(Omega * t1)
+                    * np.exp(-t1**2 / (2 * sigma**2)) / np.sqrt(2 * np.pi * sigma**2))
+    boundary = - (g(b) * np.exp(1j * kappa * b) - g(a) * np.exp(1j * kappa * a))
+    g_fourier = A0X / 2 * (gauss_fourier(kappa + Omega, a, b, sigma)
+                           + gauss_fourier(kappa - Omega, a, b, sigma))
+    return boundary + 1j * kappa * g_fourier
+
+
+#-------------------------------------------------------------------------
+#   outer integrals of nuclear_dyn.py
+#   (E_tot = E_kin + E_fin + E_mu, E_res = Er + E_lambda, W = W_lambda;
+#    all arguments may be NumPy arrays that broadcast against each other)
+def dir_integral(E_tot, t, a, T_up, A0X, Omega, sigma):
+    # int_a^T_up dt1 FX(t1) exp(i E_tot (t1 - t))
+    return np.exp(-1j * E_tot * t) * FX_fourier(E_tot, a, T_up, A0X, Omega, sigma)
+
+def res_integral(E_tot, E_res, W, t, a, T_up, A0X, Omega, sigma):
+    # int_a^T_up dt1 FX(t1) exp(t1 (pi W + i E_res)) * res_inner(t1), res_inner analytic:
+    # = exp(-i t E_tot) / D * ( exp(t D) int FX exp(t1 (pi W + i E_res)) - int FX exp(i E_tot t1) ),
+    # D = i (E_tot - E_res) - pi W
+    D = 1j * (E_tot - E_res) - np.pi * W
+    return (np.exp(-1j * t * E_tot) / D
+            * (np.exp(t * D) * FX_fourier(E_res - 1j * np.pi * W, a, T_up, A0X, Omega, sigma)
+               - FX_fourier(E_tot, a, T_up, A0X, Omega, sigma)))
+
+
+#-------------------------------------------------------------------------
+#   accuracy check against adaptive quadrature
+def quad_check(E_tot, E_res, W, t, a, T_up, A0X, Omega, sigma):
+    # returns the relative deviations of dir_integral and res_integral from complex_quadrature
+    f = lambda t1: np.exp(-t1**2 / (2 * sigma**2)) / np.sqrt(2 * np.pi * sigma**2)
+    fp = lambda t1: -t1 / np.sqrt(2 * np.pi) / sigma**3 * np.exp(-t1**2 / (2 * sigma**2))
+    FX = lambda t1: - A0X * np.cos(Omega * t1) * fp(t1) + A0X * Omega * np.sin(Omega * t1) * f(t1)
+    D = 1j * (E_tot - E_res) - np.pi * W
+    dir_fun = lambda t1: FX(t1) * np.exp(1j * E_tot * (t1 - t))
+    res_fun = lambda t1: (FX(t1) * np.exp(t1 * (np.pi * W + 1j * E_res))
+                          * 1. / D * (np.exp(t * D) - np.exp(t1 * D)) * np.exp(-1j * t * E_tot))
+    dir_quad = ci.complex_quadrature(dir_fun, a, T_up, limit=500, epsabs=0)[0]
+    res_quad = ci.complex_quadrature(res_fun, a, T_up, limit=500, epsabs=0)[0]
+    dir_anal = dir_integral(E_tot, t, a, T_up, A0X, Omega, sigma)
+    res_anal = res_integral(E_tot, E_res, W, t, a, T_up, A0X, Omega, sigma)
+    return (np.abs(dir_anal - dir_quad) / np.abs(dir_quad),
+            np.abs(res_anal - res_quad) / np.abs(res_quad))
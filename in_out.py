@@ -8,374 +8,233 @@
 # written by: Elke Fasshauer May 2018                                    #
 ##########################################################################
 
+from collections import namedtuple
+import hashlib
+import json
 import sciconv
 import numpy as np
+import os
 import sys
 
 
 #-------------------------------------------------------------------------
-#   input
-def read_input(inputfile, outfile):
-#-------------------------------------------------------------------------
-    # define default parameters
-    # transitions dipole moments
-    rdg_au       = 0.3            # transition dipole moment into the resonance state
-    cdg_au       = 0.9            # transition dipole moment into any continuum state
-    q            = 1
+#   input: keyword table of the input file
+# Every input parameter is a field of the (frozen, hashable) Config, in the order of the
+# read_input return tuple. input_fields: (name, default, type, echo) with type float, str or bool,
+# echo 'print' (screen and outfile), 'write' (outfile only) or None.
+input_fields = (
+    ('rdg_au',        0.3,          float, 'print'),    # transition dipole moment into the resonance state
+    ('cdg_au',        0.9,          float, 'print'),    # transition dipole moment into any continuum state
     # parameters of the investigated system
     # the ground state (vibrational gs of electronic gs) energy is being defined as EG = 0
-    Er_a_eV       =  150.0        # resonance energy (at potential minimum) in eV 
-    Er_b_eV       =    0.0
-    tau_a_s       =  0.0
-    tau_b_s       =  0.0
-    E_fin_eV      =  70.0         # final state energy (at potential minimum) in eV
-    tau_s         =  4.0E-16      # lifetime in s
-    E_fin_eV_2    =  0.0
-    tau_s_2       =  4.0E-16
-    interact_eV   =  0.0
-    #
+    ('Er_a_eV',       150.0,        float, 'print'),    # resonance energy (at potential minimum) in eV
+    ('Er_b_eV',       0.0,          float, 'print'),
+    ('tau_a_s',       0.0,          float, 'print'),
+    ('tau_b_s',       0.0,          float, 'print'),
+    ('E_fin_eV',      70.0,         float, 'print'),    # final state energy (at potential minimum) in eV
+    ('tau_s',         4.0E-16,      float, 'print'),    # lifetime in s
+    ('E_fin_eV_2',    0.0,          float, 'print'),
+    ('tau_s_2',       4.0E-16,      float, 'print'),
+    ('interact_eV',   0.0,          float, 'print'),
     # laser parameters
-    Omega_eV      = 150.0         # mean photon energy of the XUV pulse in eV
-    n_X           = 5             # number of cycles within the XUV pulse
-    I_X           = 1.0E12        # intensity of the XUV pulse in W/cm^2
-    X_shape       = "gauss"       # options: gauss, sinsq
-    Xshape        = "convoluted"  # options: convoluted, infinite
-    #
+    ('Omega_eV',      150.0,        float, 'print'),    # mean photon energy of the XUV pulse in eV
+    ('n_X',           5,            float, 'print'),    # number of cycles within the XUV pulse
+    ('I_X',           1.0E12,       float, 'print'),    # intensity of the XUV pulse in W/cm^2
+    ('X_sinsq',       False,        bool,  None),       # set by X_shape
+    ('X_gauss',       True,         bool,  None),       # set by X_shape
+    ('Xshape',        'convoluted', str,   None),       # options: convoluted, infinite
     # dressing laser parameters
-    omega_eV      = 1.6           # IR pulse
-    n_L           = 10
-    I_L           = 1.0E12
-    Lshape        = "sinsq"
-    delta_t_s     = 0.0E-18
-    shift_step_s  = 500.0E-18
-    phi           = 0
-    FWHM_L       = 500E-18
-    #
+    ('omega_eV',      1.6,          float, 'print'),    # IR pulse
+    ('n_L',           10,           float, 'print'),
+    ('I_L',           1.0E12,       float, 'print'),
+    ('Lshape',        'sinsq',      str,   None),
+    ('delta_t_s',     0.0E-18,      float, 'print'),
+    ('shift_step_s',  500.0E-18,    float, 'print'),
+    ('phi',           0,            float, 'print'),
+    ('q',             1,            float, 'print'),
+    ('FWHM_L',        500E-18,      float, 'print'),
     # parameters of the simulation
-    tmax_s        = 2.5E-15       # simulate until time tmax in s
-    timestep_s    = 0.5E-16       # evaluate expression every timestep_s seconds
-    E_step_eV     = 1.00          # energy difference between different evaluated electron kinetic energies 
-    #
-    E_min_eV      =  30.0
-    E_max_eV      =  50.0
-    #
-    integ         = "analytic"    # options: analytic, (quadrature, romberg - both currently unavailable)  
-    integ_outer   = "romberg"     # options: quadrature, romberg
-    Gamma_type    = "const"       # options: const, R6, exp
-    #
-    fc_precalc    = "False"       #
-    partial_GamR  = "None"        # options: None, pre, exp
-    part_fc_pre   = "False"       #
-    wavepac_only  = "False"       #
-    #
+    ('tmax_s',        2.5E-15,      float, 'print'),    # simulate until time tmax in s
+    ('timestep_s',    0.5E-16,      float, 'print'),    # evaluate expression every timestep_s seconds
+    ('E_step_eV',     1.00,         float, 'print'),    # energy difference between different evaluated electron kinetic energies
+    ('E_min_eV',      30.0,         float, 'print'),
+    ('E_max_eV',      50.0,         float, 'print'),
+    ('integ',         'analytic',   str,   None),       # options: analytic, (quadrature, romberg - both currently unavailable)
+    ('integ_outer',   'romberg',    str,   None),       # options: quadrature, romberg, gauss_legendre, clenshaw_curtis, spectral, analytic (gauss only)
+    ('Gamma_type',    'const',      str,   None),       # options: const, R6, exp, external
+    ('fc_precalc',    False,        bool,  None),
+    ('partial_GamR',  None,         str,   None),       # options: None, pre, exp
+    ('part_fc_pre',   False,        bool,  None),
+    ('wavepac_only',  False,        bool,  None),
+    ('fc_method',     'mpmath',     str,   None),       # options: mpmath, grid (only grid uses wellenfkt.coulomb_f0 for hyperbel)
     # parameters for the nuclear dynamics
-    mass1         = 20.1797       # in g/mol
-    mass2         = 20.1797       # in g/mol
-    grad_delta    = 0.001
-    R_eq_AA       = 3.08
+    ('mass1',         20.1797,      float, 'write'),    # in g/mol
+    ('mass2',         20.1797,      float, 'write'),    # in g/mol
+    ('grad_delta',    0.001,        float, 'write'),
+    ('R_eq_AA',       3.08,         float, 'write'),
     # vibrational states parameters  # provide everything in au (de in Hartree, a in inverse Bohr, Req in Bohr)
-    # ground-state parameters
-    gs_de      = 0
-    gs_a       = 0
-    gs_Req     = 0
-    gs_const   = 47.6930
-    # resonance-state parameters
-    res_de     = -33.179112
-    res_a      = 1.930064
-    res_Req    = 37.757254
-    res_const  = 47.6930
-    # final-state parameters
-    fin_a      = -15.869110       # for morse: fin_de; for hyperbel or hypfree: V_a in au (Hartree * Bohr)
-    fin_b      = 1.659155         # for morse: fin_a; for hyperbel or hypfree: V_b in au (Hartree)
-    fin_c      = 75.293906        # for morse: fin_Req; for hyperbel or hypfree: step width for R_start for vibrational energies (fin_a/R_start) in au (Bohr)
-    fin_d      = 47.6930          # for morse: fin_const; for hyperbel or hypfree: FC factor threshold for calculating the trs integral
-    fin_pot_type  = 'morse'       # options: morse, hyperbel, hypfree
-#-------------------------------------------------------------------------
+    ('gs_de',         0,            float, 'write'),
+    ('gs_a',          0,            float, 'write'),
+    ('gs_Req',        0,            float, 'write'),
+    ('gs_const',      47.6930,      float, 'write'),
+    ('res_de',        -33.179112,   float, 'write'),
+    ('res_a',         1.930064,     float, 'write'),
+    ('res_Req',       37.757254,    float, 'write'),
+    ('res_const',     47.6930,      float, 'write'),
+    ('fin_a',         -15.869110,   float, 'write'),    # for morse: fin_de; for hyperbel or hypfree: V_a in au (Hartree * Bohr)
+    ('fin_b',         1.659155,     float, 'write'),    # for morse: fin_a; for hyperbel or hypfree: V_b in au (Hartree)
+    ('fin_c',         75.293906,    float, 'write'),    # for morse: fin_Req; for hyperbel or hypfree: step width for R_start in au (Bohr)
+    ('fin_d',         47.6930,      float, 'write'),    # for morse: fin_const; for hyperbel or hypfree: FC factor threshold
+    ('fin_pot_type',  'morse',      str,   'write'),    # options: morse, hyperbel, hypfree
+    )
+
+Config = namedtuple('Config', [field[0] for field in input_fields])
+
+# keywords with a fixed set of options:
+# {keyword: ({word: (field values, message)}, (field values, message) for any other word)}
+input_choices = {
+    'X_shape':      ({'sinsq':           ({'X_sinsq': True, 'X_gauss': False}, 'X_shape = Sin**2'),
+                      'gauss':           ({'X_sinsq': False, 'X_gauss': True}, 'X_shape = Gauss')},
+                     ({}, 'no XUV pulse shape selected')),
+    'Xshape':       ({'infinite':        ({'Xshape': 'infinite'}, 'Infinite XUV pulse selected'),
+                      'convoluted':      ({'Xshape': 'convoluted'}, 'Convoluted XUV pulse selected')},
+                     ({}, None)),
+    'Lshape':       ({'gauss':           ({'Lshape': 'gauss'}, 'Gaussian shaped IR pulse selected'),
+                      'sinsq':           ({'Lshape': 'sinsq'}, 'Sinsq shaped IR pulse selected')},
+                     ({}, None)),
+    'integ':        ({'romberg':         ({'integ': 'romberg'}, 'Integration Scheme of the inner integral = Romberg'),
+                      'quadrature':      ({'integ': 'quadrature'}, 'Integration Scheme of the inner integral = Gaussian Quadrature'),
+                      'analytic':        ({'integ': 'analytic'}, 'Integration Scheme of the inner integral = analytic')},
+                     ({}, 'no integration scheme selected')),
+    'integ_outer':  ({'romberg':         ({'integ_outer': 'romberg'}, 'Integration Scheme of the outer integral = Romberg'),
+                      'quadrature':      ({'integ_outer': 'quadrature'}, 'Integration Scheme of the outer integral = Gaussian Quadrature'),
+                      'gauss_legendre':  ({'integ_outer': 'gauss_legendre'}, 'Integration Scheme of the outer integral = fixed-grid Gauss-Legendre'),
+                      'clenshaw_curtis': ({'integ_outer': 'clenshaw_curtis'}, 'Integration Scheme of the outer integral = fixed-grid Clenshaw-Curtis'),
+                      'spectral':        ({'integ_outer': 'spectral'}, 'Integration Scheme of the outer integral = spectral (Filon rule, chirp-z transform over E_kin)'),
+                      'analytic':        ({'integ_outer': 'analytic'}, 'Integration Scheme of the outer integral = analytic (Gaussian pulse only)')},
+                     ({}, 'no integration scheme selected')),
+    'Gamma_type':   ({'const':           ({'Gamma_type': 'const'}, 'Dependence of Gamma on R: constant'),
+                      'R6':              ({'Gamma_type': 'R6'}, 'Dependence of Gamma on R: R^(-6)'),
+                      'exp':             ({'Gamma_type': 'exp'}, 'Dependence of Gamma on R: e^(-aR)'),
+                      'external':        ({'Gamma_type': 'external'}, 'Dependence of Gamma on R: provided by external file')},
+                     ({}, 'no Gamma type selected')),
+    'partial_GamR': ({'pre':             ({'partial_GamR': 'pre'}, 'Gamma(R) dependence used only in overlap integrals in transition-amplitude prefactors'),
+                      'prefactor':       ({'partial_GamR': 'pre'}, 'Gamma(R) dependence used only in overlap integrals in transition-amplitude prefactors'),
+                      'exp':             ({'partial_GamR': 'exp'}, 'Gamma(R) dependence used only in W_lambda in the transition-amplitude exponents'),
+                      'exponent':        ({'partial_GamR': 'exp'}, 'Gamma(R) dependence used only in W_lambda in the transition-amplitude exponents'),
+                      'Wl':              ({'partial_GamR': 'exp'}, 'Gamma(R) dependence used only in W_lambda in the transition-amplitude exponents')},
+                     ({'partial_GamR': None}, None)),
+    'fc_method':    ({'grid':            ({'fc_method': 'grid'}, 'Franck-Condon overlaps from wavefunctions tabulated on a common R grid'),
+                      'mpmath':          ({'fc_method': 'mpmath'}, 'Franck-Condon overlaps by adaptive mpmath quadrature')},
+                     ({}, 'no Franck-Condon integration method selected')),
+    }
+
+def echo(message, outfile, value=None):
+    if outfile is None:
+        return
+    if value is None:
+        print(message)
+        outfile.write(message + '\n')
+    else:
+        print(message + ' = ', value)
+        outfile.write(message + ' = ' + str(value) + '\n')
 
-    f = open(inputfile, 'r')
-    
-    lines = f.readlines()
-    
-    for line in lines:
-        words = line.split()
-        if (words[0] == 'rdg_au'):
-            rdg_au = float(words[2])
-            print('rdg_au = ', rdg_au)
-            outfile.write('rdg_au = ' + str(rdg_au) + '\n')
-        elif (words[0] == 'cdg_au'):
-            cdg_au = float(words[2])
-            print('cdg_au = ', cdg_au)
-            outfile.write('cdg_au = ' + str(cdg_au) + '\n')
-    
-    # energy parameters of the system
-        elif (words[0] == 'Er_a_eV'):
-            Er_a_eV = float(words[2])
-            print('Er_a_eV = ', Er_a_eV)
-            outfile.write('Er_a_eV = ' + str(Er_a_eV) + '\n')
-        elif (words[0] == 'Er_b_eV'):
-            Er_b_eV = float(words[2])
-            print('Er_b_eV = ', Er_b_eV)
-            outfile.write('Er_b_eV = ' + str(Er_b_eV) + '\n')
-        elif (words[0] == 'E_fin_eV'):
-            E_fin_eV = float(words[2])
-            print('E_fin_eV = ', E_fin_eV)
-            outfile.write('E_fin_eV = ' + str(E_fin_eV) + '\n')
-        elif (words[0] == 'tau_s'):
-            tau_s = float(words[2])
-            print('tau_s = ', tau_s)
-            outfile.write('tau_s = ' + str(tau_s) + '\n')
-        elif (words[0] == 'E_fin_eV_2'):
-            E_fin_eV_2 = float(words[2])
-            print('E_fin_eV_2 = ', E_fin_eV_2)
-            outfile.write('E_fin_eV_2 = ' + str(E_fin_eV_2) + '\n')
-        elif (words[0] == 'tau_a_s'):
-            tau_a_s = float(words[2])
-            print('tau_a_s = ', tau_a_s)
-            outfile.write('tau_a_s = ' + str(tau_a_s) + '\n')
-        elif (words[0] == 'tau_b_s'):
-            tau_b_s = float(words[2])
-            print('tau_b_s = ', tau_b_s)
-            outfile.write('tau_b_s = ' + str(tau_b_s) + '\n')
-        elif (words[0] == 'tau_s_2'):
-            tau_s_2 = float(words[2])
-            print('tau_s_2 = ', tau_s_2)
-            outfile.write('tau_s_2 = ' + str(tau_s_2) + '\n')
-        elif (words[0] == 'interact_eV'):
-            interact_eV = float(words[2])
-            print('interact_eV = ', interact_eV)
-            outfile.write('interact_eV = ' + str(interact_eV) + '\n')
-    
-    # exciting laser parameters
-        elif (words[0] == 'Omega_eV'):
-            Omega_eV = float(words[2])
-            print('Omega_eV = ', Omega_eV)
-            outfile.write('Omega_eV = ' + str(Omega_eV) + '\n')
-        elif (words[0] == 'n_X'):
-            n_X = float(words[2])
-            print('n_X = ', n_X)
-            outfile.write('n_X = ' + str(n_X) + '\n')
-        elif (words[0] == 'I_X'):
-            I_X = float(words[2])
-            print('I_X = ', I_X)
-            outfile.write('I_X = ' + str(I_X) + '\n')
-        elif (words[0] == 'X_shape'):
-            if (words[2] == 'sinsq'):
-                X_sinsq = True
-                X_gauss = False
-                print('X_shape = Sin**2')
-                outfile.write('X_shape = Sin**2 \n')
-            elif (words[2] == 'gauss'):
-                X_sinsq = False
-                X_gauss = True
-                print('X_shape = Gauss')
-                outfile.write('X_shape = Gauss \n')
-            else:
-                print('no XUV pulse shape selected')
-                outfile.write('no XUV pulse shape selected \n')
-        elif (words[0] == 'Xshape'):
-            if (words[2] == 'infinite'):
-                Xshape = 'infinite'
-                outfile.write('Infinite XUV pulse selected \n')
-                print('Infinite XUV pulse selected')
-            elif (words[2] == 'convoluted'):
-                Xshape = 'convoluted'
-                outfile.write('Convoluted XUV pulse selected \n')
-                print('Convoluted XUV pulse selected')
-    
-    # dressing laser parameters
-        elif (words[0] == 'omega_eV'):
-            omega_eV = float(words[2])
-            print('omega_eV = ', omega_eV)
-            outfile.write('omega_eV = ' + str(omega_eV) + '\n')
-        elif (words[0] == 'n_L'):
-            n_L = float(words[2])
-            print('n_L = ', n_L)
-            outfile.write('n_L = ' + str(n_L) + '\n')
-        elif (words[0] == 'I_L'):
-            I_L = float(words[2])
-            print('I_L = ', I_L)
-            outfile.write('I_L = ' + str(I_L) + '\n')
-        elif (words[0] == 'Lshape'):
-            if (words[2] == 'gauss'):
-                Lshape = 'gauss'
-                outfile.write('Gaussian shaped IR pulse selected \n')
-                print('Gaussian shaped IR pulse selected')
-            elif (words[2] == 'sinsq'):
-                Lshape = 'sinsq'
-                outfile.write('Sinsq shaped IR pulse selected \n')
-                print('Sinsq shaped IR pulse selected')
-        elif (words[0] == 'delta_t_s'):
-            delta_t_s = float(words[2])
-            print('delta_t_s = ', delta_t_s)
-            outfile.write('delta_t_s = ' + str(delta_t_s) + '\n')
-        elif (words[0] == 'shift_step_s'):
-            shift_step_s = float(words[2])
-            print('shift_step_s = ', shift_step_s)
-            outfile.write('shift_step_s = ' + str(shift_step_s) + '\n')
-        elif (words[0] == 'FWHM_L'):
-            FWHM_L = float(words[2])
-            print('FWHM_L_s = ', FWHM_L)
-            outfile.write('FWHM_L = ' + str(FWHM_L) + '\n')
-        elif (words[0] == 'phi'):
-            phi = float(words[2])
-            print('phi = ', phi)
-            outfile.write('phi = ' + str(phi) + '\n')
-        elif (words[0] == 'q'):
-            q = float(words[2])
-            print('q = ', q)
-            outfile.write('q = ' + str(q) + '\n')
-    
-    # parameters of the simulation
-        elif (words[0] == 'tmax_s'):
-            tmax_s = float(words[2])
-            print('tmax_s = ', tmax_s)
-            outfile.write('tmax_s = ' + str(tmax_s) + '\n')
-        elif (words[0] == 'timestep_s'):
-            timestep_s = float(words[2])
-            print('timestep_s = ', timestep_s)
-            outfile.write('timestep_s = ' + str(timestep_s) + '\n')
-        elif (words[0] == 'E_step_eV'):
-            E_step_eV = float(words[2])
-            print('E_step_eV = ', E_step_eV)
-            outfile.write('E_step_eV = ' + str(E_step_eV) + '\n')
-    
-        elif (words[0] == 'E_min_eV'):
-            E_min_eV = float(words[2])
-            print('E_min_eV = ', E_min_eV)
-            outfile.write('E_min_eV = ' + str(E_min_eV) + '\n')
-        elif (words[0] == 'E_max_eV'):
-            E_max_eV = float(words[2])
-            print('E_max_eV = ', E_max_eV)
-            outfile.write('E_max_eV = ' + str(E_max_eV) + '\n')
+def parse_input(inputfile, outfile=None):
+    # reads the input file into a Config; with outfile = None nothing is printed or written
+    values = dict((name, default) for (name, default, kind, echo_to) in input_fields)
+    fields = dict((name, (kind, echo_to)) for (name, default, kind, echo_to) in input_fields)
 
-        elif (words[0] == 'integ'):
-            if (words[2] == 'romberg'):
-                integ = 'romberg'
-                print('Integration Scheme of the inner integral = Romberg')
-                outfile.write('Integration Scheme of the inner integral = Romberg \n')
-            elif (words[2] == 'quadrature'):
-                integ = 'quadrature'
-                print('Integration Scheme of the inner integral = Gaussian Quadrature')
-                outfile.write('Integration Scheme of the inner integral = Gaussian Quadrature \n')
-            elif (words[2] == 'analytic'):
-                integ = 'analytic'
-                print('Integration Scheme of the inner integral = analytic')
-                outfile.write('Integration Scheme of the inner integral = analytic \n')
-            else:
-                print('no integration scheme selected')
-                outfile.write('no integration scheme selected \n')
-            
-        elif (words[0] == 'integ_outer'):
-            if (words[2] == 'romberg'):
-                integ_outer = 'romberg'
-                print('Integration Scheme of the outer integral = Romberg')
-                outfile.write('Integration Scheme of the outer integral = Romberg \n')
-            elif (words[2] == 'quadrature'):
-                integ_outer = 'quadrature'
-                print('Integration Scheme of the outer integral = Gaussian Quadrature')
-                outfile.write('Integration Scheme of the outer integral = Gaussian Quadrature \n')
-            else:
-                print('no integration scheme selected')
-                outfile.write('no integration scheme selected \n')
+    with open(inputfile, 'r') as f:
+        for line in f:
+            words = line.split()
+            if (len(words) < 3):
+                continue
+            key = words[0]
+
+            if key in input_choices:
+                options, other = input_choices[key]
+                new_values, message = options.get(words[2], other)
+                values.update(new_values)
+                if message is not None:
+                    echo(message, outfile)
+
+            elif key in fields:
+                kind, echo_to = fields[key]
+                if (kind == bool):
+                    values[key] = (words[2].lower() == 'true')
+                else:
+                    values[key] = kind(words[2])
+                if (key == 'gs_de' and outfile is not None):
+                    outfile.write('Parameters of potential energy curves:' + '\n')
+                if (echo_to == 'print'):
+                    echo(key, outfile, values[key])
+                elif (echo_to == 'write' and outfile is not None):
+                    outfile.write(key + ' = ' + str(values[key]) + '\n')
+
+    if (values['fin_pot_type'] not in ['morse','hyperbel', 'hypfree']):
+        print('Non-existent final state potential type chosen, QUIT')
+        sys.exit()
+
+    return Config(**values)
+
+def read_input(inputfile, outfile):
+    # the parameters of parse_input as a plain tuple, in the order of input_fields
+    return tuple(parse_input(inputfile, outfile))
+
+def config_hash(config):
+    # stable hash of all parameters, e.g. to key caches across runs
+    text = json.dumps(config._asdict(), sort_keys=True)
+    return hashlib.sha256(text.encode('utf-8')).hexdigest()
+
+
+#-------------------------------------------------------------------------
+#   input in atomic units
+AtomicUnits = namedtuple('AtomicUnits', [
+    'Er_a_au', 'Er_b_au', 'E_fin_au', 'Gamma_au', 'E_fin_au_2', 'Gamma_au_2', 'interact_au',
+    'Omega_au', 'I_X_au', 'A0X',
+    'omega_au', 'TL_au', 'I_L_au', 'A0L', 'delta_t_au', 'shift_step_au', 'FWHM_L_au',
+    'tmax_au', 'timestep_au', 'E_step_au', 'E_min_au', 'E_max_au',
+    'VEr_au', 'red_mass', 'R_eq_au'])
+
+def atomic_units(config):
+    # unit-converted view of a Config; not memoized, callers keep the result
+    ev = sciconv.ev_to_hartree
+    sec = sciconv.second_to_atu
+    width = lambda tau_s: 1. / sec(tau_s) if tau_s else 0.     # unused states have lifetime 0
+    Gamma_au = width(config.tau_s)
+    Omega_au = ev(config.Omega_eV)
+    omega_au = ev(config.omega_eV)
+    I_X_au = sciconv.Wcm2_to_aiu(config.I_X)
+    I_L_au = sciconv.Wcm2_to_aiu(config.I_L)
+    red_mass_gmol = config.mass1 * config.mass2 / (config.mass1 + config.mass2)
+    au = AtomicUnits(
+        Er_a_au       = ev(config.Er_a_eV),
+        Er_b_au       = ev(config.Er_b_eV),
+        E_fin_au      = ev(config.E_fin_eV),
+        Gamma_au      = Gamma_au,
+        E_fin_au_2    = ev(config.E_fin_eV_2),
+        Gamma_au_2    = width(config.tau_s_2),
+        interact_au   = ev(config.interact_eV),
+        Omega_au      = Omega_au,
+        I_X_au        = I_X_au,
+        A0X           = np.sqrt(I_X_au) / Omega_au,
+        omega_au      = omega_au,
+        TL_au         = config.n_L * 2 * np.pi / omega_au,
+        I_L_au        = I_L_au,
+        A0L           = np.sqrt(I_L_au) / omega_au,
+        delta_t_au    = sec(config.delta_t_s),
+        shift_step_au = sec(config.shift_step_s),
+        FWHM_L_au     = sec(config.FWHM_L),
+        tmax_au       = sec(config.tmax_s),
+        timestep_au   = sec(config.timestep_s),
+        E_step_au     = ev(config.E_step_eV),
+        E_min_au      = ev(config.E_min_eV),
+        E_max_au      = ev(config.E_max_eV),
+        VEr_au        = np.sqrt(Gamma_au / (2 * np.pi)),
+        red_mass      = sciconv.gmol_to_me(red_mass_gmol),
+        R_eq_au       = sciconv.angstrom_to_bohr(config.R_eq_AA))
+    return au
 
-        elif (words[0] == 'Gamma_type'):
-            if (words[2] == 'const'):
-                Gamma_type = 'const'
-                print('Dependence of Gamma on R: constant')
-                outfile.write('Dependence of Gamma on R = constant \n')
-            elif (words[2] == 'R6'):
-                Gamma_type = 'R6'
-                print('Dependence of Gamma on R: R^(-6)')
-                outfile.write('Dependence of Gamma on R: R^(-6) \n')
-            elif (words[2] == 'exp'):
-                Gamma_type = 'exp'
-                print('Dependence of Gamma on R: e^(-aR)')
-                outfile.write('Dependence of Gamma on R: e^(-aR) \n')
-            elif (words[2] == 'external'):
-                Gamma_type = 'external'
-                print('Dependence of Gamma on R: provided by external file')
-                outfile.write('Dependence of Gamma on R: provided by external file \n')
-            else:
-                print('no Gamma type selected')
-                outfile.write('no Gamma type selected \n')
-
-        elif (words[0] == 'fc_precalc'):
-            fc_precalc = True if words[2].lower() == 'true' else False
-        elif (words[0] == 'partial_GamR'):
-            if (words[2] in ('pre', 'prefactor')):
-                partial_GamR = 'pre'
-                print('Gamma(R) dependence used only in overlap integrals in transition-amplitude prefactors')
-                outfile.write('Gamma(R) dependence used only in overlap integrals in transition-amplitude prefactors\n')
-            elif (words[2] in ('exp', 'exponent', 'Wl')):
-                partial_GamR = 'exp'
-                print('Gamma(R) dependence used only in W_lambda in the transition-amplitude exponents')
-                outfile.write('Gamma(R) dependence used only in W_lambda in the transition-amplitude exponents\n')
-            else:
-                partial_GamR = None
-        elif (words[0] == 'part_fc_pre'):
-            part_fc_pre = True if words[2].lower() == 'true' else False
-        elif (words[0] == 'wavepac_only'):
-            wavepac_only = True if words[2].lower() == 'true' else False
-
-        elif (words[0] == 'gs_de'):
-            outfile.write('Parameters of potential energy curves:' + '\n')
-            gs_de = float(words[2])
-            outfile.write('gs_de = ' + str(gs_de) + '\n')
-        elif (words[0] == 'gs_a'):
-            gs_a = float(words[2])
-            outfile.write('gs_a = ' + str(gs_a) + '\n')
-        elif (words[0] == 'gs_Req'):
-            gs_Req = float(words[2])
-            outfile.write('gs_Req = ' + str(gs_Req) + '\n')
-        elif (words[0] == 'gs_const'):
-            gs_const = float(words[2])
-            outfile.write('gs_const = ' + str(gs_const) + '\n')
-        elif (words[0] == 'res_de'):
-            res_de = float(words[2])
-            outfile.write('res_de = ' + str(res_de) + '\n')
-        elif (words[0] == 'res_a'):
-            res_a = float(words[2])
-            outfile.write('res_a = ' + str(res_a) + '\n')
-        elif (words[0] == 'res_Req'):
-            res_Req = float(words[2])
-            outfile.write('res_Req = ' + str(res_Req) + '\n')
-        elif (words[0] == 'res_const'):
-            res_const = float(words[2])
-            outfile.write('res_const = ' + str(res_const) + '\n')
-        elif (words[0] == 'fin_a'):
-            fin_a = float(words[2])
-            outfile.write('fin_a = ' + str(fin_a) + '\n')
-        elif (words[0] == 'fin_b'):
-            fin_b = float(words[2])
-            outfile.write('fin_b = ' + str(fin_b) + '\n')
-        elif (words[0] == 'fin_c'):
-            fin_c = float(words[2])
-            outfile.write('fin_c = ' + str(fin_c) + '\n')
-        elif (words[0] == 'fin_d'):
-            fin_d = float(words[2])
-            outfile.write('fin_d = ' + str(fin_d) + '\n')
-        elif (words[0] == 'fin_pot_type'):
-            fin_pot_type = str(words[2])
-            outfile.write('fin_pot_type = ' + str(fin_pot_type) + '\n')
-            if (fin_pot_type not in ['morse','hyperbel', 'hypfree']):
-                print('Non-existent final state potential type chosen, QUIT')
-                sys.exit()
-    
-    f.close()
-    return (rdg_au, cdg_au,
-            Er_a_eV, Er_b_eV, tau_a_s, tau_b_s, E_fin_eV, tau_s, E_fin_eV_2, tau_s_2,
-            interact_eV,
-            Omega_eV, n_X, I_X, X_sinsq, X_gauss, Xshape,
-            omega_eV, n_L, I_L, Lshape, delta_t_s, shift_step_s, phi, q, FWHM_L,
-            tmax_s, timestep_s, E_step_eV,
-            E_min_eV, E_max_eV,
-            integ, integ_outer, Gamma_type,
-            fc_precalc, partial_GamR, part_fc_pre, wavepac_only,
-            mass1, mass2, grad_delta, R_eq_AA,
-            gs_de, gs_a, gs_Req, gs_const,
-            res_de, res_a, res_Req, res_const,
-            fin_a, fin_b, fin_c, fin_d, fin_pot_type
-            )
 
 #-------------------------------------------------------------------------
 #   input
@@ -661,14 +520,20 @@ def read_input_old(inputfile, outfile):
 def check_input(Er, E_fin, Gamma,
                 Omega, TX, n_X, A0X,
                 omega, TL, A0L, delta_t,
-                tmax, timestep, E_step):
-    print('Input Check')
+                tmax, timestep, E_step, outfile=None, quiet=False):
+    # the messages go to the screen (unless quiet) and to outfile (if given)
+    def report(message):
+        if not quiet:
+            print(message)
+        if outfile is not None:
+            outfile.write(message + '\n')
+
+    report('Input Check')
 
     if (E_fin > Omega):
-        exit('Warning: E_fin > Omega' + '\n'
-             + 'Stopping Script')
+        raise ValueError('!!! E_fin > Omega. Programme terminated.')
 
-    print('Input fulfills requirements')
+    report('Input fulfills requirements')
 
     return 0
     
@@ -784,3 +649,53 @@ def doout_movie(filename, outlines):
     res_lines = '\n'.join(outlines)
     res_lines = res_lines + '\n' + '' + '\n' + '' + '\n'
     filename.write(res_lines)
+
+
+#-------------------------------------------------------------------------
+#   binary output: intensities as a (time x E_kin) array in a memory-mappable .npy file,
+#   the axes in a small JSON header next to it (name.npy, name.json)
+#   rows_written in the header is updated every flush_rows rows (after the rows are on disk),
+#   so that the rows of a killed run up to the last update can still be converted
+flush_rows = 10
+
+def write_header(name, header):
+    tmp_name = name + '.json.tmp'
+    with open(tmp_name, mode='w') as f:
+        json.dump(header, f)
+    os.replace(tmp_name, name + '.json')    # never a half-written header
+
+def open_binary(name, E_kins_au, t_aus):
+    header = {'E_kin_au': [float(E) for E in E_kins_au],
+              't_au': [float(t) for t in t_aus],
+              'shape': [len(t_aus), len(E_kins_au)],
+              'rows_written': 0}
+    write_header(name, header)
+    data = np.lib.format.open_memmap(name + '.npy', mode='w+', dtype=np.float64,
+                                     shape=(len(t_aus), len(E_kins_au)))
+    return data, header
+
+def doout_binary(name, data, header, squares):
+    # one row of intensities per time step, in time order
+    data[header['rows_written']] = squares
+    header['rows_written'] = header['rows_written'] + 1
+    if (header['rows_written'] % flush_rows == 0):
+        data.flush()
+        write_header(name, header)
+
+def close_binary(name, data, header):
+    data.flush()
+    write_header(name, header)
+
+def binary_to_text(name, full_name='full.dat', movie_name='movie.dat'):
+    # regenerates the legacy text files from name.npy / name.json
+    with open(name + '.json', mode='r') as f:
+        header = json.load(f)
+    data = np.load(name + '.npy', mmap_mode='r')
+    with open(full_name, mode='w') as pure_out, open(movie_name, mode='w') as movie_out:
+        for i in range(header['rows_written']):
+            t_au = header['t_au'][i]
+            outlines = [prep_output(I, E_kin_au, t_au)
+                        for I, E_kin_au in zip(data[i].tolist(), header['E_kin_au'])]
+            movie_out.write('"' + format(sciconv.atu_to_second(t_au)*1E15, '.3f') + ' fs' + '"' + '\n')
+            doout_1f(pure_out, outlines)
+            doout_movie(movie_out, outlines)
@@ -18,6 +18,7 @@ from scipy.signal import argrelextrema
 import numpy as np
 import sciconv
 import complex_integration as ci
+import streaking
 import in_out
 import sys
 import warnings
@@ -249,10 +250,12 @@ fun_t_dir_1 = lambda t1: FX_t1(t1) * np.exp(1j * E_fin_au * t1) \
 fun_TX2_dir_1 = lambda t1: FX_t1(t1) * np.exp(1j * E_fin_au * t1) \
                                    * np.exp(1j * p_au**2/2 * (t1-TX_au/2))
 
-dress_I = lambda t1: integrate.quad(integ_IR,t1,t_au)[0]
+dress_I = lambda t1: streaking.volkov_sinsq(p_au, t1, t_au,            # = int_t1^t dt3 integ_IR(t3), analytic
+                                           A0L, omega_au, TL_au, delta_t_au, phi)
 dress = lambda t1: np.exp(-1j/2 * dress_I(t1))
 
-dress_I_after = lambda t1: integrate.quad(integ_IR,t1,(delta_t_au + TL_au/2))[0]
+dress_I_after = lambda t1: streaking.volkov_sinsq(p_au, t1, (delta_t_au + TL_au/2),
+                                                 A0L, omega_au, TL_au, delta_t_au, phi)
 dress_after = lambda t1: np.exp(-1j/2 * dress_I_after(t1))
 #fun_dress_after = lambda t1: (FX_t1(t1)
 #                              * np.exp(1j * E_fin_au * t1) \
@@ -19,6 +19,8 @@ from scipy.special import erf
 import numpy as np
 import sciconv
 import complex_integration as ci
+import res_history
+import streaking
 import pulses
 import in_out
 import sys
@@ -224,10 +226,12 @@ Mr = lambda t1: N0 * (1
 fun_t_dir_1 = lambda t1: FX_t1(t1)   * np.exp(1j * (E_kin_au + E_fin_au_ini) * t1)
 fun_t_TX2_1 = lambda t1: FX_t1(t1)   * np.exp(1j * (E_kin_au + E_fin_au_ini) * t1)
 
-dress_I = lambda t1: integrate.quad(integ_IR,t1,t_au)[0]
+dress_I = lambda t1: streaking.volkov_sinsq(p_au, t1, t_au,            # = int_t1^t dt3 integ_IR(t3), analytic
+                                           A0L, omega_au, TL_au, delta_t_au, phi)
 dress = lambda t1: np.exp(-1j/2 * dress_I(t1))
 
-dress_I_after = lambda t1: integrate.quad(integ_IR,t1,(delta_t_au + TL_au/2))[0]
+dress_I_after = lambda t1: streaking.volkov_sinsq(p_au, t1, (delta_t_au + TL_au/2),
+                                                 A0L, omega_au, TL_au, delta_t_au, phi)
 dress_after = lambda t1: np.exp(-1j/2 * dress_I_after(t1))
 fun_dress_after = lambda t1: FX_t1(t1) * np.exp(1j * E_fin_au * t1) \
                               * np.exp(1j * E_kin_au * ((delta_t_au + TL_au/2)-t_au)) \
@@ -366,8 +370,8 @@ E_fin_au_1 = tmpfin
 E_fin_au_ini = tmpfin
 Er_a_au = tmpEr
 
-# initiate array of tuples
-res_tuples = []
+# initiate the resonance history (running sums over the past time slices, see res_history.py)
+res_hist = res_history.new_history(len(Ekins1))
 
 #---------------------------------------------
 n = 0
@@ -422,7 +426,7 @@ while (E_kin_au <= E_max_au):
             res_J1 = prefac_res1 * res_I
             indir_J1 = prefac_indir1 * res_I
 
-        res_tuples.append(tuple((n,res_J1, indir_J1, E_fin_au)))
+        res_history.add_slice(res_hist, n, E_index, res_J1, indir_J1, E_fin_au)
 
         J = (0
              + dir_J1
@@ -513,19 +517,12 @@ while ((t_au <= 0) and (t_au <= tmax_au)):
                 res_J1 = prefac_res1 * res_I
                 indir_J1 = prefac_indir1 * res_I
     
-            res_tuples.append(tuple((n,resstate1, resstate2, T_K + E_fin_au)))
+            res_history.add_slice(res_hist, n, E_index, resstate1, resstate2, T_K + E_fin_au)
             
             J = dir_J1
-            for time in range(0,n+1):
-                first = res_tuples[len(Ekins1)*time + E_index][1] * Ires[0]
-                if (time !=1):
-                    sec = res_tuples[len(Ekins1)*time + E_index][2] * Ires[0]
-                else:
-                    sec = res_tuples[len(Ekins1)*time + E_index][2] * I1[0]
-                new_part = (first - sec) \
-                           * np.exp(-1j * t_au * (E_kin_au
-                                    + res_tuples[len(Ekins1*time) + E_index][3]))
-                J = J + new_part
+            new_parts, square_parts = res_history.contributions(res_hist, E_index, t_au, E_kin_au,
+                                                                Ires[0], I1[0], dir_J1)
+            J = J + new_parts
     
             square = np.absolute(J)**2
             squares = np.append(squares, square)
@@ -631,21 +628,14 @@ while ((t_au <= TX_au/2) and (t_au <= tmax_au)):
                 indir_J1 = prefac_indir1 * res_I
     
             if (E_res_R >= E_fin_R):
-                res_tuples.append(tuple((n,resstate1, resstate2, T_K + E_fin_au)))
+                res_history.add_slice(res_hist, n, E_index, resstate1, resstate2, T_K + E_fin_au)
             else:
-                res_tuples.append(tuple((n,0, 0, T_K + E_fin_au)))
+                res_history.add_slice(res_hist, n, E_index, 0, 0, T_K + E_fin_au)
             
             J = dir_J1
-            for time in range(0,n+1):
-                first = res_tuples[len(Ekins1)*time + E_index][1] * Ires[0]
-                if (time !=1):
-                    sec = res_tuples[len(Ekins1)*time + E_index][2] * Ires[0]
-                else:
-                    sec = res_tuples[len(Ekins1)*time + E_index][2] * I1[0]
-                new_part = (first - sec) \
-                           * np.exp(-1j * t_au * (E_kin_au
-                                    + res_tuples[len(Ekins1*time) + E_index][3]))
-                J = J + new_part
+            new_parts, square_parts = res_history.contributions(res_hist, E_index, t_au, E_kin_au,
+                                                                Ires[0], I1[0], dir_J1)
+            J = J + new_parts
     
 
             square = np.absolute(J)**2
@@ -753,21 +743,14 @@ while (t_au >= TX_au/2 and (t_au <= (delta_t_au - a)) and (t_au <= tmax_au)):
     
             #res_tuples.append(tuple((n,resstate1, resstate2, T_K + E_fin_au)))
             if (E_res_R >= E_fin_R):
-                res_tuples.append(tuple((n,resstate1, resstate2, T_K + E_fin_au)))
+                res_history.add_slice(res_hist, n, E_index, resstate1, resstate2, T_K + E_fin_au)
             else:
-                res_tuples.append(tuple((n,0, 0, T_K + E_fin_au)))
+                res_history.add_slice(res_hist, n, E_index, 0, 0, T_K + E_fin_au)
             
             J = dir_J1
-            for time in range(0,n+1):
-                first = res_tuples[len(Ekins1)*time + E_index][1] * Ires[0]
-                if (time !=1):
-                    sec = res_tuples[len(Ekins1)*time + E_index][2] * Ires[0]
-                else:
-                    sec = res_tuples[len(Ekins1)*time + E_index][2] * I1[0]
-                new_part = (first - sec) \
-                           * np.exp(-1j * t_au * (E_kin_au
-                                    + res_tuples[len(Ekins1*time) + E_index][3]))
-                J = J + new_part
+            new_parts, square_parts = res_history.contributions(res_hist, E_index, t_au, E_kin_au,
+                                                                Ires[0], I1[0], dir_J1)
+            J = J + new_parts
     
             square = np.absolute(J)**2
             squares = np.append(squares, square)
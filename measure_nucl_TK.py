@@ -19,11 +19,13 @@ from scipy.special import erf
 import numpy as np
 import sciconv
 import complex_integration as ci
+import streaking
 import pulses
 import in_out
 import sys
 import warnings
 import potentials
+import classical
 
 
 # don't print warnings unless python -W ... is used
@@ -148,11 +150,20 @@ red_mass = sciconv.gmol_to_me(red_mass_gmol)
 
 R0 = sciconv.angstrom_to_bohr(R_eq_AA)
 v0 = 0
+n_verlet = 10      # velocity Verlet substeps per time step
 T_K = 0
 
 gammar6_a      = Gamma_au * R0**6
 gammar6_b      = Gamma_au_2 * R0**6
 
+# potential curves with the units converted once
+V_RICD_in      = potentials.Expr6Curve(V_RICD_in_a,V_RICD_in_b,V_RICD_in_c,V_RICD_in_d)
+V_fin_RICD     = potentials.HyperbelCurve(V_fin_RICD_a,V_fin_RICD_b)
+V_ICD_in       = potentials.Expr6Curve(V_ICD_in_a,V_ICD_in_b,V_ICD_in_c,V_ICD_in_d)
+V_fin_ICD      = potentials.HyperbelCurve(V_fin_ICD_a,V_fin_ICD_b)
+V_res_a        = potentials.Gammar6Curve(gammar6_a)
+V_res_b        = potentials.Gammar6Curve(gammar6_b)
+
 #-------------------------------------------------------------------------
 in_out.check_input(Er_au, E_fin_au, Gamma_au,
                    Omega_au, TX_au, n_X, A0X,
@@ -227,10 +238,12 @@ fun_t_TX2_1 = lambda t1: FX_t1(t1)   * np.exp(1j * (E_fin_au_TX2 + T_K_TX2) * t1
                                      * np.exp(1j * E_kin_au * (t1-t_au)) \
                                      * np.exp(-1j * (T_K_TX2 + E_fin_au_TX2) * t_au)
 
-dress_I = lambda t1: integrate.quad(integ_IR,t1,t_au)[0]
+dress_I = lambda t1: streaking.volkov_sinsq(p_au, t1, t_au,            # = int_t1^t dt3 integ_IR(t3), analytic
+                                           A0L, omega_au, TL_au, delta_t_au, phi)
 dress = lambda t1: np.exp(-1j/2 * dress_I(t1))
 
-dress_I_after = lambda t1: integrate.quad(integ_IR,t1,(delta_t_au + TL_au/2))[0]
+dress_I_after = lambda t1: streaking.volkov_sinsq(p_au, t1, (delta_t_au + TL_au/2),
+                                                 A0L, omega_au, TL_au, delta_t_au, phi)
 dress_after = lambda t1: np.exp(-1j/2 * dress_I_after(t1))
 fun_dress_after = lambda t1: FX_t1(t1) * np.exp(1j * E_fin_au * t1) \
                               * np.exp(1j * E_kin_au * ((delta_t_au + TL_au/2)-t_au)) \
@@ -355,8 +368,8 @@ N0 = 1. / 4 * rdg_au**2 * np.exp(-sigma**2 * (Omega_au - Er_a_au)**2) \
 #print "E_fin_au_1 = ", E_fin_au_1
 #print "Er_a_au = ", Er_a_au
 
-tmpfin = potentials.hyperbel(V_fin_RICD_a,V_fin_RICD_b,R0)
-tmpEr = potentials.expr6(V_RICD_in_a,V_RICD_in_b,V_RICD_in_c,V_RICD_in_d,R0)
+tmpfin = V_fin_RICD(R0)
+tmpEr = V_RICD_in(R0)
 
 E_fin_au_1 = tmpfin
 Er_a_au = tmpEr
@@ -469,17 +482,13 @@ while ((t_au <= TX_au/2) and (t_au <= tmax_au)):
     t_s = sciconv.atu_to_second(t_au)
     movie_out.write('"' + format(t_s*1E15, '.3f') + ' fs' + '"' + '\n')
 
-    Vplus   = potentials.expr6(V_RICD_in_a,V_RICD_in_b,V_RICD_in_c,V_RICD_in_d,R0+grad_delta)
-    Vminus  = potentials.expr6(V_RICD_in_a,V_RICD_in_b,V_RICD_in_c,V_RICD_in_d,R0-grad_delta)
-    Vgrad   = (Vplus - Vminus) / (2* grad_delta)
-    a       = - Vgrad / red_mass
-    R       = 0.5*a*timestep_au**2 + v0*timestep_au + R0
-    E_res_R = potentials.expr6(V_RICD_in_a,V_RICD_in_b,V_RICD_in_c,V_RICD_in_d,R)
-    E_fin_R = potentials.hyperbel(V_fin_RICD_a,V_fin_RICD_b,R)
-    V_res_R = potentials.gammar6(gammar6_a,R)
+    R, v    = classical.verlet(R0, v0, V_RICD_in.grad, red_mass, timestep_au, n_verlet)
+    E_res_R = V_RICD_in(R)
+    E_fin_R = V_fin_RICD(R)
+    V_res_R = V_res_a(R)
 
     R0 = R
-    v0 = a * timestep_au + v0
+    v0 = v
     print "R0 = ", sciconv.bohr_to_angstrom(R0)
 
     E_fin_laser_au = E_fin_au_1
@@ -566,21 +575,17 @@ while (t_au >= TX_au/2 and (t_au <= (delta_t_au - a)) and (t_au <= tmax_au)):
     print 't_s = ', sciconv.atu_to_second(t_au)
     outfile.write('t_s = ' + str(sciconv.atu_to_second(t_au)) + '\n')
 
-    Vplus   = potentials.expr6(V_RICD_in_a,V_RICD_in_b,V_RICD_in_c,V_RICD_in_d,R0+grad_delta)
-    Vminus  = potentials.expr6(V_RICD_in_a,V_RICD_in_b,V_RICD_in_c,V_RICD_in_d,R0-grad_delta)
-    Vgrad   = (Vplus - Vminus) / (2* grad_delta)
-    a       = - Vgrad / red_mass
-    R       = 0.5*a*timestep_au**2 + v0*timestep_au + R0
-    E_res_R = potentials.expr6(V_RICD_in_a,V_RICD_in_b,V_RICD_in_c,V_RICD_in_d,R)
-    E_fin_R = potentials.hyperbel(V_fin_RICD_a,V_fin_RICD_b,R)
-    V_res_R = potentials.gammar6(gammar6_a,R)
+    R, v    = classical.verlet(R0, v0, V_RICD_in.grad, red_mass, timestep_au, n_verlet)
+    E_res_R = V_RICD_in(R)
+    E_fin_R = V_fin_RICD(R)
+    V_res_R = V_res_a(R)
 
     #print "E_res_R = ", E_res_R
     #print "E_fin_R = ", E_fin_R
     #print "V_res_R = ", V_res_R
 
     R0 = R
-    v0 = a * timestep_au + v0
+    v0 = v
     print "R0 = ", sciconv.bohr_to_angstrom(R0)
 
     E_fin_laser_au = E_fin_au_1
@@ -688,21 +693,17 @@ while (t_au >= (delta_t_au - a) and (t_au <= (delta_t_au + a)) and (t_au <= tmax
     popfile.write(str(sciconv.atu_to_second(t_au)) + '   ' + str(rdg_decay_au**2)
                   + '   ' + str(Mrt**2) + '\n')
 
-    Vplus   = potentials.expr6(V_ICD_in_a,V_ICD_in_b,V_ICD_in_c,V_ICD_in_d,R0+grad_delta)
-    Vminus  = potentials.expr6(V_ICD_in_a,V_ICD_in_b,V_ICD_in_c,V_ICD_in_d,R0-grad_delta)
-    Vgrad   = (Vplus - Vminus) / (2* grad_delta)
-    a       = - Vgrad / red_mass
-    R       = 0.5*a*timestep_au**2 + v0*timestep_au + R0
-    E_res_R = potentials.expr6(V_ICD_in_a,V_ICD_in_b,V_ICD_in_c,V_ICD_in_d,R)
-    E_fin_R = potentials.hyperbel(V_fin_ICD_a,V_fin_ICD_b,R)
-    V_res_R = potentials.gammar6(gammar6_b,R)
+    R, v    = classical.verlet(R0, v0, V_ICD_in.grad, red_mass, timestep_au, n_verlet)
+    E_res_R = V_ICD_in(R)
+    E_fin_R = V_fin_ICD(R)
+    V_res_R = V_res_b(R)
 
-    E_res_RICD = potentials.expr6(V_RICD_in_a,V_RICD_in_b,V_RICD_in_c,V_RICD_in_d,R)
-    E_fin_RICD = potentials.hyperbel(V_fin_RICD_a,V_fin_RICD_b,R)
-    V_res_RICD = potentials.gammar6(gammar6_a,R)
+    E_res_RICD = V_RICD_in(R)
+    E_fin_RICD = V_fin_RICD(R)
+    V_res_RICD = V_res_a(R)
 
     R0 = R
-    v0 = a * timestep_au + v0
+    v0 = v
     print "R0 = ", sciconv.bohr_to_angstrom(R0)
 
     while (E_kin_au <= E_max_au):
@@ -824,21 +825,17 @@ while (t_au >= (delta_t_au + a) and (t_au <= tmax_au)):
     print 't_s = ', sciconv.atu_to_second(t_au)
     outfile.write('t_s = ' + str(sciconv.atu_to_second(t_au)) + '\n')
 
-    Vplus   = potentials.expr6(V_ICD_in_a,V_ICD_in_b,V_ICD_in_c,V_ICD_in_d,R0+grad_delta)
-    Vminus  = potentials.expr6(V_ICD_in_a,V_ICD_in_b,V_ICD_in_c,V_ICD_in_d,R0-grad_delta)
-    Vgrad   = (Vplus - Vminus) / (2* grad_delta)
-    a       = - Vgrad / red_mass
-    R       = 0.5*a*timestep_au**2 + v0*timestep_au + R0
-    E_res_R = potentials.expr6(V_ICD_in_a,V_ICD_in_b,V_ICD_in_c,V_ICD_in_d,R)
-    E_fin_R = potentials.hyperbel(V_fin_ICD_a,V_fin_ICD_b,R)
-    V_res_R = potentials.gammar6(gammar6_b,R)
+    R, v    = classical.verlet(R0, v0, V_ICD_in.grad, red_mass, timestep_au, n_verlet)
+    E_res_R = V_ICD_in(R)
+    E_fin_R = V_fin_ICD(R)
+    V_res_R = V_res_b(R)
 
-    E_res_RICD = potentials.expr6(V_RICD_in_a,V_RICD_in_b,V_RICD_in_c,V_RICD_in_d,R)
-    E_fin_RICD = potentials.hyperbel(V_fin_RICD_a,V_fin_RICD_b,R)
-    V_res_RICD = potentials.gammar6(gammar6_a,R)
+    E_res_RICD = V_RICD_in(R)
+    E_fin_RICD = V_fin_RICD(R)
+    V_res_RICD = V_res_a(R)
 
     R0 = R
-    v0 = a * timestep_au + v0
+    v0 = v
     print "R0 = ", sciconv.bohr_to_angstrom(R0)
 
     while (E_kin_au <= E_max_au):
@@ -15,595 +15,647 @@
 ##########################################################################
 
 import argparse
+import builtins
 from datetime import datetime
 import dill
 import mpmath as mp
+import multiprocessing
 import numpy as np
 from os import devnull
 import scipy
 import scipy.integrate as integrate
 from scipy.signal import argrelextrema
 import sys
+import time
 import warnings
 
 import complex_integration as ci
+import fc_cache
+import gauss_anal_integ as gai
 import in_out
+import profiling
 import sciconv
 import wellenfkt as wf
 
-dt_start = datetime.now()
-
-# set logging outfile
-outfile = open("eldest.out", mode='w')
-
-# don't print warnings unless python -W ... is used
-if not sys.warnoptions:
-    warnings.simplefilter("ignore")
-
-# set up argument parser
-parser = argparse.ArgumentParser(
-        description='''ELDEST -- nuclear_dyn.py :
-        A programme to simulate the time-resolved RICD spectroscopy
-        including quantum nuclear dynamics.''',
-        epilog='Originally written by Elke Fasshauer, extended by Alexander V. Riegel.')
-parser.add_argument('infile', help='Input file for simulation, probably photonucl.in')
-parser.add_argument('-f', '--fc', help='''Optional file with pre-calculated "Franck-Condon overlap integrals"
-                    (which may or may not include weighting functions inside the integrand)
-                    that include the repulsive-potential final state(s).
-                    This option does not work for a Morse-potential final state.
-                    The file is thought to be a reduced copy of eldest.out from a previous calculation:
-                    It may start with an arbitrary number of lines (including zero) preceding the gs-fin FC integrals
-                    provided that their first word is not numeric.
-                    Then the gs-fin integrals shall follow, with the first word indicating the gs quantum number
-                    and the last word being the integral value.
-                    At least one line beginning with a non-numeric word
-                    then separates the gs-fin integrals from the res-fin integrals.
-                    These shall have the structure as described for the gs-fin integrals.
-                    There shall be no dividing line between different res quantum numbers.
-                    The first line not beginning with a numeric word then indicates the endpoint for the read-in routine;
-                    all lines thereafter will be ignored, regardless of their first word.
-                    The gs-res integrals shall not be present and will in every case be directly calulated.
-                    +++ This option is incompatible with the -g/--gamma option.''')
-parser.add_argument('-g', '--gamma', help='''Optional binary file containing the functional dependence
-                    of the decay width Gamma on the internuclear distance R.
-                    The information can be stored as a univariate function or an SciPy interpolator.
-                    Permissible are, besides user-defined functions, all "np.foo" and "scipy.foo",
-                    with full tree beginning at the module, e.g. "np.sqrt";
-                    "myfunc" defined as def myfunc(x): return np.polynomial.hermite.Hermite((2,0,8))(x);
-                    "scipy.interpolate.PchipInterpolator(xarray,yarray)".
-                    The file shall be binary and contain the functional dependence in a pickled form (preferably by dill).
-                    +++ This option is incompatible with the -f/--fc option.''')
-#parser.add_argument('-p', '--partial', help='''If 'prefactor' or 'pre' is chosen, then the Gamma(R) dependence is incorporated
-#                    only into the overlap integrals in the prefactors for the transition amplitude
-#                    but not in W_lambda in the exponents. If 'exponent' or 'exp' or 'Wl' is chosen, the reverse is true.
-#                    If none is given, the Gamma(R) dependence is incorporated in all relevant places (default).''')
-parser.add_argument('-F', '--FC', help='''Same as '-f' and '--fc', but for an additional set with overlap integrals
-                    without Gamma(R) dependence in the res-fin integrals. The file structure is the same as before.
-                    +++ This option is only available if partial_GamR is not None.''')
-#                    +++ This option is only available in combination with the -p/--partial option.''')
-#parser.add_argument('-w', '--wavepacket_only', action='store_true', help='''If this flag is given, only the projection
-#                    onto the vibrational states of the electronic resonance state (needed to reconstruct
-#                    the wavepacket in the resonance state) will be calculated, whereas the calculation of the projections
-#                    onto the final state (needed for the spectrum) will be skipped. Also, progress will be written
-#                    to eldest.out as usual, but existing full.dat and movie.dat files will not be altered.''')
-args = parser.parse_args()
-
-print(str(dt_start))
-outfile.write(str(dt_start) + '\n')
-outfile.write('Tempora mutantur, nos et mutamur in illis.')
-outfile.write("The results were obtained with nuclear_dyn.py \n")
-
-infile = args.infile
-print(infile)
-
 #-------------------------------------------------------------------------
-# set some defaults
-Xshape = 'convoluted'
+max_chunk_size = 2**22      # largest number of elements of the (E_kin x mu x ...) arrays of one chunk of mu
 
 #-------------------------------------------------------------------------
-# read inputfile
-# (see next section for explanations of most symbols)
-# ( * X_sinsq, X_gauss are simply Booleans, created by in_out from X_shape)
-# ( * phi is the phase for the IR pulse potential cosine-oscillation, a remnant from PRA 2020)
-# ( * integ, integ_outer are integration schemes: [analytic,] quadrature, romberg)
-# (currently NOT in use: cdg_au, tau_a_s, tau_b_s interact_eV, Lshape, shift_step_s, phi, grad_delta, R_eq_AA, gs_const, res_const)
-# ( * Er_b_eV and E_fin_eV_2 will be converted to au, but these will not be used afterwards)
-# ( * tau_s_2 will be converted to au at this to Gamma, but this will not be used afterwards)
-# ( * omega_eV will be converted to au, from which TL and A0L are calculated, but other than being used for needless printing and for check_input, they will not be used afterwards)
-# ( * n_L and I_L only lead to related qnts like TL, E0L and A0L, for which above holds)
-# ( * FWHM_L will be converted to au and this printed, but not be used afterwards)
-# ( * fin_d will be used to bind fin_const for Morse final potential, but both will not be used afterwards)
-
-# (q is explicit input, not calced as q = rdg / (cdg pi VEr) = sqrt(2 tau / pi) rdg / cdg )
-
-(rdg_au, cdg_au,
- Er_a_eV, Er_b_eV, tau_a_s, tau_b_s, E_fin_eV, tau_s, E_fin_eV_2, tau_s_2,
- interact_eV,
- Omega_eV, n_X, I_X, X_sinsq, X_gauss, Xshape,
- omega_eV, n_L, I_L, Lshape, delta_t_s, shift_step_s, phi, q, FWHM_L,
- tmax_s, timestep_s, E_step_eV,
- E_min_eV, E_max_eV,
- integ, integ_outer, Gamma_type,
- fc_precalc, partial_GamR, part_fc_pre, wavepac_only,
- mass1, mass2, grad_delta, R_eq_AA,
- gs_de, gs_a, gs_Req, gs_const,
- res_de, res_a, res_Req, res_const,
- fin_a, fin_b, fin_c, fin_d, fin_pot_type
- ) = in_out.read_input(infile, outfile)
+# process pool: the time_step of the simulation that starts the pool is handed to every worker process
+# by the pool initializer (forked, so it is not pickled) and kept there; the calling process keeps no state
+def init_pool_worker(time_step):
+    global worker_step
+    worker_step = time_step
+
+def run_pool_step(t):
+    return worker_step(t)
 
 
 #-------------------------------------------------------------------------
-# open further outputfiles
-pure_out = open('full.dat' if not wavepac_only else devnull, mode='w')
-movie_out = open('movie.dat' if not wavepac_only else devnull, mode='w')
-#popfile = open("pop.dat", mode='w')
-wp_res_out = open('wp_res.dat', mode='w')
-
-if fc_precalc:
-    print('The gs-fin and res-fin Franck-Condon overlap integrals are read from file ' + str(args.fc))
-    outfile.write('The gs-fin and res-fin Franck-Condon overlap integrals are read from file ' + str(args.fc) + '\n')
-else:
-    print('All Franck-Condon overlap integrals are calculated from scratch')
-    outfile.write('All Franck-Condon overlap integrals are calculated from scratch\n')
-
-if partial_GamR:
-    if part_fc_pre:
-        print('Additional res-fin overlap integrals without Gamma(R) dependence are read from file ' + str(args.FC))
-        outfile.write('Additional res-fin overlap integrals without Gamma(R) dependence are read from file ' + str(args.FC) + '\n')
+def simulate(config, fc_infile=None, FC_infile=None, gamma_infile=None, cache_dir=None,
+             workers=1, incremental=False, cumulative=False, refine=0, refine_tol=0.05, E_tol=0., align=False,
+             screen_tol=0., outfile=None, quiet=False, on_start=None, on_step=None, profile=None):
+    # The whole simulation for one input (in_out.Config, see in_out.parse_input), without global state.
+    # fc_infile, FC_infile, gamma_infile, cache_dir, workers, incremental, cumulative, refine, refine_tol, E_tol, align, screen_tol:
+    #   see the options -f, -F, -g, -c, -w, -i, -C, -r, --refine_tol, -e, -a, -s of the command line (cache_dir=None: no FC cache).
+    # The log goes to outfile (if given) and to the screen (unless quiet).
+    # on_start(E_kin_au, t_au) is called before the first time step, on_step(t_au, squares, wp_ampls)
+    # after every time step (in time order), e.g. to write the results as they come in.
+    # profile (profiling.Profile) collects the stage times and integrand evaluations, e.g. to write a trace.
+    # Returns a dict of result arrays, the wall times of the stages of the calculation
+    # and the numbers of integrand evaluations (see the end of the function).
+    if (profile is None):
+        profile = profiling.Profile()
+    if (outfile is None):
+        outfile = open(devnull, mode='w')
+        close_outfile = True
     else:
-        print('Additional res-fin overlap integrals without Gamma(R) dependence are calculated from scratch')
-        outfile.write('Additional res-fin overlap integrals without Gamma(R) dependence are calculated from scratch\n')
-
-if wavepac_only:
-    print('Only the resonance-state projections will be calculated, not the spectrum (final-state projections)')
-    outfile.write('Only the resonance-state projections will be calculated, not the spectrum (final-state projections)' + '\n')
-
-if args.gamma:
-    print('Gamma(R) dependence is read from file ' + str(args.gamma))
-    outfile.write('Gamma(R) dependence is read from file ' + str(args.gamma) + '\n')
-
+        close_outfile = False
+    if quiet:
+        print = lambda *args, **kwargs: None
+    else:
+        print = builtins.print
+    n_workers = max(workers, 1)
+
+    #-------------------------------------------------------------------------
+    # input parameters (as read by in_out.parse_input)
+    # (see next section for explanations of most symbols)
+    # ( * X_sinsq, X_gauss are simply Booleans, created by in_out from X_shape)
+    # ( * phi is the phase for the IR pulse potential cosine-oscillation, a remnant from PRA 2020)
+    # ( * integ, integ_outer are integration schemes: analytic, quadrature, romberg[, gauss_legendre, clenshaw_curtis, spectral])
+    # (currently NOT in use: cdg_au, tau_a_s, tau_b_s interact_eV, Lshape, shift_step_s, phi, grad_delta, R_eq_AA, gs_const, res_const)
+    # ( * Er_b_eV and E_fin_eV_2 will be converted to au, but these will not be used afterwards)
+    # ( * tau_s_2 will be converted to au at this to Gamma, but this will not be used afterwards)
+    # ( * omega_eV will be converted to au, from which TL and A0L are calculated, but other than being used for needless printing and for check_input, they will not be used afterwards)
+    # ( * n_L and I_L only lead to related qnts like TL, E0L and A0L, for which above holds)
+    # ( * FWHM_L will be converted to au and this printed, but not be used afterwards)
+    # ( * fin_d will be used to bind fin_const for Morse final potential, but both will not be used afterwards)
+    # ( * fc_method is the integration scheme for the FC overlaps: mpmath (adaptive, per pair of states) or grid (common R grid, matrix products))
+
+    # (q is explicit input, not calced as q = rdg / (cdg pi VEr) = sqrt(2 tau / pi) rdg / cdg )
+
+    (rdg_au, cdg_au,
+     Er_a_eV, Er_b_eV, tau_a_s, tau_b_s, E_fin_eV, tau_s, E_fin_eV_2, tau_s_2,
+     interact_eV,
+     Omega_eV, n_X, I_X, X_sinsq, X_gauss, Xshape,
+     omega_eV, n_L, I_L, Lshape, delta_t_s, shift_step_s, phi, q, FWHM_L,
+     tmax_s, timestep_s, E_step_eV,
+     E_min_eV, E_max_eV,
+     integ, integ_outer, Gamma_type,
+     fc_precalc, partial_GamR, part_fc_pre, wavepac_only, fc_method,
+     mass1, mass2, grad_delta, R_eq_AA,
+     gs_de, gs_a, gs_Req, gs_const,
+     res_de, res_a, res_Req, res_const,
+     fin_a, fin_b, fin_c, fin_d, fin_pot_type
+     ) = config
+
+    if fc_precalc:
+        print('The gs-fin and res-fin Franck-Condon overlap integrals are read from file ' + str(fc_infile))
+        outfile.write('The gs-fin and res-fin Franck-Condon overlap integrals are read from file ' + str(fc_infile) + '\n')
+    else:
+        print('All Franck-Condon overlap integrals are calculated from scratch')
+        outfile.write('All Franck-Condon overlap integrals are calculated from scratch\n')
 
-#-------------------------------------------------------------------------
-# Convert input parameters to atomic units
-#-------------------------------------------------------------------------
-Er_a_au        = sciconv.ev_to_hartree(Er_a_eV)     # resonance E for RICD + AI
-#Er_b_au        = sciconv.ev_to_hartree(Er_b_eV)     # resonance E for ICD
-Er_au          = Er_a_au        # ? One could delete Er_a_au altogether
-E_fin_au       = sciconv.ev_to_hartree(E_fin_eV)    # (same as for Er)
-E_fin_au_1     = sciconv.ev_to_hartree(E_fin_eV)    # final E for sRICD
-
-tau_au_1       = sciconv.second_to_atu(tau_s)       # lifetime for sRICD res. st.
-tau_au         = tau_au_1                           # (same as for Er)
-Gamma_au       = 1. / tau_au
-Gamma_eV       = sciconv.hartree_to_ev(Gamma_au)
-if Gamma_type == 'const':
-    outfile.write('Gamma_eV = ' + str(Gamma_eV) + '\n')
-
-# second final state
-#E_fin_au_2       = sciconv.ev_to_hartree(E_fin_eV_2)
-#tau_au_2         = sciconv.second_to_atu(tau_s_2)
-#Gamma_au_2       = 1. / tau_au_2
-
-# laser parameters
-Omega_au      = sciconv.ev_to_hartree(Omega_eV)
-if (X_sinsq):
-    TX_au     = n_X * 2 * np.pi / Omega_au
-elif(X_gauss):
-    sigma     = np.pi * n_X / (Omega_au * np.sqrt(np.log(2)))
-    FWHM      = 2 * np.sqrt( 2 * np.log(2)) * sigma
-    TX_au     = 5 * sigma
-    sigma_E   = 1. / (2 * sigma)
-    width_E   = 5 * sigma_E
-    EX_max_au = Omega_au + 0.5 * width_E
-    print('sigma [s] = ', sciconv.atu_to_second(sigma))
-    print('FWHM [s] = ', sciconv.atu_to_second(FWHM))
-    print('sigma_E [eV] = ', sciconv.hartree_to_ev(sigma_E))
-    print('XUV reaches up to {:5.5f} au = {:5.5f} eV'.format(
-        EX_max_au, sciconv.hartree_to_ev(EX_max_au)))
-    outfile.write('sigma [s] = ' + str(sciconv.atu_to_second(sigma)) + '\n')
-    outfile.write('FWHM [s] = ' + str(sciconv.atu_to_second(FWHM)) + '\n')
-    outfile.write('sigma_E [eV] = ' + str(sciconv.hartree_to_ev(sigma_E)) + '\n')
-    outfile.write('XUV reaches up to {:5.5f} au = {:5.5f} eV\n'.format(
-        EX_max_au, sciconv.hartree_to_ev(EX_max_au)))
-print('end of the first pulse [s] = ', sciconv.atu_to_second(TX_au/2))
-outfile.write('end of the first pulse [s] = ' + str(sciconv.atu_to_second(TX_au/2)) + '\n')
-I_X_au        = sciconv.Wcm2_to_aiu(I_X)
-print('I_X [W/cm^2] = ', I_X)
-print('I_X_au = ', I_X_au)
-E0X           = np.sqrt(I_X_au)
-A0X           = E0X / Omega_au
-print('A0X [au] = ', A0X)
-
-omega_au      = sciconv.ev_to_hartree(omega_eV)
-#FWHM_L_au     = sciconv.second_to_atu(FWHM_L)
-#sigma_L_au    = FWHM_L_au / np.sqrt(8 * np.log(2))      # assume Gaussian envelope for second pulse
-#a             = 5./2 * sigma_L_au       # half duration of IR pulse (delta_t - a, delta_t + a); in PRA 2020: small-delta t
-#print("FWHM_L [s] = ", FWHM_L)
-#print("sigma_L [s] = ", sciconv.atu_to_second(sigma_L_au))
-TL_au         = n_L * 2 * np.pi / omega_au
-#print('start of IR pulse [s] = ', delta_t_s - sciconv.atu_to_second(TL_au/2))
-#print('end of IR pulse [s] = ', delta_t_s + sciconv.atu_to_second(TL_au/2))
-I_L_au        = sciconv.Wcm2_to_aiu(I_L)
-#print('I_L [W/cm^2] = ', I_L)
-#print('I_L_au = ', I_L_au)
-E0L           = np.sqrt(I_L_au)
-##print('E0L [au] = ', E0L)
-A0L           = E0L / omega_au
-#print('A0L [au] = ', A0L)
-delta_t_au    = sciconv.second_to_atu(delta_t_s)        # t diff between the maxima of the two pulses
-
-# parameters of the simulation
-tmax_au       = sciconv.second_to_atu(tmax_s)
-timestep_au   = sciconv.second_to_atu(timestep_s)
-E_step_au = sciconv.ev_to_hartree(E_step_eV)
-
-E_min_au = sciconv.ev_to_hartree(E_min_eV)
-E_max_au = sciconv.ev_to_hartree(E_max_eV)
-
-VEr_au        = np.sqrt(Gamma_au/ (2*np.pi))
-#VEr_au_1      = VEr_au      # (same as for Er)
-
-cdg_au_V = rdg_au / ( q * np.pi * VEr_au)
-
-if Gamma_type == 'const':
-    print('VEr_au = ', VEr_au)
-    outfile.write('VEr_au = ' + str(VEr_au) + '\n')
-elif Gamma_type == 'R6':
-    if partial_GamR:
-        VEr_au_woVR = VEr_au
-        print('VEr_au = ', VEr_au)
-        outfile.write('VEr_au = ' + str(VEr_au) + '\n')
-    VEr_au = VEr_au*res_Req**3                            # adjusts VEr_au by the R dependent factor
-    print('VEr_au_adjusted = ', VEr_au)
-    outfile.write('VEr_au_adjusted = ' + str(VEr_au) + '\n')
-elif Gamma_type == 'external':
     if partial_GamR:
-        VEr_au_woVR = VEr_au
+        if part_fc_pre:
+            print('Additional res-fin overlap integrals without Gamma(R) dependence are read from file ' + str(FC_infile))
+            outfile.write('Additional res-fin overlap integrals without Gamma(R) dependence are read from file ' + str(FC_infile) + '\n')
+        else:
+            print('Additional res-fin overlap integrals without Gamma(R) dependence are calculated from scratch')
+            outfile.write('Additional res-fin overlap integrals without Gamma(R) dependence are calculated from scratch\n')
+
+    if wavepac_only:
+        print('Only the resonance-state projections will be calculated, not the spectrum (final-state projections)')
+        outfile.write('Only the resonance-state projections will be calculated, not the spectrum (final-state projections)' + '\n')
+
+    if gamma_infile:
+        print('Gamma(R) dependence is read from file ' + str(gamma_infile))
+        outfile.write('Gamma(R) dependence is read from file ' + str(gamma_infile) + '\n')
+
+
+    #-------------------------------------------------------------------------
+    # Convert input parameters to atomic units
+    #-------------------------------------------------------------------------
+    Er_a_au        = sciconv.ev_to_hartree(Er_a_eV)     # resonance E for RICD + AI
+    #Er_b_au        = sciconv.ev_to_hartree(Er_b_eV)     # resonance E for ICD
+    Er_au          = Er_a_au        # ? One could delete Er_a_au altogether
+    E_fin_au       = sciconv.ev_to_hartree(E_fin_eV)    # (same as for Er)
+    E_fin_au_1     = sciconv.ev_to_hartree(E_fin_eV)    # final E for sRICD
+
+    tau_au_1       = sciconv.second_to_atu(tau_s)       # lifetime for sRICD res. st.
+    tau_au         = tau_au_1                           # (same as for Er)
+    Gamma_au       = 1. / tau_au
+    Gamma_eV       = sciconv.hartree_to_ev(Gamma_au)
+    if Gamma_type == 'const':
+        outfile.write('Gamma_eV = ' + str(Gamma_eV) + '\n')
+
+    # second final state
+    #E_fin_au_2       = sciconv.ev_to_hartree(E_fin_eV_2)
+    #tau_au_2         = sciconv.second_to_atu(tau_s_2)
+    #Gamma_au_2       = 1. / tau_au_2
+
+    # laser parameters
+    Omega_au      = sciconv.ev_to_hartree(Omega_eV)
+    if (X_sinsq):
+        TX_au     = n_X * 2 * np.pi / Omega_au
+    elif(X_gauss):
+        sigma     = np.pi * n_X / (Omega_au * np.sqrt(np.log(2)))
+        FWHM      = 2 * np.sqrt( 2 * np.log(2)) * sigma
+        TX_au     = 5 * sigma
+        sigma_E   = 1. / (2 * sigma)
+        width_E   = 5 * sigma_E
+        EX_max_au = Omega_au + 0.5 * width_E
+        print('sigma [s] = ', sciconv.atu_to_second(sigma))
+        print('FWHM [s] = ', sciconv.atu_to_second(FWHM))
+        print('sigma_E [eV] = ', sciconv.hartree_to_ev(sigma_E))
+        print('XUV reaches up to {:5.5f} au = {:5.5f} eV'.format(
+            EX_max_au, sciconv.hartree_to_ev(EX_max_au)))
+        outfile.write('sigma [s] = ' + str(sciconv.atu_to_second(sigma)) + '\n')
+        outfile.write('FWHM [s] = ' + str(sciconv.atu_to_second(FWHM)) + '\n')
+        outfile.write('sigma_E [eV] = ' + str(sciconv.hartree_to_ev(sigma_E)) + '\n')
+        outfile.write('XUV reaches up to {:5.5f} au = {:5.5f} eV\n'.format(
+            EX_max_au, sciconv.hartree_to_ev(EX_max_au)))
+    print('end of the first pulse [s] = ', sciconv.atu_to_second(TX_au/2))
+    outfile.write('end of the first pulse [s] = ' + str(sciconv.atu_to_second(TX_au/2)) + '\n')
+    I_X_au        = sciconv.Wcm2_to_aiu(I_X)
+    print('I_X [W/cm^2] = ', I_X)
+    print('I_X_au = ', I_X_au)
+    E0X           = np.sqrt(I_X_au)
+    A0X           = E0X / Omega_au
+    print('A0X [au] = ', A0X)
+
+    omega_au      = sciconv.ev_to_hartree(omega_eV)
+    #FWHM_L_au     = sciconv.second_to_atu(FWHM_L)
+    #sigma_L_au    = FWHM_L_au / np.sqrt(8 * np.log(2))      # assume Gaussian envelope for second pulse
+    #a             = 5./2 * sigma_L_au       # half duration of IR pulse (delta_t - a, delta_t + a); in PRA 2020: small-delta t
+    #print("FWHM_L [s] = ", FWHM_L)
+    #print("sigma_L [s] = ", sciconv.atu_to_second(sigma_L_au))
+    TL_au         = n_L * 2 * np.pi / omega_au
+    #print('start of IR pulse [s] = ', delta_t_s - sciconv.atu_to_second(TL_au/2))
+    #print('end of IR pulse [s] = ', delta_t_s + sciconv.atu_to_second(TL_au/2))
+    I_L_au        = sciconv.Wcm2_to_aiu(I_L)
+    #print('I_L [W/cm^2] = ', I_L)
+    #print('I_L_au = ', I_L_au)
+    E0L           = np.sqrt(I_L_au)
+    ##print('E0L [au] = ', E0L)
+    A0L           = E0L / omega_au
+    #print('A0L [au] = ', A0L)
+    delta_t_au    = sciconv.second_to_atu(delta_t_s)        # t diff between the maxima of the two pulses
+
+    # parameters of the simulation
+    tmax_au       = sciconv.second_to_atu(tmax_s)
+    timestep_au   = sciconv.second_to_atu(timestep_s)
+    E_step_au = sciconv.ev_to_hartree(E_step_eV)
+
+    E_min_au = sciconv.ev_to_hartree(E_min_eV)
+    E_max_au = sciconv.ev_to_hartree(E_max_eV)
+
+    VEr_au        = np.sqrt(Gamma_au/ (2*np.pi))
+    #VEr_au_1      = VEr_au      # (same as for Er)
+
+    cdg_au_V = rdg_au / ( q * np.pi * VEr_au)
+
+    if Gamma_type == 'const':
         print('VEr_au = ', VEr_au)
         outfile.write('VEr_au = ' + str(VEr_au) + '\n')
-    VEr_au = 1          # all info about V carried in the 'Franck-Condon' integrals, so ignore VEr_au
+    elif Gamma_type == 'R6':
+        if partial_GamR:
+            VEr_au_woVR = VEr_au
+            print('VEr_au = ', VEr_au)
+            outfile.write('VEr_au = ' + str(VEr_au) + '\n')
+        VEr_au = VEr_au*res_Req**3                            # adjusts VEr_au by the R dependent factor
+        print('VEr_au_adjusted = ', VEr_au)
+        outfile.write('VEr_au_adjusted = ' + str(VEr_au) + '\n')
+    elif Gamma_type == 'external':
+        if partial_GamR:
+            VEr_au_woVR = VEr_au
+            print('VEr_au = ', VEr_au)
+            outfile.write('VEr_au = ' + str(VEr_au) + '\n')
+        VEr_au = 1          # all info about V carried in the 'Franck-Condon' integrals, so ignore VEr_au
 
 
-#-------------------------------------------------------------------------
-# Potential details
-# vibrational energies of Morse potentials
-print()
-print('-----------------------------------------------------------------')
-outfile.write('\n' + '-----------------------------------------------------------------' + '\n')
-red_mass = wf.red_mass_au(mass1,mass2)
-print("red_mass [au] = ", red_mass)
-
-#ground state
-print()
-print("Ground state")
-print('-----------------------------------------------------------------')
-print("Energies of vibrational states of the ground state")
-outfile.write('\n' + '-----------------------------------------------------------------' + '\n')
-outfile.write("Energies of vibrational states of the ground state" + '\n')
-lambda_param_gs = np.sqrt(2*red_mass*gs_de) / gs_a
-n_gs_max = int(lambda_param_gs - 0.5)   # ? ONLY ONE GS MAY BE POPULATED OR ELSE EQS ARE WRONG
-print("n_gs_max = ", n_gs_max)
-print('n_gs  ' + 'E [au]            ' + 'E [eV]')
-outfile.write('n_gs  ' + 'E [au]            ' + 'E [eV]' + '\n')
-E_kappas = []   # collects vibr energies of GS
-for n in range (0,n_gs_max+1):
-    ev = wf.eigenvalue(n,gs_de,gs_a,red_mass)   # ev stands for eigenvalue, not for electronvolt (it is, in fact, in au!)
-    E_kappas.append(ev)
-    outfile.write('{:4d}  {:14.10E}  {:14.10E}\n'.format(n,ev,sciconv.hartree_to_ev(ev)))
-    print('{:4d}  {:14.10E}  {:14.10E}'.format(n,ev,sciconv.hartree_to_ev(ev)))
-
-#resonance state
-print()
-print("Resonance state")
-print('-----------------------------------------------------------------')
-print("Energies of vibrational states of the resonance state")
-outfile.write('\n' + '-----------------------------------------------------------------' + '\n')
-outfile.write("Energies of vibrational states of the resonance state" + '\n')
-lambda_param_res = np.sqrt(2*red_mass*res_de) / res_a
-n_res_max = int(lambda_param_res - 0.5)
-print("n_res_max = ", n_res_max)
-E_lambdas = []
-outfile.write('n_res  ' + 'E [au]            ' + 'E [eV]' + '\n')
-print('n_res  ' + 'E [au]            ' + 'E [eV]')
-for n in range (0,n_res_max+1):
-    ev = wf.eigenvalue(n,res_de,res_a,red_mass)
-    E_lambdas.append(ev)
-    outfile.write('{:5d}  {:14.10E}  {:14.10E}\n'.format(n,ev,sciconv.hartree_to_ev(ev)))
-    print('{:5d}  {:14.10E}  {:14.10E}'.format(n,ev,sciconv.hartree_to_ev(ev)))
-
-#final state
-print()
-print("Final state")
-print('-----------------------------------------------------------------')
-outfile.write('\n' + '-----------------------------------------------------------------' + '\n')
-if (fin_pot_type == 'morse'):
-    print("Energies of vibrational states of the final state")
-    outfile.write("Energies of vibrational states of the final state" + '\n')
-    fin_de    = fin_a
-    fin_a     = fin_b
-    fin_Req   = fin_c
-    fin_const = fin_d
-    lambda_param_fin = np.sqrt(2*red_mass*fin_de) / fin_a
-    n_fin_max = int(lambda_param_fin - 0.5)     # Maximum quantum number = n_fin_max -> number of states = n_fin_max + 1
-    print("n_fin_max = ", n_fin_max)
-    E_mus = []
-    print('n_fin  ' + 'E [au]            ' + 'E [eV]')
-    outfile.write('n_fin  ' + 'E [au]            ' + 'E [eV]' + '\n')
-    for n in range (0,n_fin_max+1):
-        ev = wf.eigenvalue(n,fin_de,fin_a,red_mass)
-        E_mus.append(ev)
+    #-------------------------------------------------------------------------
+    # Potential details
+    # vibrational energies of Morse potentials
+    print()
+    print('-----------------------------------------------------------------')
+    outfile.write('\n' + '-----------------------------------------------------------------' + '\n')
+    red_mass = wf.red_mass_au(mass1,mass2)
+    print("red_mass [au] = ", red_mass)
+
+    #ground state
+    print()
+    print("Ground state")
+    print('-----------------------------------------------------------------')
+    print("Energies of vibrational states of the ground state")
+    outfile.write('\n' + '-----------------------------------------------------------------' + '\n')
+    outfile.write("Energies of vibrational states of the ground state" + '\n')
+    lambda_param_gs = np.sqrt(2*red_mass*gs_de) / gs_a
+    n_gs_max = int(lambda_param_gs - 0.5)   # ? ONLY ONE GS MAY BE POPULATED OR ELSE EQS ARE WRONG
+    print("n_gs_max = ", n_gs_max)
+    print('n_gs  ' + 'E [au]            ' + 'E [eV]')
+    outfile.write('n_gs  ' + 'E [au]            ' + 'E [eV]' + '\n')
+    E_kappas = []   # collects vibr energies of GS
+    for n in range (0,n_gs_max+1):
+        ev = wf.eigenvalue(n,gs_de,gs_a,red_mass)   # ev stands for eigenvalue, not for electronvolt (it is, in fact, in au!)
+        E_kappas.append(ev)
+        outfile.write('{:4d}  {:14.10E}  {:14.10E}\n'.format(n,ev,sciconv.hartree_to_ev(ev)))
+        print('{:4d}  {:14.10E}  {:14.10E}'.format(n,ev,sciconv.hartree_to_ev(ev)))
+
+    #resonance state
+    print()
+    print("Resonance state")
+    print('-----------------------------------------------------------------')
+    print("Energies of vibrational states of the resonance state")
+    outfile.write('\n' + '-----------------------------------------------------------------' + '\n')
+    outfile.write("Energies of vibrational states of the resonance state" + '\n')
+    lambda_param_res = np.sqrt(2*red_mass*res_de) / res_a
+    n_res_max = int(lambda_param_res - 0.5)
+    print("n_res_max = ", n_res_max)
+    E_lambdas = []
+    outfile.write('n_res  ' + 'E [au]            ' + 'E [eV]' + '\n')
+    print('n_res  ' + 'E [au]            ' + 'E [eV]')
+    for n in range (0,n_res_max+1):
+        ev = wf.eigenvalue(n,res_de,res_a,red_mass)
+        E_lambdas.append(ev)
         outfile.write('{:5d}  {:14.10E}  {:14.10E}\n'.format(n,ev,sciconv.hartree_to_ev(ev)))
         print('{:5d}  {:14.10E}  {:14.10E}'.format(n,ev,sciconv.hartree_to_ev(ev)))
-elif (fin_pot_type in ('hyperbel','hypfree')):
-    print('Final state is repulsive')
-    outfile.write('Final state is repulsive' + '\n')
-    fin_hyp_a = fin_a
-    fin_hyp_b = fin_b
-    E_fin_au = fin_hyp_b        # Since for an all-repulsive state there is no minimum (E_fin), E_fin is set to the final potential at infinite distance, i.e. fin_hyp_b
-    E_fin_au_1 = fin_hyp_b
-    R_hyp_step = fin_c
-    threshold = fin_d   # If, coming from high mu, for a certain mu all |<mu|kappa>| and |<mu|lambda>| are < threshold, don't calc FCF and integrals for all mu < that mu
-    E_mus = []
-    R_start_EX_max = fin_hyp_a / (EX_max_au - fin_hyp_b)        # R_start of hyperbola corresponding to EX_max_au, used as minimum starting point for discretizing final vibr states
-    outfile.write('Continuous vibrational states of the final state are discretized:\n')
-    outfile.write('Energy of highest possibly considered vibrational state\n of the final state is {0:.5f} eV\nStep widths down from there decrease as (eV) {1:.5f}, {2:.5f} ...\n'.format(
-        sciconv.hartree_to_ev(EX_max_au - fin_hyp_b),
-        sciconv.hartree_to_ev(fin_hyp_a / R_start_EX_max  -  fin_hyp_a / (R_start_EX_max + R_hyp_step)),
-        sciconv.hartree_to_ev(fin_hyp_a / (R_start_EX_max + R_hyp_step)  - fin_hyp_a / (R_start_EX_max + 2 * R_hyp_step)) ))
-    outfile.write('Each E_mu is calculated as {0} au / R_start,\n where R_start begins at {1:.5f} au = {2:.5f} A\n and increases in constant steps of width {3:.5f} au = {4:.5f} A\n'.format(
-        fin_hyp_a, R_start_EX_max, sciconv.bohr_to_angstrom(R_start_EX_max), R_hyp_step, sciconv.bohr_to_angstrom(R_hyp_step) ))
-    print('Continuous vibrational states of the final state are discretized:')
-    print('Energy of highest possibly considered vibrational state\n of the final state is {0:.5f} eV\nStep widths down from there decrease as (eV) {1:.5f}, {2:.5f} ...'.format(
-        sciconv.hartree_to_ev(EX_max_au - fin_hyp_b),
-        sciconv.hartree_to_ev(fin_hyp_a / R_start_EX_max  -  fin_hyp_a / (R_start_EX_max + R_hyp_step)),
-        sciconv.hartree_to_ev(fin_hyp_a / (R_start_EX_max + R_hyp_step)  - fin_hyp_a / (R_start_EX_max + 2 * R_hyp_step)) ))
-    print('Each E_mu is calculated as {0} au / R_start,\n where R_start begins at {1:.5f} au = {2:.5f} A\n and increases in constant steps of width {3:.5f} au = {4:.5f} A'.format(
-        fin_hyp_a, R_start_EX_max, sciconv.bohr_to_angstrom(R_start_EX_max), R_hyp_step, sciconv.bohr_to_angstrom(R_hyp_step) ))
 
-#-------------------------------------------------------------------------
-# Franck-Condon factors
-#-------------------------------------------------------------------------
-gs_res =  []    # collects sub-lists of FC overlaps: [<l0|k0>, <l1|k0>, ...], [<l0|k1, <l1|k1>, ...], ...
-gs_fin =  []
-res_fin = []
-R_min = sciconv.angstrom_to_bohr(1.5)+0.01
-R_max = sciconv.angstrom_to_bohr(30.0)
-
-for k in range(0,n_gs_max+1):   # prepare the above (empty) sub-lists
-    gs_fin.append(list())
-for l in range(0,n_res_max+1):
-    res_fin.append(list())
-
-if not fc_precalc and args.fc:
-    outfile.close
-    pure_out.close
-    movie_out.close
-    wp_res_out.close
-    sys.exit('!!! FC input file was provided without being requested. Programme terminated.')
-elif fc_precalc and not args.fc:
-    outfile.close
-    pure_out.close
-    movie_out.close
-    wp_res_out.close
-    sys.exit('!!! FC input file was requested but not provided. Programme terminated.')
-elif not (Gamma_type == 'external') and args.gamma:
-    outfile.close
-    pure_out.close
-    movie_out.close
-    wp_res_out.close
-    sys.exit('!!! Gamma-R-dependence file was provided although Gamma_type is not "external". Programme terminated.')
-elif (Gamma_type == 'external') and not args.fc and not args.gamma:
-    outfile.close
-    pure_out.close
-    movie_out.close
-    wp_res_out.close
-    sys.exit('!!! Gamma_type is "external" but no additional input file was provided. Programme terminated.')
-elif args.fc and args.gamma:
-    outfile.close
-    pure_out.close
-    movie_out.close
-    wp_res_out.close
-    sys.exit('!!! FC input file and Gamma-R-dependence file were provided at the same time. Programme terminated.')
-elif (fin_pot_type == 'morse') and (args.fc or args.FC):
-    outfile.close
-    pure_out.close
-    movie_out.close
-    wp_res_out.close
-    sys.exit('!!! FC input is not supported for Morse-potential final states. Programme terminated.')
-elif not part_fc_pre and args.FC:
-    outfile.close
-    pure_out.close
-    movie_out.close
-    wp_res_out.close
-    sys.exit('!!! FC input file for partial Gamma-R dependence was provided without being requested. Programme terminated.')
-elif part_fc_pre and not args.FC:
-    outfile.close
-    pure_out.close
-    movie_out.close
-    wp_res_out.close
-    sys.exit('!!! FC input file for partial Gamma-R dependence was requested but not provided. Programme terminated.')
-elif part_fc_pre and not partial_GamR:
-    outfile.close
-    pure_out.close
-    movie_out.close
-    wp_res_out.close
-    sys.exit('!!! FC input file for partial Gamma-R dependence was requested although no such treatment was requested. Programme terminated.')
-elif partial_GamR and ((args.fc and not args.FC) or (args.FC and not args.fc)):   # If partial_GamR but -f and -F not either both present or both absent, throw error (FC calc code would have to be changed)  
-    outfile.close
-    pure_out.close
-    movie_out.close
-    wp_res_out.close
-    sys.exit('!!! If partial_GamR is requested, then either both or none of the additional FC input files with (-f) and without (-F) Gamma-R dependence must be provided at the moment. Programme terminated.')
-
-
-if Gamma_type == 'const':
-    V_of_R = lambda R: 1
-    partial_GamR = None     # If Gamma(R)=const., then FC integrals with and without Gamma(R) are identical
-elif Gamma_type == 'R6':
-    V_of_R = lambda R: R**(-3)
-elif args.gamma:
-    with open(args.gamma, 'rb') as gammafile:
-        Gamma_of_R = dill.load(gammafile)
-    V_of_R = lambda R: np.sqrt(Gamma_of_R(R) / (2*np.pi))
-else:                           # For 'external' but from FC file
-    V_of_R = lambda R: 1
-
-if partial_GamR:
-    res_fin_woVR = []
+    #final state
+    print()
+    print("Final state")
+    print('-----------------------------------------------------------------')
+    outfile.write('\n' + '-----------------------------------------------------------------' + '\n')
+    if (fin_pot_type == 'morse'):
+        print("Energies of vibrational states of the final state")
+        outfile.write("Energies of vibrational states of the final state" + '\n')
+        fin_de    = fin_a
+        fin_a     = fin_b
+        fin_Req   = fin_c
+        fin_const = fin_d
+        lambda_param_fin = np.sqrt(2*red_mass*fin_de) / fin_a
+        n_fin_max = int(lambda_param_fin - 0.5)     # Maximum quantum number = n_fin_max -> number of states = n_fin_max + 1
+        print("n_fin_max = ", n_fin_max)
+        E_mus = []
+        print('n_fin  ' + 'E [au]            ' + 'E [eV]')
+        outfile.write('n_fin  ' + 'E [au]            ' + 'E [eV]' + '\n')
+        for n in range (0,n_fin_max+1):
+            ev = wf.eigenvalue(n,fin_de,fin_a,red_mass)
+            E_mus.append(ev)
+            outfile.write('{:5d}  {:14.10E}  {:14.10E}\n'.format(n,ev,sciconv.hartree_to_ev(ev)))
+            print('{:5d}  {:14.10E}  {:14.10E}'.format(n,ev,sciconv.hartree_to_ev(ev)))
+    elif (fin_pot_type in ('hyperbel','hypfree')):
+        print('Final state is repulsive')
+        outfile.write('Final state is repulsive' + '\n')
+        fin_hyp_a = fin_a
+        fin_hyp_b = fin_b
+        E_fin_au = fin_hyp_b        # Since for an all-repulsive state there is no minimum (E_fin), E_fin is set to the final potential at infinite distance, i.e. fin_hyp_b
+        E_fin_au_1 = fin_hyp_b
+        R_hyp_step = fin_c
+        threshold = fin_d   # If, coming from high mu, for a certain mu all |<mu|kappa>| and |<mu|lambda>| are < threshold, don't calc FCF and integrals for all mu < that mu
+        E_mus = []
+        R_start_EX_max = fin_hyp_a / (EX_max_au - fin_hyp_b)        # R_start of hyperbola corresponding to EX_max_au, used as minimum starting point for discretizing final vibr states
+        outfile.write('Continuous vibrational states of the final state are discretized:\n')
+        outfile.write('Energy of highest possibly considered vibrational state\n of the final state is {0:.5f} eV\nStep widths down from there decrease as (eV) {1:.5f}, {2:.5f} ...\n'.format(
+            sciconv.hartree_to_ev(EX_max_au - fin_hyp_b),
+            sciconv.hartree_to_ev(fin_hyp_a / R_start_EX_max  -  fin_hyp_a / (R_start_EX_max + R_hyp_step)),
+            sciconv.hartree_to_ev(fin_hyp_a / (R_start_EX_max + R_hyp_step)  - fin_hyp_a / (R_start_EX_max + 2 * R_hyp_step)) ))
+        outfile.write('Each E_mu is calculated as {0} au / R_start,\n where R_start begins at {1:.5f} au = {2:.5f} A\n and increases in constant steps of width {3:.5f} au = {4:.5f} A\n'.format(
+            fin_hyp_a, R_start_EX_max, sciconv.bohr_to_angstrom(R_start_EX_max), R_hyp_step, sciconv.bohr_to_angstrom(R_hyp_step) ))
+        print('Continuous vibrational states of the final state are discretized:')
+        print('Energy of highest possibly considered vibrational state\n of the final state is {0:.5f} eV\nStep widths down from there decrease as (eV) {1:.5f}, {2:.5f} ...'.format(
+            sciconv.hartree_to_ev(EX_max_au - fin_hyp_b),
+            sciconv.hartree_to_ev(fin_hyp_a / R_start_EX_max  -  fin_hyp_a / (R_start_EX_max + R_hyp_step)),
+            sciconv.hartree_to_ev(fin_hyp_a / (R_start_EX_max + R_hyp_step)  - fin_hyp_a / (R_start_EX_max + 2 * R_hyp_step)) ))
+        print('Each E_mu is calculated as {0} au / R_start,\n where R_start begins at {1:.5f} au = {2:.5f} A\n and increases in constant steps of width {3:.5f} au = {4:.5f} A'.format(
+            fin_hyp_a, R_start_EX_max, sciconv.bohr_to_angstrom(R_start_EX_max), R_hyp_step, sciconv.bohr_to_angstrom(R_hyp_step) ))
+
+    profile.lap('setup')
+
+    #-------------------------------------------------------------------------
+    # Franck-Condon factors
+    #-------------------------------------------------------------------------
+    gs_res =  []    # collects sub-lists of FC overlaps: [<l0|k0>, <l1|k0>, ...], [<l0|k1, <l1|k1>, ...], ...
+    gs_fin =  []
+    res_fin = []
+    R_min = sciconv.angstrom_to_bohr(1.5)+0.01
+    R_max = sciconv.angstrom_to_bohr(30.0)
+
+    for k in range(0,n_gs_max+1):   # prepare the above (empty) sub-lists
+        gs_fin.append(list())
     for l in range(0,n_res_max+1):
-        res_fin_woVR.append(list())
-
-
-# Numerical integration failsafe check: calculate test FC overlap integral
-print()
-print('-----------------------------------------------------------------')
-outfile.write('\n' + '-----------------------------------------------------------------' + '\n')
-#print('Numerical integration test')
-#
-#if fin_pot_type == 'morse':
-#    func = lambda R: (np.conj(wf.psi_n(R,0,res_a,res_Req,red_mass,res_de))
-#                      * wf.psi_n(R,0,fin_a,fin_Req,red_mass,fin_de)
-#                      * V_of_R(R))
-#elif fin_pot_type == 'hypfree':
-#    func = lambda R: (np.conj(wf.psi_n(R,0,res_a,res_Req,red_mass,res_de))
-#                      * wf.psi_freehyp(R,fin_hyp_a,fin_hyp_b,red_mass,R_start_EX_max)
-#                      * V_of_R(R))
-#elif fin_pot_type == 'hyperbel':
-#    func = lambda R: (np.conj(wf.psi_n(R,0,res_a,res_Req,red_mass,res_de))
-#                      * wf.psi_hyp(R,fin_hyp_a,fin_hyp_b,red_mass,R_start_EX_max)
-#                      * V_of_R(R))
-#tmp = np.zeros(2)
-#while abs(tmp[0]) <= (1000*tmp[1]):                 # checks if the test integral is at least three orders of magnitude larger than the estimated error
-#    R_min -= 0.01                                   # if so: lower the lower integration bound by 0.01 bohr
-#    tmp = integrate.quad(func, R_min, R_max,epsabs=1e-20,limit=500)
-#    #print(R_min, tmp)  #?
-R_min -= 0.01       # Counteract the +0.01 bohr when R_min was defined
-
-print('Lower bound of integration over R for the Franck-Condon factors')
-print('R_min = {:14.10E} au = {:5.5f} A'.format(R_min, sciconv.bohr_to_angstrom(R_min)))
-print('Hope that is in order.')
-outfile.write('Lower bound of integration over R for the Franck-Condon factors' + '\n')
-outfile.write('R_min = {:14.10E} au = {:5.5f} A\n'.format(R_min, sciconv.bohr_to_angstrom(R_min)))
-outfile.write('Hope that is in order.' + '\n')
-
-# ground state - resonance state <lambda|kappa>
-print()
-print('-----------------------------------------------------------------')
-print("Franck-Condon overlaps between ground and resonance state")
-print('n_gs  ' + 'n_res  ' + '<res|gs>')
-outfile.write('\n' + '-----------------------------------------------------------------' + '\n')
-outfile.write("Franck-Condon overlaps between ground and resonance state" + '\n')
-outfile.write('n_gs  ' + 'n_res  ' + '<res|gs>' + '\n')
-for i in range (0,n_gs_max+1):
-    tmp = []
-    for j in range (0,n_res_max+1):
-        FC = wf.mp_FCmor_mor(j,res_a,res_Req,res_de,red_mass,
-                             i,gs_a,gs_Req,gs_de,R_min,R_max)
-        tmp.append(FC)
-        outfile.write('{:4d}  {:5d}  {:14.10E}\n'.format(i,j,FC))
-        print(('{:4d}  {:5d}  {:14.10E}'.format(i,j,FC)))
-    gs_res.append(tmp)
-    
-# ground state - final state <mu|kappa>   and   resonance state - final state <mu|lambda>
-if (fin_pot_type == 'morse'):
-    for m in range(0,n_fin_max+1):
-        for k in range(0,n_gs_max+1):
-            FC = wf.mp_FCmor_mor(m,fin_a,fin_Req,fin_de,red_mass,
-                                 k,gs_a,gs_Req,gs_de,R_min,R_max)
-            gs_fin[k].append(FC)
+        res_fin.append(list())
+
+    if not fc_precalc and fc_infile:
+        raise ValueError('!!! FC input file was provided without being requested. Programme terminated.')
+    elif fc_precalc and not fc_infile:
+        raise ValueError('!!! FC input file was requested but not provided. Programme terminated.')
+    elif not (Gamma_type == 'external') and gamma_infile:
+        raise ValueError('!!! Gamma-R-dependence file was provided although Gamma_type is not "external". Programme terminated.')
+    elif (Gamma_type == 'external') and not fc_infile and not gamma_infile:
+        raise ValueError('!!! Gamma_type is "external" but no additional input file was provided. Programme terminated.')
+    elif fc_infile and gamma_infile:
+        raise ValueError('!!! FC input file and Gamma-R-dependence file were provided at the same time. Programme terminated.')
+    elif (fin_pot_type == 'morse') and (fc_infile or FC_infile):
+        raise ValueError('!!! FC input is not supported for Morse-potential final states. Programme terminated.')
+    elif not part_fc_pre and FC_infile:
+        raise ValueError('!!! FC input file for partial Gamma-R dependence was provided without being requested. Programme terminated.')
+    elif part_fc_pre and not FC_infile:
+        raise ValueError('!!! FC input file for partial Gamma-R dependence was requested but not provided. Programme terminated.')
+    elif part_fc_pre and not partial_GamR:
+        raise ValueError('!!! FC input file for partial Gamma-R dependence was requested although no such treatment was requested. Programme terminated.')
+    elif partial_GamR and ((fc_infile and not FC_infile) or (FC_infile and not fc_infile)):   # If partial_GamR but -f and -F not either both present or both absent, throw error (FC calc code would have to be changed)
+        raise ValueError('!!! If partial_GamR is requested, then either both or none of the additional FC input files with (-f) and without (-F) Gamma-R dependence must be provided at the moment. Programme terminated.')
+
+
+    if Gamma_type == 'const':
+        V_of_R = lambda R: 1
+        partial_GamR = None     # If Gamma(R)=const., then FC integrals with and without Gamma(R) are identical
+    elif Gamma_type == 'R6':
+        V_of_R = lambda R: R**(-3)
+    elif gamma_infile:
+        with open(gamma_infile, 'rb') as gammafile:
+            Gamma_of_R = dill.load(gammafile)
+        V_of_R = lambda R: np.sqrt(Gamma_of_R(R) / (2*np.pi))
+    else:                           # For 'external' but from FC file
+        V_of_R = lambda R: 1
+
+    if partial_GamR:
+        res_fin_woVR = []
         for l in range(0,n_res_max+1):
-            FC = wf.mp_FCmor_mor(m,fin_a,fin_Req,fin_de,red_mass,
-                                 l,res_a,res_Req,res_de,R_min,R_max,
-                                 V_of_R=V_of_R)      # Gamma(R) dependence only influences res-fin FC integrals (interaction mediated by V)
-            res_fin[l].append(FC)
-            if partial_GamR:
-                FC = wf.mp_FCmor_mor(m,fin_a,fin_Req,fin_de,red_mass,
-                                     l,res_a,res_Req,res_de,R_min,R_max,
-                                     V_of_R=lambda R: 1)
-                res_fin_woVR[l].append(FC)
-
-
-elif (fin_pot_type in ('hyperbel','hypfree')):
-    if args.fc:            # If an FC input file is provided, read in the gs-fin and res-fin FC integrals from it and skip their calculation
-        gs_fin, res_fin, n_fin_max_list, n_fin_max_X = in_out.read_fc_input(args.fc)
-        R_start = R_start_EX_max        # Initialize R_start at the lowest considered value (then increase R_start by a constant R_hyp_step)
-        for m in range(0,n_fin_max_X+1):
-            E_mu = fin_hyp_a / R_start
-            E_mus.insert(0,E_mu)        # Present loop starts at high energies, but these shall get high mu numbers = stand at the end of the lists -> fill lists from right to left
-            R_start = R_start + R_hyp_step
-        norm_factor = 1.
+            res_fin_woVR.append(list())
+
+
+    # Numerical integration failsafe check: calculate test FC overlap integral
+    print()
+    print('-----------------------------------------------------------------')
+    outfile.write('\n' + '-----------------------------------------------------------------' + '\n')
+    #print('Numerical integration test')
+    #
+    #if fin_pot_type == 'morse':
+    #    func = lambda R: (np.conj(wf.psi_n(R,0,res_a,res_Req,red_mass,res_de))
+    #                      * wf.psi_n(R,0,fin_a,fin_Req,red_mass,fin_de)
+    #                      * V_of_R(R))
+    #elif fin_pot_type == 'hypfree':
+    #    func = lambda R: (np.conj(wf.psi_n(R,0,res_a,res_Req,red_mass,res_de))
+    #                      * wf.psi_freehyp(R,fin_hyp_a,fin_hyp_b,red_mass,R_start_EX_max)
+    #                      * V_of_R(R))
+    #elif fin_pot_type == 'hyperbel':
+    #    func = lambda R: (np.conj(wf.psi_n(R,0,res_a,res_Req,red_mass,res_de))
+    #                      * wf.psi_hyp(R,fin_hyp_a,fin_hyp_b,red_mass,R_start_EX_max)
+    #                      * V_of_R(R))
+    #tmp = np.zeros(2)
+    #while abs(tmp[0]) <= (1000*tmp[1]):                 # checks if the test integral is at least three orders of magnitude larger than the estimated error
+    #    R_min -= 0.01                                   # if so: lower the lower integration bound by 0.01 bohr
+    #    tmp = integrate.quad(func, R_min, R_max,epsabs=1e-20,limit=500)
+    #    #print(R_min, tmp)  #?
+    R_min -= 0.01       # Counteract the +0.01 bohr when R_min was defined
+
+    print('Lower bound of integration over R for the Franck-Condon factors')
+    print('R_min = {:14.10E} au = {:5.5f} A'.format(R_min, sciconv.bohr_to_angstrom(R_min)))
+    print('Hope that is in order.')
+    outfile.write('Lower bound of integration over R for the Franck-Condon factors' + '\n')
+    outfile.write('R_min = {:14.10E} au = {:5.5f} A\n'.format(R_min, sciconv.bohr_to_angstrom(R_min)))
+    outfile.write('Hope that is in order.' + '\n')
+
+    # persistent FC cache (not used if the overlaps are read from -f/-F files)
+    use_fc_cache = (cache_dir is not None) and not fc_infile
+    fc_cached = None
+    if use_fc_cache:
+        fc_params = {'gs': [float(x) for x in (gs_de, gs_a, gs_Req)], 'n_gs_max': int(n_gs_max),
+                     'res': [float(x) for x in (res_de, res_a, res_Req)], 'n_res_max': int(n_res_max),
+                     'fin_pot_type': fin_pot_type, 'red_mass': float(red_mass),
+                     'R_min': float(R_min), 'R_max': float(R_max), 'fc_method': fc_method,
+                     'Gamma_type': Gamma_type, 'partial_GamR': str(partial_GamR)}
+        if (fin_pot_type == 'morse'):
+            fc_params['fin'] = [float(x) for x in (fin_de, fin_a, fin_Req)]
+            fc_params['n_fin_max'] = int(n_fin_max)
+        elif (fin_pot_type in ('hyperbel','hypfree')):
+            fc_params['fin'] = [float(x) for x in (fin_hyp_a, fin_hyp_b, R_hyp_step, threshold, R_start_EX_max)]
+            if (refine > 0):
+                fc_params['refine'] = [int(refine), float(refine_tol)]
+        fc_key = fc_cache.fc_key(fc_params, V_of_R, R_min, R_max)
+        fc_cached = fc_cache.load_fc(cache_dir, fc_key)
+        if fc_cached:
+            print('Franck-Condon overlap integrals are read from cache ' + fc_cache.fc_path(cache_dir, fc_key))
+            outfile.write('Franck-Condon overlap integrals are read from cache ' + fc_cache.fc_path(cache_dir, fc_key) + '\n')
+
+    if (fc_method == 'grid') and not fc_cached:
+        # tabulate all bound states once on a common R grid, restricted to where the gs and res states live
+        R_coarse = np.linspace(R_min, R_max, 20001)
+        R_lo, R_hi = wf.bound_support(R_coarse,
+                                      np.vstack((wf.psi_n_grid(R_coarse,n_gs_max,gs_a,gs_Req,red_mass,gs_de),
+                                                 wf.psi_n_grid(R_coarse,n_res_max,res_a,res_Req,red_mass,res_de))))
+        dR_grid = 0.05
+        if (fin_pot_type in ('hyperbel','hypfree')):     # resolve the shortest nuclear wavelength of the continuum states
+            dR_grid = min(dR_grid, 2 * np.pi / np.sqrt(2 * red_mass * (EX_max_au - fin_hyp_b)))
+        R_nodes, R_weights = wf.R_grid(R_lo, R_hi, dR=dR_grid)
+        psis_gs  = wf.psi_n_grid(R_nodes,n_gs_max,gs_a,gs_Req,red_mass,gs_de)
+        psis_res = wf.psi_n_grid(R_nodes,n_res_max,res_a,res_Req,red_mass,res_de)
+        V_nodes  = V_of_R(R_nodes)
+        FC_gs_res = wf.FC_grid(psis_gs, psis_res, R_weights)
+        print('FC integration grid: R = {:5.5f} ... {:5.5f} au, {:d} nodes'.format(R_lo, R_hi, len(R_nodes)))
+        outfile.write('FC integration grid: R = {:5.5f} ... {:5.5f} au, {:d} nodes\n'.format(R_lo, R_hi, len(R_nodes)))
+        if (fin_pot_type == 'hyperbel'):
+            psi_cont_grid = wf.psi_hyp_grid
+        elif (fin_pot_type == 'hypfree'):
+            psi_cont_grid = wf.psi_freehyp_grid
+
+    # ground state - resonance state <lambda|kappa>
+    print()
+    print('-----------------------------------------------------------------')
+    print("Franck-Condon overlaps between ground and resonance state")
+    print('n_gs  ' + 'n_res  ' + '<res|gs>')
+    outfile.write('\n' + '-----------------------------------------------------------------' + '\n')
+    outfile.write("Franck-Condon overlaps between ground and resonance state" + '\n')
+    outfile.write('n_gs  ' + 'n_res  ' + '<res|gs>' + '\n')
+    for i in range (0,n_gs_max+1):
+        tmp = []
+        for j in range (0,n_res_max+1):
+            if fc_cached:
+                FC = fc_cached['gs_res'][i][j]
+            elif (fc_method == 'grid'):
+                FC = FC_gs_res[i][j]
+            else:
+                FC = wf.mp_FCmor_mor(j,res_a,res_Req,res_de,red_mass,
+                                     i,gs_a,gs_Req,gs_de,R_min,R_max)
+            tmp.append(FC)
+            outfile.write('{:4d}  {:5d}  {:14.10E}\n'.format(i,j,FC))
+            print(('{:4d}  {:5d}  {:14.10E}'.format(i,j,FC)))
+        gs_res.append(tmp)
+
+    # ground state - final state <mu|kappa>   and   resonance state - final state <mu|lambda>
+    if (fin_pot_type in ('morse','hyperbel','hypfree')) and fc_cached:
+        gs_fin  = fc_cached['gs_fin']
+        res_fin = fc_cached['res_fin']
         if partial_GamR:
-            gs_fin_woVR, res_fin_woVR, n_fin_max_list_woVR, n_fin_max_X_woVR = in_out.read_fc_input(args.FC)
-            if not (gs_fin_woVR == gs_fin and n_fin_max_list_woVR == n_fin_max_list
-                    and n_fin_max_X_woVR == n_fin_max_X and len(res_fin) == len(res_fin_woVR)):
-                outfile.write("gs_fin: " + str(gs_fin_woVR == gs_fin) + ", max_list: " + str(n_fin_max_list_woVR == n_fin_max_list) + ", max_X: " + str(n_fin_max_X_woVR == n_fin_max_X) + ", len(res_fin): " + str(len(res_fin) == len(res_fin_woVR)) + "\n")
-                outfile.close
-                pure_out.close
-                movie_out.close
-                wp_res_out.close
-                sys.exit('!!! Files of FC integrals with and without Gamma(R) dependence are incompatible. Programme terminated.')
+            res_fin_woVR = fc_cached['res_fin_woVR']
+        if (fin_pot_type in ('hyperbel','hypfree')):
+            E_mus = fc_cached['E_mus']
+            R_hyp_steps = np.array(fc_cached['R_hyp_steps']) if ('R_hyp_steps' in fc_cached) else np.full(len(E_mus), R_hyp_step)
 
-    else:
-        FCfunc = wf.mp_FCmor_hyp if (fin_pot_type == 'hyperbel') else wf.mp_FCmor_freehyp
-        Req_max = max(gs_Req, res_Req)
-        R_start = R_start_EX_max        # Initialize R_start at the lowest considered value (then increase R_start by a constant R_hyp_step)
-        thresh_flag = -1                # Initialize flag for FC-calc stop. Counts how often in a (mu) row all FC fall below threshold
-        while (thresh_flag < 3):        # Stop FC calc if all |FC| < threshold for 3 consecutive mu
-            E_mu = fin_hyp_a / R_start
-            E_mus.insert(0,E_mu)        # Present loop starts at high energies, but these shall get high mu numbers = stand at the end of the lists -> fill lists from right to left
-            print(f'--- R_start = {R_start:7.4f} au = {sciconv.bohr_to_angstrom(R_start):7.4f} A   ###   E_mu = {E_mu:7.5f} au = {sciconv.hartree_to_ev(E_mu):7.4f} eV   ###   steps: {int((R_start - R_start_EX_max) / R_hyp_step  + 0.1)}')    #?
-    #        outfile.write(f'R_start = {R_start:5.5f} au = {sciconv.bohr_to_angstrom(R_start):5.5f} A, E_mu = {E_mu:5.5f} au = {sciconv.hartree_to_ev(E_mu):5.5f} eV, steps: {int((R_start - R_start_EX_max) / R_hyp_step  + 0.1)}\n')  #?
+    elif (fin_pot_type == 'morse') and (fc_method == 'grid'):
+        psis_fin = wf.psi_n_grid(R_nodes,n_fin_max,fin_a,fin_Req,red_mass,fin_de)
+        gs_fin  = wf.FC_grid(psis_gs, psis_fin, R_weights).tolist()
+        res_fin = wf.FC_grid(psis_res, psis_fin, R_weights, V_nodes).tolist()  # Gamma(R) dependence only influences res-fin FC integrals (interaction mediated by V)
+        if partial_GamR:
+            res_fin_woVR = wf.FC_grid(psis_res, psis_fin, R_weights).tolist()
+
+    elif (fin_pot_type == 'morse'):
+        for m in range(0,n_fin_max+1):
             for k in range(0,n_gs_max+1):
-                FC = FCfunc(k,gs_a,gs_Req,gs_de,red_mass,
-                            fin_hyp_a,fin_hyp_b,R_start,R_min,R_max)
-                gs_fin[k].insert(0,FC)
-                print(f'k = {k}, gs_fin  = {FC: 10.10E}, |gs_fin|  = {np.abs(FC):10.10E}')   #?
-    #            outfile.write(f'k = {k}, gs_fin  = {FC: 10.10E}, |gs_fin|  = {np.abs(FC):10.10E}\n')   #?
+                FC = wf.mp_FCmor_mor(m,fin_a,fin_Req,fin_de,red_mass,
+                                     k,gs_a,gs_Req,gs_de,R_min,R_max)
+                gs_fin[k].append(FC)
             for l in range(0,n_res_max+1):
-                FC = FCfunc(l,res_a,res_Req,res_de,red_mass,
-                            fin_hyp_a,fin_hyp_b,R_start,R_min,R_max,
-                            V_of_R=V_of_R)
-                res_fin[l].insert(0,FC)
-                print(f'l = {l}, res_fin = {FC: 10.10E}, |res_fin| = {np.abs(FC):10.10E}')   #?
-    #            outfile.write(f'l = {l}, res_fin = {FC: 10.10E}, |res_fin| = {np.abs(FC):10.10E}\n')   #?
+                FC = wf.mp_FCmor_mor(m,fin_a,fin_Req,fin_de,red_mass,
+                                     l,res_a,res_Req,res_de,R_min,R_max,
+                                     V_of_R=V_of_R)      # Gamma(R) dependence only influences res-fin FC integrals (interaction mediated by V)
+                res_fin[l].append(FC)
                 if partial_GamR:
-                    FC = FCfunc(l,res_a,res_Req,res_de,red_mass,
-                                fin_hyp_a,fin_hyp_b,R_start,R_min,R_max,
-                                V_of_R=lambda R: 1)
-                    res_fin_woVR[l].insert(0,FC)
-                    print(f'l = {l}, res_fin_woVR = {FC: 10.10E}, |res_fin_woVR| = {np.abs(FC):10.10E}')   #?
-    #               outfile.write(f'l = {l}, res_fin_woVR = {FC: 10.10E}, |res_fin_woVR| = {np.abs(FC):10.10E}\n')   #?
-            if (R_start > Req_max):         # Do not stop FC calc as long as R_start has not surpassed all Req
-                if (all(np.abs( gs_fin[k][0]) < threshold for k in range(0, n_gs_max+1)) and
-                    all(np.abs(res_fin[l][0]) < threshold for l in range(0,n_res_max+1)) ): # To keep consistency, the res_fin_woVR are not included in this check
-                    if (thresh_flag != -1):     # -1 can only occur at lowest R_start values (once any FC > threshold: flag is set to 0, then stays >= 0) -> dont stop calc right at start just bc FC are small there
-                        thresh_flag = thresh_flag + 1
-                else:
-                    thresh_flag = 0         # If any FC overlap > threshold, reset flag -> only (mu-)consecutive threshold check passes shall stop calc
-            print(f'thresh_flag = {thresh_flag}')                                                                               #?
-    #        outfile.write(f'thresh_flag = {thresh_flag}\n')                                                                               #?
-            R_start = R_start + R_hyp_step
-
-        # Enforce FC sum rule: for a bound vibr state |b> (b=kappa,lambda), int_0^inf dEmu <b|mu><mu|b> = 1, or discretized, sum_Emu DeltaE <b|mu><mu|b> = 1, i. e. sum_Rmu = DeltaR Va/Rmu^2 <b|mu><mu|b> = 1
-    #    norm_fin_gs = []        # Current values of the sum_Rmu with |b> = |kappa>
-    #    norm_fin_res = []       # Current values of the sum_Rmu with |b> = |lambda>
-    #    for k in range(0,n_gs_max+1):
-    #        norm_fin_gs.append(R_hyp_step / fin_hyp_a * np.sum(np.abs(gs_fin[k])**2 * np.array(E_mus)**2))
-    #        gs_fin[k] = gs_fin[k] / np.sqrt(norm_fin_gs[k])     # Rescale FC overlaps <k|m> so that sum_Rmu = 1
-    #    for l in range(0,n_res_max+1):
-    #        norm_fin_res.append(R_hyp_step / fin_hyp_a * np.sum(np.abs(res_fin[l])**2 * np.array(E_mus)**2))
-    #        res_fin[l] = res_fin[l] / np.sqrt(norm_fin_res[l])  # Rescale FC overlaps <l|m> so that sum_Rmu = 1
-    #    print('norm_fin_gs =', norm_fin_gs)
-    #    print('norm_fin_res =', norm_fin_res)
-    #    outfile.write('norm_fin_gs = ' + str(norm_fin_gs) + '\n')       #?
-    #    outfile.write('norm_fin_res = ' + str(norm_fin_res) + '\n')     #?
-#        norm_factor = 1.
-#       norm_factor = R_hyp_step / fin_hyp_a * np.sum(np.abs(gs_fin[0])**2 * np.array(E_mus)**2)   # All FC overlaps will be rescaled using the sum_Rmu with |b> = |k=0>
-#        for k in range(0,n_gs_max+1):
-#            gs_fin[k] = gs_fin[k] / np.sqrt(norm_factor)        # Rescale FC overlaps <k|m>
-#        for l in range(0,n_res_max+1):
-#            res_fin[l] = res_fin[l] / np.sqrt(norm_factor)      # Rescale FC overlaps <l|m>
+                    FC = wf.mp_FCmor_mor(m,fin_a,fin_Req,fin_de,red_mass,
+                                         l,res_a,res_Req,res_de,R_min,R_max,
+                                         V_of_R=lambda R: 1)
+                    res_fin_woVR[l].append(FC)
+
+
+    elif (fin_pot_type in ('hyperbel','hypfree')):
+        if fc_infile:            # If an FC input file is provided, read in the gs-fin and res-fin FC integrals from it and skip their calculation
+            gs_fin, res_fin, n_fin_max_list, n_fin_max_X = in_out.read_fc_input(fc_infile)
+            # R_start from R_start_EX_max upward in constant steps R_hyp_step; high energies (small R_start) get high mu numbers
+            E_mus = [fin_hyp_a / (R_start_EX_max + m * R_hyp_step) for m in range(n_fin_max_X, -1, -1)]
+            R_hyp_steps = np.full(n_fin_max_X+1, R_hyp_step)
+            norm_factor = 1.
+            if partial_GamR:
+                gs_fin_woVR, res_fin_woVR, n_fin_max_list_woVR, n_fin_max_X_woVR = in_out.read_fc_input(FC_infile)
+                if not (gs_fin_woVR == gs_fin and n_fin_max_list_woVR == n_fin_max_list
+                        and n_fin_max_X_woVR == n_fin_max_X and len(res_fin) == len(res_fin_woVR)):
+                    outfile.write("gs_fin: " + str(gs_fin_woVR == gs_fin) + ", max_list: " + str(n_fin_max_list_woVR == n_fin_max_list) + ", max_X: " + str(n_fin_max_X_woVR == n_fin_max_X) + ", len(res_fin): " + str(len(res_fin) == len(res_fin_woVR)) + "\n")
+                    raise ValueError('!!! Files of FC integrals with and without Gamma(R) dependence are incompatible. Programme terminated.')
 
+        else:
+            FCfunc = wf.mp_FCmor_hyp if (fin_pot_type == 'hyperbel') else wf.mp_FCmor_freehyp
+            if (fc_method != 'grid') and (fin_pot_type == 'hyperbel'):
+                # only the grid method uses the fast wf.coulomb_f0, mp_FCmor_hyp calls mpmath.coulombf per node
+                print('Hyperbolic continuum states by mpmath.coulombf at every quadrature node (fc_method = grid is much faster)')
+                outfile.write('Hyperbolic continuum states by mpmath.coulombf at every quadrature node (fc_method = grid is much faster)\n')
+            Req_max = max(gs_Req, res_Req)
+
+            def fc_cont_batch(R_starts):    # [<mu|kappa>, <mu|lambda>, <mu|lambda> without Gamma(R) or None] for a batch of R_start, each of shape (n_states, len(R_starts))
+                if (fc_method == 'grid'):       # continuum states of the whole batch tabulated at once for all gs and res states
+                    psis_fin = np.atleast_2d(psi_cont_grid(R_nodes,fin_hyp_a,fin_hyp_b,red_mass,R_starts))
+                    return [wf.FC_grid(psis_gs, psis_fin, R_weights).astype(complex),
+                            wf.FC_grid(psis_res, psis_fin, R_weights, V_nodes).astype(complex),
+                            wf.FC_grid(psis_res, psis_fin, R_weights).astype(complex) if partial_GamR else None]
+                FCs = [np.empty((n_gs_max+1, len(R_starts)), dtype=complex),
+                       np.empty((n_res_max+1, len(R_starts)), dtype=complex),
+                       np.empty((n_res_max+1, len(R_starts)), dtype=complex) if partial_GamR else None]
+                for i, R_start in enumerate(R_starts):
+                    for k in range(0,n_gs_max+1):
+                        FCs[0][k,i] = FCfunc(k,gs_a,gs_Req,gs_de,red_mass,
+                                             fin_hyp_a,fin_hyp_b,R_start,R_min,R_max)
+                    for l in range(0,n_res_max+1):
+                        FCs[1][l,i] = FCfunc(l,res_a,res_Req,res_de,red_mass,
+                                             fin_hyp_a,fin_hyp_b,R_start,R_min,R_max,
+                                             V_of_R=V_of_R)
+                        if partial_GamR:
+                            FCs[2][l,i] = FCfunc(l,res_a,res_Req,res_de,red_mass,
+                                                 fin_hyp_a,fin_hyp_b,R_start,R_min,R_max,
+                                                 V_of_R=lambda R: 1)
+                return FCs
+
+            # R_start runs upward from R_start_EX_max in constant steps R_hyp_step, fc_batch values at a time.
+            # Between neighbouring R_start whose overlaps differ by more than refine_tol times the largest overlap,
+            # the step is bisected (at most refine times); the stop criterion only looks at the constant steps.
+            fc_batch = 16 if (fc_method == 'grid') else 1
+            R_parts  = []                   # all R_start and their overlaps, one entry per batch or bisection level
+            FC_parts = []
+            FC_scale = 0
+            R_prev  = np.zeros(0)           # last R_start of the previous batch and its overlaps
+            FC_prev = [np.zeros((n_gs_max+1, 0)), np.zeros((n_res_max+1, 0))]
+            n_steps = 0
+            thresh_flag = -1                # Initialize flag for FC-calc stop. Counts how often in a (mu) row all FC fall below threshold
+            while (thresh_flag < 3):        # Stop FC calc if all |FC| < threshold for 3 consecutive mu
+                R_batch = R_start_EX_max + R_hyp_step * np.arange(n_steps, n_steps + fc_batch)
+                FCs = fc_cont_batch(R_batch)
+                below = (np.all(np.abs(FCs[0]) < threshold, axis=0)        # To keep consistency, the res_fin_woVR are not included in this check
+                         & np.all(np.abs(FCs[1]) < threshold, axis=0))
+                n_keep = fc_batch
+                for i in range(0,fc_batch):
+                    if (R_batch[i] > Req_max):          # Do not stop FC calc as long as R_start has not surpassed all Req
+                        if below[i]:
+                            if (thresh_flag != -1):     # -1 can only occur at lowest R_start values (once any FC > threshold: flag is set to 0, then stays >= 0) -> dont stop calc right at start just bc FC are small there
+                                thresh_flag = thresh_flag + 1
+                        else:
+                            thresh_flag = 0             # If any FC overlap > threshold, reset flag -> only (mu-)consecutive threshold check passes shall stop calc
+                    if (thresh_flag >= 3):
+                        n_keep = i + 1
+                        break
+                R_batch = R_batch[:n_keep]
+                FCs = [(FC[:,:n_keep] if FC is not None else None) for FC in FCs]
+                n_steps = n_steps + n_keep
+                R_parts.append(R_batch)
+                FC_parts.append(FCs)
+                FC_scale = max(FC_scale, np.max(np.abs(FCs[0])), np.max(np.abs(FCs[1])))
+                # intervals (R_a, R_b) between neighbouring R_start, bisected level by level
+                R_all  = np.concatenate((R_prev, R_batch))
+                FC_all = [np.hstack((FC_prev[i], FCs[i])) for i in (0,1)]
+                R_prev, FC_prev = R_all[-1:], [FC[:,-1:] for FC in FC_all]
+                R_a, R_b = R_all[:-1], R_all[1:]
+                FC_a, FC_b = [FC[:,:-1] for FC in FC_all], [FC[:,1:] for FC in FC_all]
+                for level in range(0,refine):
+                    diff = np.maximum(np.max(np.abs(FC_b[0] - FC_a[0]), axis=0),
+                                      np.max(np.abs(FC_b[1] - FC_a[1]), axis=0))
+                    split = diff > refine_tol * FC_scale
+                    if not np.any(split):
+                        break
+                    R_mid = (R_a[split] + R_b[split]) / 2
+                    FCs_mid = fc_cont_batch(R_mid)
+                    R_parts.append(R_mid)
+                    FC_parts.append(FCs_mid)
+                    R_a, R_b = np.concatenate((R_a[split], R_mid)), np.concatenate((R_mid, R_b[split]))
+                    FC_a, FC_b = ([np.hstack((FC_a[i][:,split], FCs_mid[i])) for i in (0,1)],
+                                  [np.hstack((FCs_mid[i], FC_b[i][:,split])) for i in (0,1)])
+                print(f'--- R_start = {R_batch[-1]:7.4f} au = {sciconv.bohr_to_angstrom(R_batch[-1]):7.4f} A   ###   E_mu = {fin_hyp_a / R_batch[-1]:7.5f} au = {sciconv.hartree_to_ev(fin_hyp_a / R_batch[-1]):7.4f} eV   ###   steps: {n_steps}   ###   R_start values: {sum(len(R) for R in R_parts)}   ###   thresh_flag = {thresh_flag}')    #?
+
+            # Present loop starts at high energies, but these shall get high mu numbers = stand at the end of the lists
+            R_starts = np.concatenate(R_parts)
+            order = np.argsort(R_starts)[::-1]
+            R_starts = R_starts[order]
+            E_mus   = (fin_hyp_a / R_starts).tolist()
+            gs_fin  = np.hstack([FCs[0] for FCs in FC_parts])[:,order].tolist()
+            res_fin = np.hstack([FCs[1] for FCs in FC_parts])[:,order].tolist()
+            if partial_GamR:
+                res_fin_woVR = np.hstack([FCs[2] for FCs in FC_parts])[:,order].tolist()
+            # widths of the R_start cells around every R_start (= R_hyp_step where the step was not bisected)
+            R_edges = np.concatenate(([1.5 * R_starts[0] - 0.5 * R_starts[1]],
+                                      (R_starts[1:] + R_starts[:-1]) / 2,
+                                      [1.5 * R_starts[-1] - 0.5 * R_starts[-2]]))
+            R_hyp_steps = -np.diff(R_edges)
+            print(f'{len(R_starts)} R_start values, {len(R_starts) - n_steps} of them from bisected steps')
+            outfile.write(f'{len(R_starts)} R_start values, {len(R_starts) - n_steps} of them from bisected steps\n')
+
+            # Enforce FC sum rule: for a bound vibr state |b> (b=kappa,lambda), int_0^inf dEmu <b|mu><mu|b> = 1, or discretized, sum_Emu DeltaE <b|mu><mu|b> = 1, i. e. sum_Rmu = DeltaR Va/Rmu^2 <b|mu><mu|b> = 1
+        #    norm_fin_gs = []        # Current values of the sum_Rmu with |b> = |kappa>
+        #    norm_fin_res = []       # Current values of the sum_Rmu with |b> = |lambda>
+        #    for k in range(0,n_gs_max+1):
+        #        norm_fin_gs.append(R_hyp_step / fin_hyp_a * np.sum(np.abs(gs_fin[k])**2 * np.array(E_mus)**2))
+        #        gs_fin[k] = gs_fin[k] / np.sqrt(norm_fin_gs[k])     # Rescale FC overlaps <k|m> so that sum_Rmu = 1
+        #    for l in range(0,n_res_max+1):
+        #        norm_fin_res.append(R_hyp_step / fin_hyp_a * np.sum(np.abs(res_fin[l])**2 * np.array(E_mus)**2))
+        #        res_fin[l] = res_fin[l] / np.sqrt(norm_fin_res[l])  # Rescale FC overlaps <l|m> so that sum_Rmu = 1
+        #    print('norm_fin_gs =', norm_fin_gs)
+        #    print('norm_fin_res =', norm_fin_res)
+        #    outfile.write('norm_fin_gs = ' + str(norm_fin_gs) + '\n')       #?
+        #    outfile.write('norm_fin_res = ' + str(norm_fin_res) + '\n')     #?
+    #        norm_factor = 1.
+    #       norm_factor = R_hyp_step / fin_hyp_a * np.sum(np.abs(gs_fin[0])**2 * np.array(E_mus)**2)   # All FC overlaps will be rescaled using the sum_Rmu with |b> = |k=0>
+    #        for k in range(0,n_gs_max+1):
+    #            gs_fin[k] = gs_fin[k] / np.sqrt(norm_factor)        # Rescale FC overlaps <k|m>
+    #        for l in range(0,n_res_max+1):
+    #            res_fin[l] = res_fin[l] / np.sqrt(norm_factor)      # Rescale FC overlaps <l|m>
+
+    if (fin_pot_type in ('hyperbel','hypfree')) and not fc_infile:
         n_fin_max_list = []             # Max quantum number considered in non-direct ionization for each lambda (all vibr fin states above the resp res state are discarded)
         for E_l in E_lambdas:
             for n_fin in range(len(E_mus)-1, -1, -1):           # Loop over E_mus from back to start
@@ -612,74 +664,54 @@ elif (fin_pot_type in ('hyperbel','hypfree')):
                     break
         n_fin_max_X = len(E_mus) - 1                            # Will be used in hyperbel/hypfree case as the very highest nmu
 
+    if use_fc_cache and not fc_cached:
+        fc_file = fc_cache.save_fc(cache_dir, fc_key, fc_params, gs_res=gs_res, gs_fin=gs_fin, res_fin=res_fin,
+                                   res_fin_woVR=(res_fin_woVR if partial_GamR else None),
+                                   E_mus=(E_mus if (fin_pot_type in ('hyperbel','hypfree')) else None),
+                                   R_hyp_steps=(R_hyp_steps if (fin_pot_type in ('hyperbel','hypfree')) else None))
+        print('Franck-Condon overlap integrals are stored in cache ' + fc_file)
+        outfile.write('Franck-Condon overlap integrals are stored in cache ' + fc_file + '\n')
 
-print()
-print('-----------------------------------------------------------------')
-print("Franck-Condon overlaps between ground and final state")
-outfile.write('\n' + '-----------------------------------------------------------------' + '\n')
-outfile.write("Franck-Condon overlaps between ground and final state" + '\n')
-#if (fin_pot_type in ('hyperbel','hypfree')):
-#    print('norm_factor =', norm_factor)
-#    outfile.write('norm_factor = ' + str(norm_factor) + '\n')
-
-print('n_gs  ' +'n_fin  ' + '<fin|gs>')
-outfile.write('n_gs  ' +'n_fin  ' + '<fin|gs>' + '\n')
-
-if (fin_pot_type in ('hyperbel','hypfree')):
-    n_fin_max = n_fin_max_X
-for k in range(0,n_gs_max+1):
-    for m in range(0,n_fin_max+1):
-        FC = gs_fin[k][m]
-        outfile.write('{:4d}  {:5d}  {: 14.10E}\n'.format(k,m,FC))
-        if (fin_pot_type == 'morse'):
-            print(('{:4d}  {:5d}  {: 14.10E}'.format(k,m,FC)))
-        elif (fin_pot_type in ('hyperbel','hypfree')):
-            if (m == 0 or m == n_fin_max-1 or m == n_fin_max):      # Don't print all the FC, just the first two and last two (per GS vibr state)
-                print(('{:4d}  {:5d}  {: 14.10E}'.format(k,m,FC)))
-            elif (m == 1):
-                print(('{:4d}  {:5d}  {: 14.10E}'.format(k,m,FC)))
-                print('  ...')
+    print()
+    print('-----------------------------------------------------------------')
+    print("Franck-Condon overlaps between ground and final state")
+    outfile.write('\n' + '-----------------------------------------------------------------' + '\n')
+    outfile.write("Franck-Condon overlaps between ground and final state" + '\n')
+    #if (fin_pot_type in ('hyperbel','hypfree')):
+    #    print('norm_factor =', norm_factor)
+    #    outfile.write('norm_factor = ' + str(norm_factor) + '\n')
 
-print()
-print('-----------------------------------------------------------------')
-print("Franck-Condon overlaps between final and resonance state")
-outfile.write('\n' + '-----------------------------------------------------------------' + '\n')
-outfile.write("Franck-Condon overlaps between final and resonance state" + '\n')
-print('n_res  ' +'n_fin  ' + '<fin|res>')
-outfile.write('n_res  ' +'n_fin  ' + '<fin|res>' + '\n')
+    print('n_gs  ' +'n_fin  ' + '<fin|gs>')
+    outfile.write('n_gs  ' +'n_fin  ' + '<fin|gs>' + '\n')
 
-for l in range(0,n_res_max+1):
     if (fin_pot_type in ('hyperbel','hypfree')):
-        n_fin_max = n_fin_max_list[l]
-    for m in range(0,n_fin_max+1):
-        FC = res_fin[l][m]
-        outfile.write('{:5d}  {:5d}  {: 14.10E}\n'.format(l,m,FC))
-        if (fin_pot_type == 'morse'):
-            print(('{:5d}  {:5d}  {: 14.10E}'.format(l,m,FC)))
-        elif (fin_pot_type in ('hyperbel','hypfree')):
-            if (m == 0 or m == n_fin_max-1 or m == n_fin_max):
-                print(('{:5d}  {:5d}  {: 14.10E}'.format(l,m,FC)))
-            elif (m == 1):
-                print(('{:5d}  {:5d}  {: 14.10E}'.format(l,m,FC)))
-                print('   ...')
-if (fin_pot_type in ('hyperbel','hypfree')):
-    print("All overlaps between ground or resonance state and final state\n outside the indicated quantum numbers are considered zero")
-    outfile.write("All overlaps between ground or resonance state and final state\n outside the indicated quantum numbers are considered zero\n")
+        n_fin_max = n_fin_max_X
+    for k in range(0,n_gs_max+1):
+        for m in range(0,n_fin_max+1):
+            FC = gs_fin[k][m]
+            outfile.write('{:4d}  {:5d}  {: 14.10E}\n'.format(k,m,FC))
+            if (fin_pot_type == 'morse'):
+                print(('{:4d}  {:5d}  {: 14.10E}'.format(k,m,FC)))
+            elif (fin_pot_type in ('hyperbel','hypfree')):
+                if (m == 0 or m == n_fin_max-1 or m == n_fin_max):      # Don't print all the FC, just the first two and last two (per GS vibr state)
+                    print(('{:4d}  {:5d}  {: 14.10E}'.format(k,m,FC)))
+                elif (m == 1):
+                    print(('{:4d}  {:5d}  {: 14.10E}'.format(k,m,FC)))
+                    print('  ...')
 
-if partial_GamR:
     print()
     print('-----------------------------------------------------------------')
-    print("Franck-Condon overlaps between final & resonance state - no V(R)")
+    print("Franck-Condon overlaps between final and resonance state")
     outfile.write('\n' + '-----------------------------------------------------------------' + '\n')
-    outfile.write("Franck-Condon overlaps between final & resonance state - no V(R)" + '\n')
+    outfile.write("Franck-Condon overlaps between final and resonance state" + '\n')
     print('n_res  ' +'n_fin  ' + '<fin|res>')
     outfile.write('n_res  ' +'n_fin  ' + '<fin|res>' + '\n')
-    
+
     for l in range(0,n_res_max+1):
         if (fin_pot_type in ('hyperbel','hypfree')):
             n_fin_max = n_fin_max_list[l]
         for m in range(0,n_fin_max+1):
-            FC = res_fin_woVR[l][m]
+            FC = res_fin[l][m]
             outfile.write('{:5d}  {:5d}  {: 14.10E}\n'.format(l,m,FC))
             if (fin_pot_type == 'morse'):
                 print(('{:5d}  {:5d}  {: 14.10E}'.format(l,m,FC)))
@@ -689,482 +721,901 @@ if partial_GamR:
                 elif (m == 1):
                     print(('{:5d}  {:5d}  {: 14.10E}'.format(l,m,FC)))
                     print('   ...')
-    print('These additional overlaps without the V(R) dependence are used\n only in',
-            'the prefactors to the time integrals' if (partial_GamR == 'pre') else 'the calculation of the W_lambda values')
-    outfile.write('These additional overlaps without the V(R) dependence are used\n only in '
-            + ('the prefactors to the time integrals' if (partial_GamR == 'pre') else 'the calculation of the W_lambda values')
-            + '\n')
-
-# sum over mup of product <lambda|mup><mup|kappa>       where mup means mu prime
-indir_FCsums = []
-for l in range (0,n_res_max+1):
-    indir_FCsum = 0
-    factor = 1
     if (fin_pot_type in ('hyperbel','hypfree')):
-        n_fin_max = n_fin_max_list[l]
-    for m in range (0, n_fin_max + 1):
-        if (fin_pot_type in ('hyperbel','hypfree')):            # R-DOS for 'integration' over R_mu instead of [E_]mu
-            factor = R_hyp_step * E_mus[m]**2 / fin_hyp_a
-        if not partial_GamR == 'exp':
-            tmp = np.conj(res_fin[l][m]) * gs_fin[0][m] * factor    # <mu|lambda>* <mu|kappa=0> = <lambda|mu><mu|kappa=0> = <l|m><m|k=0>
-        else:   # If Gamma(R) only in exponent (i.e. Wl), then indir_FCsums is woVR since it is part of prefactor
-            tmp = np.conj(res_fin_woVR[l][m]) * gs_fin[0][m] * factor
-        indir_FCsum = indir_FCsum + tmp                         # sum_m <l|m><m|k=0>
-    indir_FCsums.append(indir_FCsum)                            # [sum_m <l=0|m><m|k=0>, sum_m <l=1|m><m|k=0>, ...]
-print()
-print('-----------------------------------------------------------------')
-outfile.write('\n' + '-----------------------------------------------------------------' + '\n')
+        print("All overlaps between ground or resonance state and final state\n outside the indicated quantum numbers are considered zero")
+        outfile.write("All overlaps between ground or resonance state and final state\n outside the indicated quantum numbers are considered zero\n")
 
-#-------------------------------------------------------------------------
-# determine total decay width matrix element
-print('Effective decay widths in eV and lifetimes in s:')
-print('n_res  W_l [eV]          tau_l [s]')
-outfile.write('Effective decay widths in eV and lifetimes in s:' + '\n')
-outfile.write('n_res  W_l [eV]          tau_l [s]' + '\n')
-W_lambda = []   # [W_(l=0), W_(l=1), ...]
-for l in range (0,n_res_max+1):
-    tmp = 0
-    factor = 1
-    if (fin_pot_type in ('hyperbel','hypfree')):
-        n_fin_max = n_fin_max_list[l]       # To each lambda their own n_fin_max (v.s.)
-    for m in range (0, n_fin_max + 1):
+    if partial_GamR:
+        print()
+        print('-----------------------------------------------------------------')
+        print("Franck-Condon overlaps between final & resonance state - no V(R)")
+        outfile.write('\n' + '-----------------------------------------------------------------' + '\n')
+        outfile.write("Franck-Condon overlaps between final & resonance state - no V(R)" + '\n')
+        print('n_res  ' +'n_fin  ' + '<fin|res>')
+        outfile.write('n_res  ' +'n_fin  ' + '<fin|res>' + '\n')
+
+        for l in range(0,n_res_max+1):
+            if (fin_pot_type in ('hyperbel','hypfree')):
+                n_fin_max = n_fin_max_list[l]
+            for m in range(0,n_fin_max+1):
+                FC = res_fin_woVR[l][m]
+                outfile.write('{:5d}  {:5d}  {: 14.10E}\n'.format(l,m,FC))
+                if (fin_pot_type == 'morse'):
+                    print(('{:5d}  {:5d}  {: 14.10E}'.format(l,m,FC)))
+                elif (fin_pot_type in ('hyperbel','hypfree')):
+                    if (m == 0 or m == n_fin_max-1 or m == n_fin_max):
+                        print(('{:5d}  {:5d}  {: 14.10E}'.format(l,m,FC)))
+                    elif (m == 1):
+                        print(('{:5d}  {:5d}  {: 14.10E}'.format(l,m,FC)))
+                        print('   ...')
+        print('These additional overlaps without the V(R) dependence are used\n only in',
+                'the prefactors to the time integrals' if (partial_GamR == 'pre') else 'the calculation of the W_lambda values')
+        outfile.write('These additional overlaps without the V(R) dependence are used\n only in '
+                + ('the prefactors to the time integrals' if (partial_GamR == 'pre') else 'the calculation of the W_lambda values')
+                + '\n')
+
+    # sum over mup of product <lambda|mup><mup|kappa>       where mup means mu prime
+    indir_FCsums = []
+    for l in range (0,n_res_max+1):
+        indir_FCsum = 0
+        factor = 1
         if (fin_pot_type in ('hyperbel','hypfree')):
-            factor = R_hyp_step * np.array(E_mus[m])**2 / fin_hyp_a
-        if not partial_GamR == 'pre':
-            tmp = tmp + VEr_au**2 * np.abs(res_fin[l][m])**2 * factor      # W_l = sum_m ( VEr**2 |<m|l>|**2 ) for Morse or W_l = sum_m ( DeltaR R-DOS(m) VEr**2 |<m|l>|**2 ) for cont vibr fin states
-        else:
-            tmp = tmp + VEr_au_woVR**2 * np.abs(res_fin_woVR[l][m])**2 * factor
-    W_lambda.append(tmp)
-    ttmp = 1./ (2 * np.pi * tmp)        # lifetime tau_l = 1 / (2 pi W_l)
-    print(f'{l:5d}  {sciconv.hartree_to_ev(tmp):14.10E}  {sciconv.atu_to_second(ttmp):14.10E}')
-    outfile.write(f'{l:5d}  {sciconv.hartree_to_ev(tmp):14.10E}  {sciconv.atu_to_second(ttmp):14.10E}\n')
-print()
-outfile.write('\n')
+            n_fin_max = n_fin_max_list[l]
+        for m in range (0, n_fin_max + 1):
+            if (fin_pot_type in ('hyperbel','hypfree')):            # R-DOS for 'integration' over R_mu instead of [E_]mu
+                factor = R_hyp_steps[m] * E_mus[m]**2 / fin_hyp_a
+            if not partial_GamR == 'exp':
+                tmp = np.conj(res_fin[l][m]) * gs_fin[0][m] * factor    # <mu|lambda>* <mu|kappa=0> = <lambda|mu><mu|kappa=0> = <l|m><m|k=0>
+            else:   # If Gamma(R) only in exponent (i.e. Wl), then indir_FCsums is woVR since it is part of prefactor
+                tmp = np.conj(res_fin_woVR[l][m]) * gs_fin[0][m] * factor
+            indir_FCsum = indir_FCsum + tmp                         # sum_m <l|m><m|k=0>
+        indir_FCsums.append(indir_FCsum)                            # [sum_m <l=0|m><m|k=0>, sum_m <l=1|m><m|k=0>, ...]
+    print()
+    print('-----------------------------------------------------------------')
+    outfile.write('\n' + '-----------------------------------------------------------------' + '\n')
 
+    profile.lap('fc')
+
+    #-------------------------------------------------------------------------
+    # determine total decay width matrix element
+    print('Effective decay widths in eV and lifetimes in s:')
+    print('n_res  W_l [eV]          tau_l [s]')
+    outfile.write('Effective decay widths in eV and lifetimes in s:' + '\n')
+    outfile.write('n_res  W_l [eV]          tau_l [s]' + '\n')
+    with profile.timer('W_lambda'):
+        W_lambda = []   # [W_(l=0), W_(l=1), ...]
+        for l in range (0,n_res_max+1):
+            tmp = 0
+            factor = 1
+            if (fin_pot_type in ('hyperbel','hypfree')):
+                n_fin_max = n_fin_max_list[l]       # To each lambda their own n_fin_max (v.s.)
+            for m in range (0, n_fin_max + 1):
+                if (fin_pot_type in ('hyperbel','hypfree')):
+                    factor = R_hyp_steps[m] * np.array(E_mus[m])**2 / fin_hyp_a
+                if not partial_GamR == 'pre':
+                    tmp = tmp + VEr_au**2 * np.abs(res_fin[l][m])**2 * factor      # W_l = sum_m ( VEr**2 |<m|l>|**2 ) for Morse or W_l = sum_m ( DeltaR R-DOS(m) VEr**2 |<m|l>|**2 ) for cont vibr fin states
+                else:
+                    tmp = tmp + VEr_au_woVR**2 * np.abs(res_fin_woVR[l][m])**2 * factor
+            W_lambda.append(tmp)
+            ttmp = 1./ (2 * np.pi * tmp)        # lifetime tau_l = 1 / (2 pi W_l)
+            print(f'{l:5d}  {sciconv.hartree_to_ev(tmp):14.10E}  {sciconv.atu_to_second(ttmp):14.10E}')
+            outfile.write(f'{l:5d}  {sciconv.hartree_to_ev(tmp):14.10E}  {sciconv.atu_to_second(ttmp):14.10E}\n')
+    print()
+    outfile.write('\n')
+
+
+    #-------------------------------------------------------------------------
+    in_out.check_input(Er_au, E_fin_au, Gamma_au,
+                       Omega_au, TX_au, n_X, A0X,
+                       omega_au, TL_au, A0L, delta_t_au,
+                       tmax_au, timestep_au, E_step_au, outfile=outfile, quiet=quiet)
+    #-------------------------------------------------------------------------
+    # physical definitions of functions
+    # functions for the shape of the XUV pulse
+    if (X_sinsq):
+        print('use sinsq function')
+        f_t1  = lambda t1: 1./4 * ( np.exp(2j * np.pi * (t1 + TX_au/2) / TX_au) # There should be a minus sign in front [from (1/2i)**2]
+                              + 2                                               # & this 2 be negative [sin**2 = (exp - exp*)**2 = exp**2 - 2 exp exp* + (exp*)**2]
+                              + np.exp(-2j * np.pi * (t1 + TX_au/2) /TX_au) )
+        # fp_t1 = f'(t1)
+        fp_t1 = lambda t1: np.pi/(2j*TX_au) * ( - np.exp(2j*np.pi* (t1 + TX_au/2) / TX_au)  # Accordingly, these signs must be flipped
+                                             + np.exp(-2j*np.pi* (t1 + TX_au/2) / TX_au) )
+    elif (X_gauss):
+        print('use gauss function')
+        f_t1  = lambda t1: ( 1./ np.sqrt(2*np.pi * sigma**2)
+                           * np.exp(-t1**2 / (2*sigma**2)))
+        # fp_t1 = f'(t1)
+        fp_t1 = lambda t1: ( -t1 / np.sqrt(2*np.pi) / sigma**3
+                           * np.exp(-t1**2 / (2*sigma**2)))
+    else:
+        print('no pulse shape selected')
 
-#-------------------------------------------------------------------------
-in_out.check_input(Er_au, E_fin_au, Gamma_au,
-                   Omega_au, TX_au, n_X, A0X,
-                   omega_au, TL_au, A0L, delta_t_au,
-                   tmax_au, timestep_au, E_step_au)
-#-------------------------------------------------------------------------
-# physical definitions of functions
-# functions for the shape of the XUV pulse
-if (X_sinsq):
-    print('use sinsq function')
-    f_t1  = lambda t1: 1./4 * ( np.exp(2j * np.pi * (t1 + TX_au/2) / TX_au) # There should be a minus sign in front [from (1/2i)**2]
-                          + 2                                               # & this 2 be negative [sin**2 = (exp - exp*)**2 = exp**2 - 2 exp exp* + (exp*)**2]
-                          + np.exp(-2j * np.pi * (t1 + TX_au/2) /TX_au) )
-    # fp_t1 = f'(t1)
-    fp_t1 = lambda t1: np.pi/(2j*TX_au) * ( - np.exp(2j*np.pi* (t1 + TX_au/2) / TX_au)  # Accordingly, these signs must be flipped
-                                         + np.exp(-2j*np.pi* (t1 + TX_au/2) / TX_au) )
-elif (X_gauss):
-    print('use gauss function')
-    f_t1  = lambda t1: ( 1./ np.sqrt(2*np.pi * sigma**2)
-                       * np.exp(-t1**2 / (2*sigma**2)))
-    # fp_t1 = f'(t1)
-    fp_t1 = lambda t1: ( -t1 / np.sqrt(2*np.pi) / sigma**3
-                       * np.exp(-t1**2 / (2*sigma**2)))
-else:
-    print('no pulse shape selected')
-
-print()
-
-if (Xshape == 'convoluted'):    # Calculate field strength EX = -(AX fX)'
-    FX_t1 = lambda t1: (
-                        0
-                        - (A0X
-                           * np.cos(Omega_au * t1)
-                           * fp_t1(t1)
-                          )
-                        + (A0X
-                           * Omega_au
-                           * np.sin(Omega_au * t1)
-                           * f_t1(t1)
-                          )
-                       )
-elif (Xshape == 'infinite'):
-    FX_t1 = lambda t1: + A0X * Omega_au * np.cos(Omega_au * t1)
-    #FX_t1 = lambda t1: - A0X * np.sin(Omega_au * t1)
-                       
+    print()
 
-#-------------------------------------------------------------------------
-# technical definitions of functions (remember: FX is the field strength EX)
-#direct ionization
-fun_t_dir_1 = lambda t1: FX_t1(t1)   * np.exp(1j * E_fin_au * (t1-t_au)) \
-                                     * np.exp(1j * E_kin_au * (t1-t_au))        # Note: before any of these fncts are called, E_fin is redefined to also include E_mu
-fun_TX2_dir_1 = lambda t1: FX_t1(t1) * np.exp(1j * E_fin_au * (t1-t_au)) \
-                                     * np.exp(1j * E_kin_au * (t1-t_au))        # Same as fun_t_dir_1 - why keep ?
-
-#res_inner_fun = lambda t2: np.exp(-t2 * (np.pi * W_au + 1j*(Er_au))) \
-#                           * IR_during(t2)
-
-if (integ == 'romberg'):                                                        # numerical inner int not possible (res_inner_fun deactivated) ?
-    res_inner = lambda t1: integrate.romberg(res_inner_fun, t1, t_au)
-elif (integ == 'quadrature'):
-    res_inner = lambda t1: integrate.quad(res_inner_fun, t1, t_au)[0]
-elif (integ == 'analytic'):
-    # analytic inner integral
-    res_inner = lambda t1: (1./(1j*(E_kin_au + E_fin_au - Er_au - E_lambda)     # See the above note on E_fin also including E_mu
-                                    - np.pi * W_au)
-                            * (np.exp(t_au * (1j*(E_kin_au + E_fin_au
-                                                  - Er_au - E_lambda)
-                                                  - np.pi * W_au))
-                              - np.exp(t1 * (1j*(E_kin_au + E_fin_au
-                                                 - Er_au - E_lambda)
-                                                  - np.pi * W_au)))
-                            * np.exp(-1j*t_au * (E_kin_au + E_fin_au))
+    if (Xshape == 'convoluted'):    # Calculate field strength EX = -(AX fX)'
+        FX_t1 = lambda t1: (
+                            0
+                            - (A0X
+                               * np.cos(Omega_au * t1)
+                               * fp_t1(t1)
+                              )
+                            + (A0X
+                               * Omega_au
+                               * np.sin(Omega_au * t1)
+                               * f_t1(t1)
+                              )
                            )
-
-res_outer_fun = lambda t1: FX_t1(t1) \
-                           * np.exp(t1 * (np.pi* W_au + 1j*(Er_au + E_lambda))) \
-                           * res_inner(t1)
-
-
-# for wavepacket in resonance state
-def t_plus(t):
-    return 1/(sigma*mp.sqrt(2)) * (t - 1.j*sigma**2*(Er_au+E_lambda-1.j*mp.pi*W_au+Omega_au))
-def t_minus(t):
-    return 1/(sigma*mp.sqrt(2)) * (t - 1.j*sigma**2*(Er_au+E_lambda-1.j*mp.pi*W_au-Omega_au))
-
-def gamma_plus(T_up):
-    return ((Er_au+E_lambda-1.j*mp.pi*W_au) * (mp.erf(t_plus(T_up)) \
-                                               - mp.erf(t_plus(-TX_au/2))) \
-            + 1.j/sigma * mp.sqrt(2/mp.pi) * (mp.exp(-t_plus(T_up)**2) \
-                                              - mp.exp(-t_plus(-TX_au/2)**2)))
-def gamma_minus(T_up):
-    return ((Er_au+E_lambda-1.j*mp.pi*W_au) * (mp.erf(t_minus(T_up)) \
-                                               - mp.erf(t_minus(-TX_au/2))) \
-            + 1.j/sigma * mp.sqrt(2/mp.pi) * (mp.exp(-t_minus(T_up)**2) \
-                                              - mp.exp(-t_minus(-TX_au/2)**2)))
-
-def wp_res_int(t,T_up):
-    return (-A0X*0.25j * mp.exp(-1.j*t*(Er_au+E_lambda-1.j*mp.pi*W_au)) \
-            * (mp.exp(-sigma**2/2 * (Er_au+E_lambda-1.j*mp.pi*W_au+Omega_au)**2) \
-                * gamma_plus(T_up) \
-               + mp.exp(-sigma**2/2 * (Er_au+E_lambda-1.j*mp.pi*W_au-Omega_au)**2) \
-                * gamma_minus(T_up)))
-
-
-#-------------------------------------------------------------------------
-#-------------------------------------------------------------------------
-# initialization
-t_au = -TX_au/2
-
-
-# construct list of energy points
-Ekins = []
-E_kin_au = E_min_au
-while (E_kin_au <= E_max_au):
-    Ekins.append(sciconv.hartree_to_ev(E_kin_au))
-    E_kin_au = E_kin_au + E_step_au
-
-
-#-------------------------------------------------------------------------
-# constants / prefactors
-prefac_dir1 = 1j * cdg_au_V
-if not partial_GamR == 'exp':
-    prefac_res1 = VEr_au * rdg_au / (n_res_max + 1)
-    prefac_indir1 = -1j * np.pi * VEr_au**2 * cdg_au_V / (n_res_max + 1)
-else:
-    prefac_res1 = VEr_au_woVR * rdg_au / (n_res_max + 1)
-    prefac_indir1 = -1j * np.pi * VEr_au_woVR**2 * cdg_au_V / (n_res_max + 1)
-
-if (fin_pot_type in ('hyperbel','hypfree')):
-    n_fin_max = n_fin_max_X
-
-# for wavepacket in resonance state(s)
-wp_prefs = [(1.j/(n_res_max+1) * rdg_au * gs_res[0][nlambda] \
-               + mp.pi/(n_res_max+1) * VEr_au * cdg_au_V * indir_FCsums[nlambda])
-            for nlambda in range(n_res_max+1)]
-
-
-########################################
-# now follow the integrals themselves, for the temporal phases:
-# 'during the first pulse' (-TX/2, TX/2)
-# 'between the pulses' (TX/2, tmax)
-
-#-------------------------------------------------------------------------
-while ((t_au <= TX_au/2) and (t_au <= tmax_au)):
-#-------------------------------------------------------------------------
-    outfile.write('during the first pulse \n')
-    print('during the first pulse')
-
-    outlines = []       # will contain lines containing triples of E_kin, time and signal intensity
-    squares = np.array([])  # signal intensity ( = |amplitude|**2 = |J|**2 )
+    elif (Xshape == 'infinite'):
+        FX_t1 = lambda t1: + A0X * Omega_au * np.cos(Omega_au * t1)
+        #FX_t1 = lambda t1: - A0X * np.sin(Omega_au * t1)
+
+    # FX = exp(i Omega t1) FX_env[1] + exp(-i Omega t1) FX_env[-1] with smooth envelopes (for integ_outer = spectral)
+    if (Xshape == 'convoluted'):
+        FX_env = {1:  lambda t1: A0X * ( Omega_au * f_t1(t1) / 2j - fp_t1(t1) / 2),
+                  -1: lambda t1: A0X * (-Omega_au * f_t1(t1) / 2j - fp_t1(t1) / 2)}
+    elif (Xshape == 'infinite'):
+        FX_env = {1:  lambda t1: A0X * Omega_au / 2 * np.ones(np.shape(t1)),
+                  -1: lambda t1: A0X * Omega_au / 2 * np.ones(np.shape(t1))}
+
+
+    #-------------------------------------------------------------------------
+    # technical definitions of functions (remember: FX is the field strength EX)
+    #direct ionization
+    fun_t_dir_1 = lambda t1: FX_t1(t1)   * np.exp(1j * E_fin_au * (t1-t_au)) \
+                                         * np.exp(1j * E_kin_au * (t1-t_au))        # Note: before any of these fncts are called, E_fin is redefined to also include E_mu
+    fun_TX2_dir_1 = lambda t1: FX_t1(t1) * np.exp(1j * E_fin_au * (t1-t_au)) \
+                                         * np.exp(1j * E_kin_au * (t1-t_au))        # Same as fun_t_dir_1 - why keep ?
+
+    #res_inner_fun = lambda t2: np.exp(-t2 * (np.pi * W_au + 1j*(Er_au))) \
+    #                           * IR_during(t2)
+
+    if (integ == 'romberg'):                                                        # numerical inner int not possible (res_inner_fun deactivated) ?
+        res_inner = lambda t1: integrate.romberg(res_inner_fun, t1, t_au)
+    elif (integ == 'quadrature'):
+        res_inner = lambda t1: integrate.quad(res_inner_fun, t1, t_au)[0]
+    elif (integ == 'analytic'):
+        # analytic inner integral
+        res_inner = lambda t1: (1./(1j*(E_kin_au + E_fin_au - Er_au - E_lambda)     # See the above note on E_fin also including E_mu
+                                        - np.pi * W_au)
+                                * (np.exp(t_au * (1j*(E_kin_au + E_fin_au
+                                                      - Er_au - E_lambda)
+                                                      - np.pi * W_au))
+                                  - np.exp(t1 * (1j*(E_kin_au + E_fin_au
+                                                     - Er_au - E_lambda)
+                                                      - np.pi * W_au)))
+                                * np.exp(-1j*t_au * (E_kin_au + E_fin_au))
+                               )
+
+    res_outer_fun = lambda t1: FX_t1(t1) \
+                               * np.exp(t1 * (np.pi* W_au + 1j*(Er_au + E_lambda))) \
+                               * res_inner(t1)
+
+    # outer integral over t1 (returns only the value of the integral)
+    if (integ_outer == "quadrature"):
+        outer_integ = lambda func, a, b: ci.complex_quadrature(func, a, b)[0]  # [0] of quad integ result = integral (rest is est error & info)
+    elif (integ_outer == "romberg"):
+        outer_integ = lambda func, a, b: ci.complex_romberg(func, a, b)
+    elif (integ_outer in ("gauss_legendre", "clenshaw_curtis")):
+        # all integrands oscillate at most with Omega + E_kin + E_fin + E_mu (direct and resonant path)
+        # or Omega + Er + E_lambda (resonant path), plus the spectral width of the pulse
+        omega_max_au = (Omega_au + max(E_max_au + E_fin_au_1 + max(E_mus), Er_au + max(E_lambdas))
+                        + 2 * np.pi / TX_au)
+        outer_integ = lambda func, a, b: ci.complex_fixed_quad(func, a, b,
+                                                               n=ci.nodes_for_bandwidth(omega_max_au, a, b),
+                                                               rule=integ_outer)
+        print('Fixed-grid outer integration with up to {:d} nodes'.format(
+            ci.nodes_for_bandwidth(omega_max_au, -TX_au/2, TX_au/2)))
+        outfile.write('Fixed-grid outer integration with up to {:d} nodes\n'.format(
+            ci.nodes_for_bandwidth(omega_max_au, -TX_au/2, TX_au/2)))
+    elif (integ_outer == "spectral"):
+        # the envelopes FX_env vary on the scale of sigma (gauss) or TX/2pi (sinsq), E_kin and Omega are
+        # taken into the exact exponential of the Filon rule (see complex_integration)
+        h_spectral = (sigma if X_gauss else TX_au / (2 * np.pi)) / 100
+        spectral_nodes = lambda a, b: 2 * max(2, int(np.ceil((b - a) / (2 * h_spectral))))
+        print('Spectral outer integration with up to {:d} nodes, chirp-z transform over E_kin'.format(
+            spectral_nodes(-TX_au/2, TX_au/2)))
+        outfile.write('Spectral outer integration with up to {:d} nodes, chirp-z transform over E_kin\n'.format(
+            spectral_nodes(-TX_au/2, TX_au/2)))
+    elif (integ_outer == "analytic"):
+        if not (X_gauss and Xshape == 'convoluted' and integ == 'analytic'):
+            raise ValueError('!!! The analytic outer integral is only available for a convoluted Gaussian XUV pulse and analytic inner integral. Programme terminated.')
+        # accuracy check against quadrature at the borders of the spectrum, lowest final and resonance state
+        devs = [gai.quad_check(E_kin_au + E_fin_au_1 + E_mus[0], Er_au + E_lambdas[0], W_lambda[0],
+                               TX_au/2, -TX_au/2, TX_au/2, A0X, Omega_au, sigma)
+                for E_kin_au in (E_min_au, E_max_au)]
+        print('Analytic outer integration, max. relative deviation from quadrature: direct {:.3E}, resonant {:.3E}'.format(
+            max(dev[0] for dev in devs), max(dev[1] for dev in devs)))
+        outfile.write('Analytic outer integration, max. relative deviation from quadrature: direct {:.3E}, resonant {:.3E}\n'.format(
+            max(dev[0] for dev in devs), max(dev[1] for dev in devs)))
+
+
+    # for wavepacket in resonance state
+    def t_plus(t):
+        return 1/(sigma*mp.sqrt(2)) * (t - 1.j*sigma**2*(Er_au+E_lambda-1.j*mp.pi*W_au+Omega_au))
+    def t_minus(t):
+        return 1/(sigma*mp.sqrt(2)) * (t - 1.j*sigma**2*(Er_au+E_lambda-1.j*mp.pi*W_au-Omega_au))
+
+    def gamma_plus(T_up):
+        return ((Er_au+E_lambda-1.j*mp.pi*W_au) * (mp.erf(t_plus(T_up)) \
+                                                   - mp.erf(t_plus(-TX_au/2))) \
+                + 1.j/sigma * mp.sqrt(2/mp.pi) * (mp.exp(-t_plus(T_up)**2) \
+                                                  - mp.exp(-t_plus(-TX_au/2)**2)))
+    def gamma_minus(T_up):
+        return ((Er_au+E_lambda-1.j*mp.pi*W_au) * (mp.erf(t_minus(T_up)) \
+                                                   - mp.erf(t_minus(-TX_au/2))) \
+                + 1.j/sigma * mp.sqrt(2/mp.pi) * (mp.exp(-t_minus(T_up)**2) \
+                                                  - mp.exp(-t_minus(-TX_au/2)**2)))
+
+    def wp_res_int(t,T_up):
+        return (-A0X*0.25j * mp.exp(-1.j*t*(Er_au+E_lambda-1.j*mp.pi*W_au)) \
+                * (mp.exp(-sigma**2/2 * (Er_au+E_lambda-1.j*mp.pi*W_au+Omega_au)**2) \
+                    * gamma_plus(T_up) \
+                   + mp.exp(-sigma**2/2 * (Er_au+E_lambda-1.j*mp.pi*W_au-Omega_au)**2) \
+                    * gamma_minus(T_up)))
+
+
+    #-------------------------------------------------------------------------
+    #-------------------------------------------------------------------------
+    # initialization
+    t_au = -TX_au/2
     E_kin_au = E_min_au
-    
-    t_s = sciconv.atu_to_second(t_au)
-    print('t_s = ', t_s)
-    outfile.write('t_s = ' + str(t_s) + '\n')
-    movie_out.write('"' + format(t_s*1E15, '.3f') + ' fs' + '"' + '\n')
-    cnt = 0     # initialize counter for printing progress
-    if not wavepac_only: 
-        while (E_kin_au <= E_max_au):
-            if (cnt == 4):  # print progress: for each E_kin one '-', but for every fifth one '|' instead
-                print('|', end = '', flush = True)
-                cnt = 0
-            else:
-                print('-', end = '', flush = True)
-                cnt = cnt + 1
-            #print(f'{sciconv.hartree_to_ev(E_kin_au):.2} eV')           #?
-            #outfile.write(f'{sciconv.hartree_to_ev(E_kin_au):.2} eV\n') #?
-            p_au = np.sqrt(2*E_kin_au)
-            sum_square = 0      # Total spectrum |J @ E_kin|**2 = sum_mu |J_mu @ E_kin|**2  (sum of contributions of all final states with E_kin); for continuous mu: int ~ sum
-            if t_au==-TX_au/2:
-                squares = np.append(squares, 0.)
-                string = in_out.prep_output(0., E_kin_au, t_au)
-                outlines.append(string)
-                E_kin_au = E_kin_au + E_step_au
-                continue
-    
-            for nmu in range (0, n_fin_max + 1):           # loop over all mu, calculate J_mu = J_dir,mu + J_nondir,mu
-                E_fin_au = E_fin_au_1 + E_mus[nmu]      # E_fin_au_1: inputted electronic E_fin_au, E_mus: vibrational eigenvalues of fin state
-        #            Er_au = Er_a_au
-                
-                # Direct term
-                if (integ_outer == "quadrature"):
-                    I1 = ci.complex_quadrature(fun_t_dir_1, (-TX_au/2), t_au)
-                    dir_J1 = prefac_dir1 * I1[0] * gs_fin[0][nmu]        # [0] of quad integ result = integral (rest is est error & info); FC = <mu_n|kappa_0>
-    
-                elif (integ_outer == "romberg"):
-                    I1 = ci.complex_romberg(fun_t_dir_1, (-TX_au/2), t_au)
-                    dir_J1 = prefac_dir1 * I1 * gs_fin[0][nmu]           # romberg returns only the integral, so no [0] necessary
-                 
-                # J_nondir,mu = sum_lambda J_nondir,mu,lambda = sum_lambda (J_res,mu,lambda + J_indir,mu,lambda)
-                J = 0
-                for nlambda in range (0,n_res_max+1):
-                    if (fin_pot_type in ('hyperbel','hypfree') and nmu > n_fin_max_list[nlambda]):  # J_nondir,mu,lambda = 0 if repulsive |fin>|mu> lies higher than |res>|lambda>
-                        continue
-                    E_lambda = E_lambdas[nlambda]
-                    W_au = W_lambda[nlambda]
-                    if (integ_outer == "quadrature"):
-                        res_I = ci.complex_quadrature(res_outer_fun, (-TX_au/2), t_au)
-        
-                        if not partial_GamR == 'exp':
-                            res_J1 = (prefac_res1 * res_I[0]
-                                      * gs_res[0][nlambda] * res_fin[nlambda][nmu])
-                            indir_J1 = (prefac_indir1 * res_I[0]
-                                        * indir_FCsums[nlambda] * res_fin[nlambda][nmu])
-                        else:
-                            res_J1 = (prefac_res1 * res_I[0]
-                                      * gs_res[0][nlambda] * res_fin_woVR[nlambda][nmu])
-                            indir_J1 = (prefac_indir1 * res_I[0]
-                                        * indir_FCsums[nlambda] * res_fin_woVR[nlambda][nmu])
-    
-                    elif (integ_outer == "romberg"):
-                        res_I = ci.complex_romberg(res_outer_fun, (-TX_au/2), t_au)
-                    
-                        if not partial_GamR == 'exp':
-                            res_J1 = (prefac_res1 * res_I
-                                      * gs_res[0][nlambda] * res_fin[nlambda][nmu])
-                            indir_J1 = (prefac_indir1 * res_I
-                                        * indir_FCsums[nlambda] * res_fin[nlambda][nmu])
-                        else:
-                            res_J1 = (prefac_res1 * res_I
-                                      * gs_res[0][nlambda] * res_fin_woVR[nlambda][nmu])
-                            indir_J1 = (prefac_indir1 * res_I
-                                        * indir_FCsums[nlambda] * res_fin_woVR[nlambda][nmu])
-        
-                    J = (J
-                         + res_J1
-                         + indir_J1
-                         )
-        
-                # Total trs prob (@E_kin, t) = sum_mu |J_mu|**2
-                # For cont rep fin: int (dE_mu |J_mu|**2 E-DOS(E_mu)) = int (dR_mu |J_mu|**2 R-DOS(R_mu))
-                #   R-DOS = E-DOS * Va / R_mu**2 = E-DOS * E_mu**2 / Va. If E-DOS = 1 & R_hyp_step = const: int (dR_mu |J_mu|**2 R-DOS) ~ sum_mu (R_hyp_step |J_mu|**2 E_mu**2 / Va)
-                square = np.absolute(J + dir_J1)**2     # |J_mu|**2
-                if (fin_pot_type in ('hyperbel','hypfree')):
-                    factor = R_hyp_step * E_mus[nmu]**2 / fin_hyp_a
-                    old_square = square
-                    square = square * factor
-                sum_square = sum_square + square        # |J|**2 = sum_mu |J_mu|**2
-                #print(f'nmu = {nmu:>3}  f = {factor:.5f}  osq = {old_square:.5E}  sq = {square:.5E}  sum = {sum_square:.5E}')
-                #outfile.write(f'nmu = {nmu:>3}  f = {factor:.5f}  osq = {old_square:.5E}  sq = {square:.5E}  sum = {sum_square:.5E}\n')
-    
-            squares = np.append(squares, sum_square)
-    
-            string = in_out.prep_output(sum_square, E_kin_au, t_au)     # returns str: E_kin_eV, t_s, sum_square = intensity
-            outlines.append(string)
-            
-            E_kin_au = E_kin_au + E_step_au     # @ t = const.
-        
-        
-        in_out.doout_1f(pure_out, outlines)     # writes each (E_kin, t = const, |J|**2) triple in a sep line into output file
-        in_out.doout_movie(movie_out, outlines)
-        print()
-        max_pos = argrelextrema(squares, np.greater)[0]      # finds position of relative (i. e. local) maxima of |J|**2 in an array
-        if (len(max_pos > 0)):                               # if there are such:
-            for i in range (0, len(max_pos)):
-                print(Ekins[max_pos[i]], squares[max_pos[i]])      # print all loc max & resp E_kin
-                outfile.write(str(Ekins[max_pos[i]]) + '  ' + str(squares[max_pos[i]]) + '\n')
-    
-    # wavepacket in resonance state(s)
-    wp_ampls = []
-    for nlambda in range (0,n_res_max+1):
-        E_lambda = E_lambdas[nlambda]
-        W_au = W_lambda[nlambda]
-        wp_I = wp_res_int(t_au,t_au)
-        wp_pref = wp_prefs[nlambda] 
-        wp_ampl = wp_pref * wp_I
-        wp_string = format(nlambda, 'd') + '   ' + format(sciconv.atu_to_second(t_au), ' .18f') \
-                + '   ' + format(complex(wp_ampl), ' .15e')
-        wp_ampls.append(wp_string)
-    in_out.doout_1f(wp_res_out, wp_ampls)
-
-
-    t_au = t_au + timestep_au
-
-
-
-#-------------------------------------------------------------------------
-while (t_au >= TX_au/2\
-#        and (t_au <= (delta_t_au - a))\
-        and (t_au <= tmax_au)):
-#-------------------------------------------------------------------------
-    outfile.write('between the pulses \n')
-    print('between the pulses')
-
-    # all equal to during-1st-pulse section, except for integrating over entire XUV pulse now
-
-    outlines = []       # will contain lines containing triples of E_kin, time and signal intensity
-    squares = np.array([])  # signal intensity ( = |amplitude|**2 = |J|**2 )
+    E_fin_au = E_fin_au_1
+    E_lambda = E_lambdas[0]     # E_lambda and W_au are set per resonance state by time_step
+    W_au = W_lambda[0]
+    step_evals = {}             # integrand evaluations per integral type in the current time step (see profiling.counted)
+
+    # time integrals keyed by the total energy E_tot = E_kin + E_fin + E_mu (-e/--E_tol):
+    # the direct and resonant integrals depend on E_kin and mu only through E_tot, so with E_tot rounded to
+    # multiples of E_tol every distinct E_tot (and lambda) is integrated only once per time step
+    E_tol_au = sciconv.ev_to_hartree(E_tol)
+    tot_caches = {}             # 'dir' or nlambda -> {rounded E_tot / E_tol: integral}, cleared by time_step
+
+    def E_tot_rounded(E_tot):
+        return (np.rint(np.asarray(E_tot) / E_tol_au) * E_tol_au if E_tol_au else E_tot)
+
+    def cached_integ(cache, integ, E_tot):
+        # integ(E_tot array) for the rounded E_tot, every distinct value computed once and kept in cache
+        if not E_tol_au:
+            return np.reshape(integ(np.ravel(E_tot)), np.shape(E_tot))
+        keys = np.rint(np.asarray(E_tot) / E_tol_au).astype(np.int64).ravel().tolist()
+        new = [key for key in dict.fromkeys(keys) if key not in cache]
+        if new:
+            cache.update(zip(new, integ(np.array(new) * E_tol_au)))
+        step_evals['shared'] = step_evals.get('shared', 0) + len(keys) - len(new)
+        return np.array([cache[key] for key in keys]).reshape(np.shape(E_tot))
+
+    if align and (fin_pot_type == 'morse') and (n_fin_max > 0):
+        # E_step such that the spacing of the lowest final vibrational states is a multiple of it,
+        # so that E_kin + E_mu of neighbouring states fall onto the same total energies
+        dE_mu = E_mus[1] - E_mus[0]
+        E_step_au = dE_mu / max(1, round(dE_mu / E_step_au))
+        print('E_kin grid aligned to the final vibrational spacing: E_step [eV] = ', sciconv.hartree_to_ev(E_step_au))
+        outfile.write('E_kin grid aligned to the final vibrational spacing: E_step [eV] = ' + str(sciconv.hartree_to_ev(E_step_au)) + '\n')
+    elif align:
+        print('The E_kin grid is only aligned for bound (Morse) final states')
+        outfile.write('The E_kin grid is only aligned for bound (Morse) final states\n')
+    if E_tol_au and (integ_outer == "spectral"):
+        E_tol_au = 0        # the spectral scheme needs the E_kin grid unrounded and does not integrate per E_tot anyway
+        print('The spectral outer integration ignores -e/--E_tol')
+        outfile.write('The spectral outer integration ignores -e/--E_tol\n')
+    elif E_tol_au:
+        print('Time integrals are shared between total energies E_kin + E_fin + E_mu within {:.3E} eV'.format(E_tol))
+        outfile.write('Time integrals are shared between total energies E_kin + E_fin + E_mu within {:.3E} eV\n'.format(E_tol))
+
+
+    # construct list of energy points
+    Ekins = []
+    Ekins_au = []
     E_kin_au = E_min_au
-    
-    t_s = sciconv.atu_to_second(t_au)
-    print('t_s = ', t_s)
-    outfile.write('t_s = ' + str(t_s) + '\n')
-    movie_out.write('"' + format(t_s*1E15, '.3f') + ' fs' + '"' + '\n')
-    cnt = 0     # initialize counter for printing progress
-    if not wavepac_only: 
-        while (E_kin_au <= E_max_au):
-            if (cnt == 4):  # print progress: for each E_kin one '-', but for every fifth one '|' instead
-                print('|', end = '', flush = True)
-                cnt = 0
-            else:
-                print('-', end = '', flush = True)
-                cnt = cnt + 1
-            #print(f'{sciconv.hartree_to_ev(E_kin_au):.2} eV')           #?
-            #outfile.write(f'{sciconv.hartree_to_ev(E_kin_au):.2} eV\n') #?
-            p_au = np.sqrt(2*E_kin_au)
-            sum_square = 0      # Total spectrum |J @ E_kin|**2 = sum_mu |J_mu @ E_kin|**2  (sum of contributions of all final states with E_kin)
-    
-            for nmu in range (0, n_fin_max + 1):           # loop over all mu, calculate J_mu = J_dir,mu + J_nondir,mu
-                E_fin_au = E_fin_au_1 + E_mus[nmu]      # E_fin_au_1: inputted electronic E_fin_au, E_mus: vibrational eigenvalues of fin state
-        #            Er_au = Er_a_au
-                
-                # Direct term
-                if (integ_outer == "quadrature"):
-                    I1 = ci.complex_quadrature(fun_t_dir_1, (-TX_au/2), TX_au/2)
-                    dir_J1 = prefac_dir1 * I1[0] * gs_fin[0][nmu]        # [0] of quad integ result = integral (rest is est error & info); FC = <mu_n|kappa_0>
-    #                    print(nmu, gs_fin[0][nmu], dir_J1)   #?
-        
-                elif (integ_outer == "romberg"):
-                    I1 = ci.complex_romberg(fun_t_dir_1, (-TX_au/2), TX_au/2)
-                    dir_J1 = prefac_dir1 * I1 * gs_fin[0][nmu]           # romberg returns only the integral, so no [0] necessary
-    
-                # J_nondir,mu = sum_lambda J_nondir,mu,lambda = sum_lambda (J_res,mu,lambda + J_indir,mu,lambda)
-                J = 0
-                for nlambda in range (0,n_res_max+1):
-                    if (fin_pot_type in ('hyperbel','hypfree') and nmu > n_fin_max_list[nlambda]):  # J_nondir,mu,lambda = 0 if repulsive |fin>|mu> lies higher than |res>|lambda>
-    #                    print(nmu, nlambda, 'skipped')  #?
-                        continue
-                    E_lambda = E_lambdas[nlambda]
-                    W_au = W_lambda[nlambda]
-                    if (integ_outer == "quadrature"):
-                        res_I = ci.complex_quadrature(res_outer_fun, (-TX_au/2), TX_au/2)
-                        
-                        if not partial_GamR == 'exp':
-                            res_J1 = (prefac_res1 * res_I[0]
-                                      * gs_res[0][nlambda] * res_fin[nlambda][nmu])
-                            indir_J1 = (prefac_indir1 * res_I[0]
-                                        * indir_FCsums[nlambda] * res_fin[nlambda][nmu])
-    #                        print(nmu, nlambda, 'res_J1 =', res_J1, 'indir_J1 =', indir_J1)   #?
-                        else:
-                            res_J1 = (prefac_res1 * res_I[0]
-                                      * gs_res[0][nlambda] * res_fin_woVR[nlambda][nmu])
-                            indir_J1 = (prefac_indir1 * res_I[0]
-                                        * indir_FCsums[nlambda] * res_fin_woVR[nlambda][nmu])
-    #                        print(nmu, nlambda, 'res_J1 =', res_J1, 'indir_J1 =', indir_J1)   #?
-        
-                    elif (integ_outer == "romberg"):
-                        res_I = ci.complex_romberg(res_outer_fun, (-TX_au/2), TX_au/2)
-                        
-                        if not partial_GamR == 'exp':
-                            res_J1 = (prefac_res1 * res_I
-                                      * gs_res[0][nlambda] * res_fin[nlambda][nmu])
-                            indir_J1 = (prefac_indir1 * res_I
-                                        * indir_FCsums[nlambda] * res_fin[nlambda][nmu])
-                        else:
-                            res_J1 = (prefac_res1 * res_I
-                                      * gs_res[0][nlambda] * res_fin_woVR[nlambda][nmu])
-                            indir_J1 = (prefac_indir1 * res_I
-                                        * indir_FCsums[nlambda] * res_fin_woVR[nlambda][nmu])
-    
-    
-                    J = (J
-                         + res_J1
-                         + indir_J1
-                         )
-        
-                # Total trs prob (@E_kin, t) = sum_mu |J_mu|**2
-                # For cont rep fin: int (dE_mu |J_mu|**2 E-DOS(E_mu)) = int (dR_mu |J_mu|**2 R-DOS(R_mu))
-                #   R-DOS = E-DOS * Va / R_mu**2 = E-DOS * E_mu**2 / Va. If E-DOS = 1 & R_hyp_step = const: int (dR_mu |J_mu|**2 R-DOS) ~ sum_mu (R_hyp_step |J_mu|**2 E_mu**2 / Va)
-                square = np.absolute(J + dir_J1)**2     # |J_mu|**2
-                if (fin_pot_type in ('hyperbel','hypfree')):
-                    factor = R_hyp_step * E_mus[nmu]**2 / fin_hyp_a
-                    old_square = square
-                    square = square * factor
-                sum_square = sum_square + square        # |J|**2 = sum_mu |J_mu|**2
-                #print(f'nmu = {nmu:>3}  f = {factor:.5f}  osq = {old_square:.5E}  sq = {square:.5E}  sum = {sum_square:.5E}')
-                #outfile.write(f'nmu = {nmu:>3}  f = {factor:.5f}  osq = {old_square:.5E}  sq = {square:.5E}  sum = {sum_square:.5E}\n')
-    
-            squares = np.append(squares, sum_square)
-    
-            string = in_out.prep_output(sum_square, E_kin_au, t_au)     # returns str: E_kin_eV, t_s, sum_square = intensity
-            outlines.append(string)
-            
-            E_kin_au = E_kin_au + E_step_au     # @ t = const.
-        
-        
-        in_out.doout_1f(pure_out, outlines)     # writes each (E_kin, t = const, |J|**2) triple in a sep line into output file
-        in_out.doout_movie(movie_out, outlines)
-        print()
-        max_pos = argrelextrema(squares, np.greater)[0]      # finds position of relative (i. e. local) maxima of |J|**2 in an array
-        if (len(max_pos > 0)):                               # if there are such:
-            for i in range (0, len(max_pos)):
-                print(Ekins[max_pos[i]], squares[max_pos[i]])      # print all loc max & resp E_kin
-                outfile.write(str(Ekins[max_pos[i]]) + '  ' + str(squares[max_pos[i]]) + '\n')
-    
-    # wavepacket in resonance state(s)
-    wp_ampls = []
-    for nlambda in range (0,n_res_max+1):
-        E_lambda = E_lambdas[nlambda]
-        W_au = W_lambda[nlambda]
-        wp_I = wp_res_int(t_au,TX_au/2)
-        wp_pref = wp_prefs[nlambda] 
-        wp_ampl = wp_pref * wp_I
-        wp_string = format(nlambda, 'd') + '   ' + format(sciconv.atu_to_second(t_au), ' .18f') \
-                + '   ' + format(complex(wp_ampl), ' .15e')
-        wp_ampls.append(wp_string)
-    in_out.doout_1f(wp_res_out, wp_ampls)
-
-
-    t_au = t_au + timestep_au
-
-
-
+    while (E_kin_au <= E_max_au):
+        Ekins.append(sciconv.hartree_to_ev(E_kin_au))
+        Ekins_au.append(E_kin_au)
+        E_kin_au = E_kin_au + E_step_au
+
+
+    #-------------------------------------------------------------------------
+    # constants / prefactors
+    prefac_dir1 = 1j * cdg_au_V
+    if not partial_GamR == 'exp':
+        prefac_res1 = VEr_au * rdg_au / (n_res_max + 1)
+        prefac_indir1 = -1j * np.pi * VEr_au**2 * cdg_au_V / (n_res_max + 1)
+    else:
+        prefac_res1 = VEr_au_woVR * rdg_au / (n_res_max + 1)
+        prefac_indir1 = -1j * np.pi * VEr_au_woVR**2 * cdg_au_V / (n_res_max + 1)
 
-print('In order to process the wavepacket results, consider running res_wavepacket.py')
+    if (fin_pot_type in ('hyperbel','hypfree')):
+        n_fin_max = n_fin_max_X
+
+    # the same as arrays over (E_kin, mu, lambda), with which the amplitudes J_mu on the whole E_kin axis
+    # are contracted from the tensor of the resonant integrals:
+    # J = prefac_dir1 I_dir gs_fin + sum_lambda res_I C_res,  C_res = (prefac_res1 <l|k0> + prefac_indir1 sum_m <l|m><m|k0>) <m|l>
+    E_tot_grid = E_tot_rounded(np.array(Ekins_au)[:,None] + E_fin_au_1 + np.array(E_mus[:n_fin_max+1])[None,:])  # (E_kin x mu)
+    E_res_lambda = np.array([Er_au + E_lambdas[nlambda] for nlambda in range(n_res_max+1)])
+    kappa_res = E_res_lambda - 1j * np.pi * np.array(W_lambda)
+    gs_fin_mu = np.array(gs_fin[0][:n_fin_max+1])
+    C_res = np.zeros((n_res_max+1, n_fin_max+1), dtype=complex)     # (lambda x mu)
+    n_mu_lambda = []            # number of final states coupled to each lambda
+    for nlambda in range (0,n_res_max+1):
+        FC_res_fin = np.array((res_fin if not partial_GamR == 'exp' else res_fin_woVR)[nlambda][:n_fin_max+1])
+        C_res[nlambda] = (prefac_res1 * gs_res[0][nlambda] + prefac_indir1 * indir_FCsums[nlambda]) * FC_res_fin
+        n_mu_lambda.append(n_fin_max+1)
+        if (fin_pot_type in ('hyperbel','hypfree')):
+            n_mu_lambda[-1] = min(n_fin_max_list[nlambda]+1, n_fin_max+1)
+            C_res[nlambda, n_mu_lambda[-1]:] = 0     # J_nondir,mu,lambda = 0 if repulsive |fin>|mu> lies higher than |res>|lambda>
+    dos_mu = np.ones(n_fin_max+1)   # R-DOS of the final states (see the E_kin loop)
+    if (fin_pot_type in ('hyperbel','hypfree')):
+        dos_mu = R_hyp_steps[:n_fin_max+1] * np.array(E_mus[:n_fin_max+1])**2 / fin_hyp_a
+
+    def mu_chunks(size_per_mu):     # slices of mu such that size_per_mu * len(slice) <= max_chunk_size
+        step = max(1, max_chunk_size // max(1, size_per_mu))
+        return [slice(nmu, min(nmu + step, n_fin_max+1)) for nmu in range(0, n_fin_max+1, step)]
+
+    #-------------------------------------------------------------------------
+    # screening of the (E_kin, mu) channels (-s/--screen): upper estimates of |J_mu(E_kin)| from the pulse spectrum,
+    #   |int_-TX/2^T_up dt1 FX(t1) exp(i E t1)| <= S(E),
+    #   |J_dir| <= |prefac_dir1 gs_fin| S(E_tot),  |J_nondir,lambda| <= |C_res| min((S(E_res) + S(E_tot)) / |D|, (t + TX/2) int |FX|),
+    # with the Lorentzian 1/|D| = 1/|i (E_tot - E_res) - pi W| of every resonance state (see the incremental mode below),
+    # which near the resonance is limited by |res_inner| <= t - t1.
+    # S follows from FX = -(A0X cos(Omega t1) f(t1))' by parts: the ends of the interval plus the envelope f
+    # at the detunings E -+ Omega, for which the truncated envelope is estimated by its (Gaussian) spectrum and
+    # twice its values at the ends of the tails cut off at -TX/2 and T_up.
+    # Channels whose estimate of |J_mu|**2 lies below screen_tol times the largest one are skipped.
+    f_screen = (f_t1 if (Xshape == 'convoluted') else (lambda t1: 1.))
+    f_max = max(abs(f_screen(0.)), abs(f_screen(TX_au/2)))
+
+    def envelope_bound(delta, T_up):    # upper estimate of |int_-TX/2^T_up dt1 f(t1) exp(i delta t1)|
+        delta = np.abs(delta)
+        tails = 2 * (abs(f_screen(-TX_au/2)) + abs(f_screen(max(T_up, 0.)))) / np.maximum(delta, 1e-300)
+        smooth = (np.exp(-sigma**2 * delta**2 / 2) if (X_gauss and Xshape == 'convoluted') else 0.)
+        return np.minimum((T_up + TX_au/2) * f_max, smooth + tails)
+
+    def pulse_bound(E, T_up):   # S(E)
+        E = np.abs(E)
+        if (Xshape == 'infinite'):
+            return A0X * Omega_au / 2 * (envelope_bound(E - Omega_au, T_up) + envelope_bound(E + Omega_au, T_up))
+        return A0X * (abs(f_screen(-TX_au/2)) + abs(f_screen(T_up))
+                      + E / 2 * (envelope_bound(E - Omega_au, T_up) + envelope_bound(E + Omega_au, T_up)))
+
+    def screen_mask(t, T_up):   # (E_kin x mu) array, True for the channels to be calculated
+        if (T_up <= -TX_au/2):
+            return np.zeros(E_tot_grid.shape, dtype=bool)
+        S_res = pulse_bound(E_res_lambda, T_up)
+        t1 = np.linspace(-TX_au/2, T_up, 4001)
+        res_max = (t + TX_au/2) * (T_up + TX_au/2) * np.mean(np.abs(FX_t1(t1)))
+        bound = np.zeros(E_tot_grid.shape)
+        for mus in mu_chunks(len(Ekins_au) * (n_res_max+1)):
+            E_tot = E_tot_grid[:,mus]
+            S_tot = pulse_bound(E_tot, T_up)
+            D = np.abs(1j * (E_tot[:,:,None] - E_res_lambda) - np.pi * np.array(W_lambda))     # (E_kin x mu x lambda)
+            bound[:,mus] = (np.abs(prefac_dir1 * gs_fin_mu[mus]) * S_tot
+                            + np.einsum('eml,lm->em', np.minimum((S_res + S_tot[:,:,None]) / D, res_max),
+                                        np.abs(C_res[:,mus])))
+        bound = bound**2 * dos_mu
+        return (bound >= screen_tol * np.max(bound)) & (bound > 0)
+
+    #-------------------------------------------------------------------------
+    # spectrum on the whole E_kin axis at once (fixed-grid outer integration only):
+    # the integrands are broadcast over an (E_kin x quadrature node) grid,
+    # E_kin along the first, t1 along the last axis
+    # (for integ_outer = analytic, the closed-form integrals are evaluated on the E_kin array directly)
+    batch_Ekin = (integ_outer in ("gauss_legendre", "clenshaw_curtis", "analytic"))
+    if (batch_Ekin and not integ == 'analytic'):
+        raise ValueError('!!! Fixed-grid outer integration requires the analytic inner integral. Programme terminated.')
+
+    # same as fun_t_dir_1 and res_outer_fun with analytic res_inner, E_tot = E_kin + E_fin + E_mu
+    dir_fun_E = lambda t1, E_tot: FX_t1(t1) * np.exp(1j * E_tot * (t1-t_au))
+    res_outer_fun_E = lambda t1, E_tot, E_res, W: ( FX_t1(t1)
+                               * np.exp(t1 * (np.pi* W + 1j*E_res))
+                               * (1./(1j*(E_tot - E_res) - np.pi * W)
+                                  * (np.exp(t_au * (1j*(E_tot - E_res) - np.pi * W))
+                                     - np.exp(t1 * (1j*(E_tot - E_res) - np.pi * W)))
+                                  * np.exp(-1j*t_au * E_tot)) )
+
+    if (integ_outer == "analytic"):
+        dir_integ_E = profiling.counted(step_evals, 'dir',
+                                        lambda E_tot, T_up: gai.dir_integral(E_tot, t_au, (-TX_au/2), T_up,
+                                                                             A0X, Omega_au, sigma))
+        res_integ_E = profiling.counted(step_evals, 'res',
+                                        lambda E_tot, E_res, W, T_up: gai.res_integral(E_tot, E_res, W, t_au, (-TX_au/2), T_up,
+                                                                                       A0X, Omega_au, sigma))
+    else:
+        dir_integ_E = lambda E_tot, T_up: outer_integ(profiling.counted(step_evals, 'dir',
+                                                                        lambda t1: dir_fun_E(t1, E_tot[:,None])),
+                                                      (-TX_au/2), T_up)
+        res_integ_E = lambda E_tot, E_res, W, T_up: outer_integ(profiling.counted(step_evals, 'res',
+                                                                                  lambda t1: res_outer_fun_E(t1, E_tot[:,None], E_res, W)),
+                                                                (-TX_au/2), T_up)
+
+    def res_tensor(E_tot, keep, mus, T_up):    # resonant integrals for E_tot (E_kin x mus), as (E_kin x mu x lambda)
+        res_I = np.zeros(E_tot.shape + (n_res_max+1,), dtype=complex)
+        for nlambda in range (0,n_res_max+1):
+            keep_lambda = keep & (np.arange(mus.start, mus.stop) < n_mu_lambda[nlambda])     # only the coupled mu
+            if keep_lambda.any():
+                res_I[keep_lambda,nlambda] = cached_integ(tot_caches.setdefault(nlambda, {}),
+                                                          lambda E: res_integ_E(E, E_res_lambda[nlambda], W_lambda[nlambda], T_up),
+                                                          E_tot[keep_lambda])
+        return res_I
+
+    def Ekin_squares(T_up, keep):   # returns |J|**2 = sum_mu |J_mu|**2 for all E_kin in Ekins_au (channels with keep only)
+        sum_square = np.zeros(len(Ekins_au))
+        n_nodes = (1 if (integ_outer == "analytic") else ci.nodes_for_bandwidth(omega_max_au, (-TX_au/2), T_up))
+        for mus in mu_chunks(len(Ekins_au) * n_nodes):
+            E_tot = E_tot_grid[:,mus]
+            I1 = np.zeros(E_tot.shape, dtype=complex)
+            if keep[:,mus].any():
+                I1[keep[:,mus]] = cached_integ(tot_caches.setdefault('dir', {}), lambda E: dir_integ_E(E, T_up),
+                                               E_tot[keep[:,mus]])
+            J = (prefac_dir1 * I1 * gs_fin_mu[mus]
+                 + np.einsum('eml,lm->em', res_tensor(E_tot, keep[:,mus], mus, T_up), C_res[:,mus]))
+            sum_square = sum_square + np.sum(np.absolute(J)**2 * dos_mu[mus], axis=1)
+        return sum_square
+
+
+    # for wavepacket in resonance state(s)
+    wp_prefs = [(1.j/(n_res_max+1) * rdg_au * gs_res[0][nlambda] \
+                   + mp.pi/(n_res_max+1) * VEr_au * cdg_au_V * indir_FCsums[nlambda])
+                for nlambda in range(n_res_max+1)]
+
+
+    ########################################
+    # now follow the integrals themselves, for the temporal phases:
+    # 'during the first pulse' (-TX/2, TX/2)
+    # 'between the pulses' (TX/2, tmax)
+    # all time steps are independent of each other: time_step(t) returns the spectrum and the wavepacket lines for t,
+    # so that the time steps can be distributed over a pool of processes (-w/--workers) and written in order
+
+    def time_step(t):
+        nonlocal t_au, E_kin_au, E_fin_au, E_lambda, W_au   # used by the integrand lambdas above
+        step_start = time.perf_counter()
+        step_evals.clear()
+        tot_caches.clear()
+        t_au = t
+        T_up = t_au if (t_au <= TX_au/2) else TX_au/2        # upper limit of the XUV integrals: during the pulse t, afterwards the whole pulse
+
+        squares = np.array([])  # signal intensity ( = |amplitude|**2 = |J|**2 ) for all E_kin in Ekins_au
+        E_kin_au = E_min_au
+
+        # channels (E_kin, mu) to be calculated (-s/--screen, for the time steps integrated per channel)
+        keep = np.ones(E_tot_grid.shape, dtype=bool)
+        if screen_tol and not (wavepac_only or cumulative or (incremental and (t_au > TX_au/2)) or integ_outer == "spectral"):
+            keep = screen_mask(t_au, T_up)
+            step_evals['screened'] = int(keep.size - np.count_nonzero(keep))
+
+        cnt = 0     # initialize counter for printing progress
+        if not wavepac_only and cumulative:
+            squares = cumulative_squares(t_au)
+        elif not wavepac_only and incremental and (t_au > TX_au/2):
+            squares = phase_squares(t_au, B_dir_post, B_res_post)
+        elif not wavepac_only and (integ_outer == "spectral"):
+            squares = phase_squares(t_au, *all_pulse_integrals((-TX_au/2), T_up))
+        elif not wavepac_only and batch_Ekin:
+            squares = Ekin_squares(T_up, keep)
+        elif not wavepac_only:
+            while (E_kin_au <= E_max_au):
+                if (n_workers == 1):    # progress of parallel time steps would only be garbled
+                    if (cnt == 4):  # print progress: for each E_kin one '-', but for every fifth one '|' instead
+                        print('|', end = '', flush = True)
+                        cnt = 0
+                    else:
+                        print('-', end = '', flush = True)
+                        cnt = cnt + 1
+                #print(f'{sciconv.hartree_to_ev(E_kin_au):.2} eV')           #?
+                #outfile.write(f'{sciconv.hartree_to_ev(E_kin_au):.2} eV\n') #?
+                p_au = np.sqrt(2*E_kin_au)
+                sum_square = 0      # Total spectrum |J @ E_kin|**2 = sum_mu |J_mu @ E_kin|**2  (sum of contributions of all final states with E_kin); for continuous mu: int ~ sum
+                if t_au==-TX_au/2:
+                    squares = np.append(squares, 0.)
+                    E_kin_au = E_kin_au + E_step_au
+                    continue
+
+                for nmu in range (0, n_fin_max + 1):           # loop over all mu, calculate J_mu = J_dir,mu + J_nondir,mu
+                    if not keep[len(squares), nmu]:         # screened out (-s/--screen)
+                        continue
+                    E_fin_au = E_fin_au_1 + E_mus[nmu]      # E_fin_au_1: inputted electronic E_fin_au, E_mus: vibrational eigenvalues of fin state
+                    if E_tol_au:                            # E_kin + E_fin rounded (-e/--E_tol)
+                        E_fin_au = E_tot_rounded(E_kin_au + E_fin_au) - E_kin_au
+            #            Er_au = Er_a_au
+
+                    # Direct term
+                    I1 = cached_integ(tot_caches.setdefault('dir', {}),
+                                      lambda E: [outer_integ(profiling.counted(step_evals, 'dir', fun_t_dir_1), (-TX_au/2), T_up)],
+                                      E_kin_au + E_fin_au)
+                    dir_J1 = prefac_dir1 * I1 * gs_fin[0][nmu]          # FC = <mu_n|kappa_0>
+
+                    # J_nondir,mu = sum_lambda J_nondir,mu,lambda = sum_lambda (J_res,mu,lambda + J_indir,mu,lambda) = sum_lambda res_I C_res
+                    res_Is = np.zeros(n_res_max+1, dtype=complex)
+                    for nlambda in range (0,n_res_max+1):
+                        if (nmu >= n_mu_lambda[nlambda]):   # J_nondir,mu,lambda = 0 if repulsive |fin>|mu> lies higher than |res>|lambda>
+                            continue
+                        E_lambda = E_lambdas[nlambda]
+                        W_au = W_lambda[nlambda]
+                        res_Is[nlambda] = cached_integ(tot_caches.setdefault(nlambda, {}),
+                                                       lambda E: [outer_integ(profiling.counted(step_evals, 'res', res_outer_fun), (-TX_au/2), T_up)],
+                                                       E_kin_au + E_fin_au)
+                    J = np.dot(res_Is, C_res[:,nmu])
+
+                    # Total trs prob (@E_kin, t) = sum_mu |J_mu|**2
+                    # For cont rep fin: int (dE_mu |J_mu|**2 E-DOS(E_mu)) = int (dR_mu |J_mu|**2 R-DOS(R_mu))
+                    #   R-DOS = E-DOS * Va / R_mu**2 = E-DOS * E_mu**2 / Va. If E-DOS = 1 & R_hyp_step = const: int (dR_mu |J_mu|**2 R-DOS) ~ sum_mu (R_hyp_step |J_mu|**2 E_mu**2 / Va)
+                    square = np.absolute(J + dir_J1)**2     # |J_mu|**2
+                    if (fin_pot_type in ('hyperbel','hypfree')):
+                        factor = R_hyp_steps[nmu] * E_mus[nmu]**2 / fin_hyp_a
+                        old_square = square
+                        square = square * factor
+                    sum_square = sum_square + square        # |J|**2 = sum_mu |J_mu|**2
+                    #print(f'nmu = {nmu:>3}  f = {factor:.5f}  osq = {old_square:.5E}  sq = {square:.5E}  sum = {sum_square:.5E}')
+                    #outfile.write(f'nmu = {nmu:>3}  f = {factor:.5f}  osq = {old_square:.5E}  sq = {square:.5E}  sum = {sum_square:.5E}\n')
+
+                squares = np.append(squares, sum_square)
+
+                E_kin_au = E_kin_au + E_step_au     # @ t = const.
+
+        # wavepacket in resonance state(s) (closed form for the Gaussian pulse only, NaN otherwise)
+        wp_ampls = np.full(n_res_max+1, np.nan, dtype=complex)
+        for nlambda in (range (0,n_res_max+1) if X_gauss else []):
+            E_lambda = E_lambdas[nlambda]
+            W_au = W_lambda[nlambda]
+            wp_I = wp_res_int(t_au,T_up)
+            wp_pref = wp_prefs[nlambda]
+            wp_ampls[nlambda] = complex(wp_pref * wp_I)
+            step_evals['wp_res'] = step_evals.get('wp_res', 0) + 1
+
+        # start and duration of the step and its integrand evaluations, for the profile (also from pool workers)
+        return squares, wp_ampls, (step_start, time.perf_counter() - step_start, dict(step_evals))
+
+
+    # list of time points (same accumulation of timestep_au as in a running loop)
+    t_aus = []
+    while (t_au <= tmax_au):
+        t_aus.append(t_au)
+        t_au = t_au + timestep_au
+
+    #-------------------------------------------------------------------------
+    # incremental mode for the time steps after the pulse (-i/--incremental):
+    # for t > TX/2 the outer integrals run over the whole pulse and t only enters through phase factors,
+    #   int dt1 FX(t1) exp(i E_tot (t1-t))                   = exp(-i E_tot t) B(E_tot)
+    #   int dt1 FX(t1) exp(t1 (pi W + i E_res)) res_inner(t1) = exp(-i E_tot t) / D * (exp(t D) B(E_res - i pi W) - B(E_tot))
+    # with B(kappa) = int_-TX/2^TX/2 dt1 FX(t1) exp(i kappa t1), D = i (E_tot - E_res) - pi W, E_tot = E_kin + E_fin + E_mu,
+    # so that the pulse integrals B are calculated once and every later time step is an array operation
+    # cumulative mode (-C/--cumulative): the same holds during the pulse with B(kappa) = int_-TX/2^t dt1 ...,
+    # so that B is kept as a running sum to which every time step adds only the slab (t_prev, t)
+    # spectral outer integration (integ_outer = spectral): every time step uses the same formula, with B on the
+    # whole E_kin axis from one chirp-z transform per mu of the pulse envelopes sampled once
+    def pulse_integrals(kappas, a, b):
+        if (integ_outer == "analytic"):
+            return profiling.counted(step_evals, 'pulse', gai.FX_fourier)(kappas, a, b, A0X, Omega_au, sigma)
+        elif batch_Ekin:
+            return outer_integ(profiling.counted(step_evals, 'pulse', lambda t1: FX_t1(t1) * np.exp(1j * kappas[:,None] * t1)),
+                               a, b)
+        else:
+            return np.array([outer_integ(profiling.counted(step_evals, 'pulse', lambda t1: FX_t1(t1) * np.exp(1j * kappa * t1)),
+                                         a, b)
+                             for kappa in kappas])
+
+    def spectral_pulse_integrals(a, b):
+        t1 = np.linspace(a, b, spectral_nodes(a, b) + 1)
+        B_dir = np.zeros(E_tot_grid.shape, dtype=complex)
+        B_res = np.zeros(n_res_max+1, dtype=complex)
+        for sign in (1, -1):    # exp(i (E_tot +- Omega) t1) with the envelope FX_env[+-1]
+            g = profiling.counted(step_evals, 'pulse', FX_env[sign])(t1)
+            for nmu in range (0, n_fin_max + 1):
+                B_dir[:,nmu] += ci.filon_fourier_grid(g, a, b, Ekins_au[0] + E_fin_au_1 + E_mus[nmu] + sign * Omega_au,
+                                                      E_step_au, len(Ekins_au))
+            B_res += ci.filon_fourier(g, a, b, kappa_res + sign * Omega_au)
+        return B_dir, B_res
+
+    def all_pulse_integrals(a, b):  # B over (a, b) for all (E_kin, mu) and all lambda
+        if (integ_outer == "spectral"):
+            return spectral_pulse_integrals(a, b)
+        # in chunks of mu as in Ekin_squares, the integrands of a batch are (kappas x nodes) arrays
+        B_dir = np.zeros(E_tot_grid.shape, dtype=complex)
+        cache = {}
+        n_nodes = (ci.nodes_for_bandwidth(omega_max_au, a, b) if batch_Ekin and not (integ_outer == "analytic") else 1)
+        for mus in mu_chunks(len(Ekins_au) * n_nodes):
+            B_dir[:,mus] = cached_integ(cache, lambda E: pulse_integrals(E, a, b), E_tot_grid[:,mus])
+        return B_dir, pulse_integrals(kappa_res, a, b)
+
+    def phase_squares(t, B_dir, B_res):     # same as the E_kin loop / Ekin_squares(T_up) for the pulse integrals B up to T_up
+        sum_square = np.zeros(len(Ekins_au))
+        for mus in mu_chunks(len(Ekins_au) * (n_res_max+1)):
+            E_tot = E_tot_grid[:,mus]
+            D = 1j * (E_tot[:,:,None] - E_res_lambda) - np.pi * np.array(W_lambda)     # (E_kin x mu x lambda)
+            J = (prefac_dir1 * B_dir[:,mus] * gs_fin_mu[mus]
+                 + np.einsum('eml,lm->em', (np.exp(t * D) * B_res - B_dir[:,mus,None]) / D, C_res[:,mus]))
+            sum_square = sum_square + np.sum(np.absolute(np.exp(-1j * E_tot * t) * J)**2 * dos_mu[mus], axis=1)
+        return sum_square
+
+    def cumulative_squares(t):  # the time steps have to come in order
+        T_up = t if (t <= TX_au/2) else TX_au/2
+        if (T_up > B_cum['t']):
+            B_dir, B_res = all_pulse_integrals(B_cum['t'], T_up)
+            B_cum['dir'] = B_cum['dir'] + B_dir
+            B_cum['res'] = B_cum['res'] + B_res
+            B_cum['t'] = T_up
+        return phase_squares(t, B_cum['dir'], B_cum['res'])
+
+    if (incremental or cumulative or integ_outer == "spectral") and not wavepac_only:
+        if not (integ == 'analytic'):
+            raise ValueError('!!! The incremental and cumulative modes and the spectral outer integration require the analytic inner integral. Programme terminated.')
+        if cumulative and (n_workers > 1):
+            raise ValueError('!!! The cumulative mode needs the time steps in order and cannot be distributed over processes. Programme terminated.')
+        if cumulative:
+            B_cum = {'t': -TX_au/2,                                     # upper limit of the running pulse integrals
+                     'dir': np.zeros(E_tot_grid.shape, dtype=complex),
+                     'res': np.zeros(n_res_max+1, dtype=complex)}
+            print('Cumulative mode: pulse integrals are accumulated over the time steps')
+            outfile.write('Cumulative mode: pulse integrals are accumulated over the time steps\n')
+        elif (t_aus[-1] > TX_au/2):
+            step_evals.clear()
+            B_dir_post, B_res_post = all_pulse_integrals((-TX_au/2), TX_au/2)
+            profile.add_evals(step_evals)
+            print('Incremental mode: pulse integrals for the time steps after the pulse are calculated once')
+            outfile.write('Incremental mode: pulse integrals for the time steps after the pulse are calculated once\n')
+    if screen_tol and not wavepac_only and (cumulative or integ_outer == "spectral"):
+        print('The cumulative mode and the spectral outer integration ignore -s/--screen')
+        outfile.write('The cumulative mode and the spectral outer integration ignore -s/--screen\n')
+    elif screen_tol and not wavepac_only:
+        print('Channels (E_kin, mu) with an estimated |J_mu|**2 below {:.3E} of the largest one are skipped'.format(screen_tol))
+        outfile.write('Channels (E_kin, mu) with an estimated |J_mu|**2 below {:.3E} of the largest one are skipped\n'.format(screen_tol))
+    if (n_workers > 1):
+        print('Time steps are distributed over {:d} processes'.format(n_workers))
+        outfile.write('Time steps are distributed over {:d} processes\n'.format(n_workers))
+    if on_start:
+        on_start(np.array(Ekins_au), np.array(t_aus))
+    if (n_workers > 1):
+        outfile.flush()             # the forked workers must not inherit unwritten buffers
+        sys.stdout.flush()
+        pool = multiprocessing.get_context('fork').Pool(n_workers, initializer=init_pool_worker, initargs=(time_step,))
+        steps = pool.imap(run_pool_step, t_aus)     # results arrive in the order of t_aus
+    else:
+        steps = map(time_step, t_aus)
+    profile.lap('prepare')
+
+    spectrum = []
+    wp_res = []
+    n_screened = 0              # number of screened time steps (-s/--screen)
+    #-------------------------------------------------------------------------
+    for n_done, (t_au, (squares, wp_ampls, (step_start, step_time, evals))) in enumerate(zip(t_aus, steps), 1):
+    #-------------------------------------------------------------------------
+        if (t_au <= TX_au/2):
+            outfile.write('during the first pulse \n')
+            print('during the first pulse')
+        else:
+            outfile.write('between the pulses \n')
+            print('between the pulses')
+
+        t_s = sciconv.atu_to_second(t_au)
+        print('t_s = ', t_s)
+        outfile.write('t_s = ' + str(t_s) + '\n')
+
+        if not wavepac_only:
+            print()
+            max_pos = argrelextrema(squares, np.greater)[0]      # finds position of relative (i. e. local) maxima of |J|**2 in an array
+            if (len(max_pos > 0)):                               # if there are such:
+                for i in range (0, len(max_pos)):
+                    print(Ekins[max_pos[i]], squares[max_pos[i]])      # print all loc max & resp E_kin
+                    outfile.write(str(Ekins[max_pos[i]]) + '  ' + str(squares[max_pos[i]]) + '\n')
+            spectrum.append(squares)
+        wp_res.append(wp_ampls)
+        if ('screened' in evals):
+            n_screened = n_screened + 1
+            print('screening skipped {:.1%} of the (E_kin, mu) channels'.format(evals['screened'] / E_tot_grid.size))
+            outfile.write('screening skipped {:.1%} of the (E_kin, mu) channels\n'.format(evals['screened'] / E_tot_grid.size))
+        profile.add('time_step', step_start, step_time, t_s=t_s, evals=evals)     # computing time of the step itself
+        profile.add_evals(evals)
+        profile.lap('time_loop', t_s=t_s)
+        eta = profile.eta(n_done, len(t_aus), ('time_loop', 'output'))
+        print('time step {:d}/{:d} done, ETA {}'.format(n_done, len(t_aus), profiling.format_seconds(eta)))
+        outfile.write('time step {:d}/{:d} done, ETA {}\n'.format(n_done, len(t_aus), profiling.format_seconds(eta)))
+        if on_step:
+            with profile.timer('output', t_s=t_s):
+                on_step(t_au, squares, wp_ampls)
+
+    if (n_workers > 1):
+        pool.close()
+        pool.join()
+
+    print('Wall times of the stages [s]: ' + ', '.join('{} {:.3f}'.format(stage, seconds)
+                                                        for stage, seconds in profile.totals.items()))
+    print('Integrand evaluations: ' + ', '.join('{} {:d}'.format(kind, n) for kind, n in sorted(profile.evals.items())))
+    outfile.write('Wall times of the stages [s]: ' + ', '.join('{} {:.3f}'.format(stage, seconds)
+                                                               for stage, seconds in profile.totals.items()) + '\n')
+    outfile.write('Integrand evaluations: ' + ', '.join('{} {:d}'.format(kind, n)
+                                                        for kind, n in sorted(profile.evals.items())) + '\n')
+    if n_screened:
+        print('Screening skipped {:.1%} of the (E_kin, mu) channels of {:d} time steps'.format(
+            profile.evals['screened'] / (E_tot_grid.size * n_screened), n_screened))
+        outfile.write('Screening skipped {:.1%} of the (E_kin, mu) channels of {:d} time steps\n'.format(
+            profile.evals['screened'] / (E_tot_grid.size * n_screened), n_screened))
+
+    if close_outfile:
+        outfile.close()
+
+    return {'E_kin_au': np.array(Ekins_au),                    # axes of the results
+            't_au': np.array(t_aus),
+            'spectrum': (np.array(spectrum) if not wavepac_only else None),    # |J|**2, time x E_kin
+            'wp_res': np.array(wp_res),                        # resonance-state projections, time x lambda
+            'E_lambdas': np.array(E_lambdas),
+            'W_lambda': np.array(W_lambda),
+            'E_mus': np.array(E_mus),
+            'timings': dict(profile.totals),                   # seconds per stage: setup, fc, W_lambda, prepare, time_loop, output
+                                                               #  (and time_step: computing time of the steps, summed over the workers)
+            'evals': dict(profile.evals)}                      # integrand evaluations per integral type: dir, res, wp_res, pulse
+                                                               #  (and shared: integrals reused for equal E_tot, see -e,
+                                                               #   screened: channels (E_kin, mu) skipped, see -s)
 
-dt_end = datetime.now()
-print('Total runtime:', str(dt_end - dt_start))
-print(str(dt_end))
-outfile.write('\n' + str(dt_end) + '\n')
-outfile.write('Total runtime:' + ' ' + str(dt_end - dt_start))
 
-outfile.close
-pure_out.close
-movie_out.close
-wp_res_out.close
+#-------------------------------------------------------------------------
+# command line interface: input file and options -> eldest.out, full.dat, movie.dat, wp_res.dat
+def main():
+    dt_start = datetime.now()
+
+    # set logging outfile
+    outfile = open("eldest.out", mode='w')
+
+    # don't print warnings unless python -W ... is used
+    if not sys.warnoptions:
+        warnings.simplefilter("ignore")
+
+    parser = argparse.ArgumentParser(
+            description='''ELDEST -- nuclear_dyn.py :
+            A programme to simulate the time-resolved RICD spectroscopy
+            including quantum nuclear dynamics.
+            The Franck-Condon overlaps are calculated as chosen by fc_method in the input file:
+            grid tabulates all states on a common R grid, the hyperbolic continuum states
+            (fin_pot_type = hyperbel) from the double-precision Coulomb function wellenfkt.coulomb_f0;
+            mpmath (the default) integrates every overlap adaptively and for hyperbolic final states
+            calls mpmath.coulombf at every quadrature node, which takes hours for large continua.''',
+            epilog='Originally written by Elke Fasshauer, extended by Alexander V. Riegel.')
+    parser.add_argument('infile', help='Input file for simulation, probably photonucl.in')
+    parser.add_argument('-f', '--fc', help='''Optional file with pre-calculated "Franck-Condon overlap integrals"
+                        (which may or may not include weighting functions inside the integrand)
+                        that include the repulsive-potential final state(s).
+                        This option does not work for a Morse-potential final state.
+                        The file is thought to be a reduced copy of eldest.out from a previous calculation:
+                        It may start with an arbitrary number of lines (including zero) preceding the gs-fin FC integrals
+                        provided that their first word is not numeric.
+                        Then the gs-fin integrals shall follow, with the first word indicating the gs quantum number
+                        and the last word being the integral value.
+                        At least one line beginning with a non-numeric word
+                        then separates the gs-fin integrals from the res-fin integrals.
+                        These shall have the structure as described for the gs-fin integrals.
+                        There shall be no dividing line between different res quantum numbers.
+                        The first line not beginning with a numeric word then indicates the endpoint for the read-in routine;
+                        all lines thereafter will be ignored, regardless of their first word.
+                        The gs-res integrals shall not be present and will in every case be directly calulated.
+                        +++ This option is incompatible with the -g/--gamma option.''')
+    parser.add_argument('-g', '--gamma', help='''Optional binary file containing the functional dependence
+                        of the decay width Gamma on the internuclear distance R.
+                        The information can be stored as a univariate function or an SciPy interpolator.
+                        Permissible are, besides user-defined functions, all "np.foo" and "scipy.foo",
+                        with full tree beginning at the module, e.g. "np.sqrt";
+                        "myfunc" defined as def myfunc(x): return np.polynomial.hermite.Hermite((2,0,8))(x);
+                        "scipy.interpolate.PchipInterpolator(xarray,yarray)".
+                        The file shall be binary and contain the functional dependence in a pickled form (preferably by dill).
+                        +++ This option is incompatible with the -f/--fc option.''')
+    #parser.add_argument('-p', '--partial', help='''If 'prefactor' or 'pre' is chosen, then the Gamma(R) dependence is incorporated
+    #                    only into the overlap integrals in the prefactors for the transition amplitude
+    #                    but not in W_lambda in the exponents. If 'exponent' or 'exp' or 'Wl' is chosen, the reverse is true.
+    #                    If none is given, the Gamma(R) dependence is incorporated in all relevant places (default).''')
+    parser.add_argument('-F', '--FC', help='''Same as '-f' and '--fc', but for an additional set with overlap integrals
+                        without Gamma(R) dependence in the res-fin integrals. The file structure is the same as before.
+                        +++ This option is only available if partial_GamR is not None.''')
+    #                    +++ This option is only available in combination with the -p/--partial option.''')
+    parser.add_argument('-c', '--cache', help='''Directory of the persistent cache for calculated Franck-Condon
+                        overlap integrals (default: no cache). Overlaps are stored under a hash of all parameters they
+                        depend on and of the format version of the cache, and are reused by later runs with identical
+                        nuclear parameters.''')
+    parser.add_argument('-n', '--no_cache', action='store_true', help='''If this flag is given, the Franck-Condon overlap integrals
+                        are neither read from nor written to the cache, even if -c is given.''')
+    parser.add_argument('-w', '--workers', type=int, default=1, help='''Number of processes over which the time steps
+                        are distributed (default: 1). The output files are written in time order as usual.''')
+    parser.add_argument('-b', '--binary', action='store_true', help='''If this flag is given, the spectrum is written as a
+                        (time x E_kin) array into full.npy (axes in full.json) instead of the text files full.dat and movie.dat.
+                        The text files can be regenerated with bin2dat.py.''')
+    parser.add_argument('-i', '--incremental', action='store_true', help='''If this flag is given, the time integrals over the
+                        XUV pulse are calculated only once for all time steps after the pulse, which are then obtained
+                        by multiplying them with the time-dependent phase factors (only with the analytic inner integral).''')
+    parser.add_argument('-C', '--cumulative', action='store_true', help='''If this flag is given, the time integrals over the
+                        XUV pulse are kept as running sums, to which every time step during the pulse adds only the interval
+                        since the previous one; after the pulse they are used as with -i (only with the analytic inner integral,
+                        not with -w).''')
+    parser.add_argument('-r', '--refine', type=int, default=0, help='''Maximum number of bisections of the R_start step (fin_c)
+                        of the discretized continuum of a repulsive final state (default: 0, constant steps). A step is bisected
+                        where the FC overlaps at its two ends differ by more than REFINE_TOL times the largest overlap.''')
+    parser.add_argument('--refine_tol', type=float, default=0.05, help='''Tolerance for the bisection of R_start steps
+                        (see -r/--refine, default: 0.05).''')
+    parser.add_argument('-e', '--E_tol', type=float, default=0., help='''Tolerance in eV to which the total energies
+                        E_kin + E_fin + E_mu are rounded, so that the time integrals of equal total energies are calculated
+                        only once per time step and shared by all (E_kin, mu) (default: 0, no rounding and sharing).''')
+    parser.add_argument('-a', '--align', action='store_true', help='''If this flag is given, E_step_eV is reduced such that
+                        the spacing of the lowest two final vibrational states is a multiple of it, so that with -e the
+                        integrals are shared between neighbouring final states (Morse final states only).''')
+    parser.add_argument('-s', '--screen', type=float, default=0., help='''Relative tolerance for the screening of the
+                        channels (E_kin, mu): the integrals of a channel are skipped if an upper estimate of its |J_mu|**2 from
+                        the spectrum of the XUV pulse and the Lorentzian widths of the resonance states lies below SCREEN times
+                        the largest one (default: 0, no screening; ignored with -C and the spectral outer integration).''')
+    parser.add_argument('-t', '--trace', choices=('json', 'csv', 'none'), default='json', help='''Format of the trace
+                        eldest_trace.json or eldest_trace.csv with the wall times of the stages and of every time step
+                        and the numbers of integrand evaluations per integral type (default: json; none: no trace).''')
+    #parser.add_argument('-w', '--wavepacket_only', action='store_true', help='''If this flag is given, only the projection
+    #                    onto the vibrational states of the electronic resonance state (needed to reconstruct
+    #                    the wavepacket in the resonance state) will be calculated, whereas the calculation of the projections
+    #                    onto the final state (needed for the spectrum) will be skipped. Also, progress will be written
+    #                    to eldest.out as usual, but existing full.dat and movie.dat files will not be altered.''')
+    args = parser.parse_args()
+
+    print(str(dt_start))
+    outfile.write(str(dt_start) + '\n')
+    outfile.write('Tempora mutantur, nos et mutamur in illis.')
+    outfile.write("The results were obtained with nuclear_dyn.py \n")
+
+    infile = args.infile
+    print(infile)
+    config = in_out.parse_input(infile, outfile)
+
+    # open further outputfiles
+    wavepac_only = config.wavepac_only
+    pure_out = open('full.dat' if not (wavepac_only or args.binary) else devnull, mode='w')
+    movie_out = open('movie.dat' if not (wavepac_only or args.binary) else devnull, mode='w')
+    #popfile = open("pop.dat", mode='w')
+    wp_res_out = open('wp_res.dat', mode='w')
+    run = {}        # E_kin axis and binary output, set by on_start
+    profile = profiling.Profile()
+
+    def on_start(Ekins_au, t_aus):
+        run['Ekins_au'] = Ekins_au
+        if (args.binary and not wavepac_only):
+            run['full_bin'], run['full_header'] = in_out.open_binary('full', Ekins_au, t_aus)
+        for out in (outfile, pure_out, movie_out, wp_res_out):  # the forked workers must not inherit unwritten buffers
+            out.flush()
+
+    def on_step(t_au, squares, wp_ampls):
+        t_s = sciconv.atu_to_second(t_au)
+        movie_out.write('"' + format(t_s*1E15, '.3f') + ' fs' + '"' + '\n')
+        if not wavepac_only and args.binary:
+            in_out.doout_binary('full', run['full_bin'], run['full_header'], squares)
+        elif not wavepac_only:
+            outlines = [in_out.prep_output(sum_square, E_kin_au, t_au)     # returns str: E_kin_eV, t_s, sum_square = intensity
+                        for sum_square, E_kin_au in zip(squares, run['Ekins_au'])]
+            in_out.doout_1f(pure_out, outlines)     # writes each (E_kin, t = const, |J|**2) triple in a sep line into output file
+            in_out.doout_movie(movie_out, outlines)
+        wp_lines = [format(nlambda, 'd') + '   ' + format(t_s, ' .18f') + '   ' + format(complex(wp_ampl), ' .15e')
+                    for nlambda, wp_ampl in enumerate(wp_ampls)]
+        in_out.doout_1f(wp_res_out, wp_lines)
+
+    try:
+        simulate(config, fc_infile=args.fc, FC_infile=args.FC, gamma_infile=args.gamma,
+                 cache_dir=(None if args.no_cache else args.cache),
+                 workers=args.workers, incremental=args.incremental, cumulative=args.cumulative,
+                 refine=args.refine, refine_tol=args.refine_tol, E_tol=args.E_tol, align=args.align,
+                 screen_tol=args.screen, outfile=outfile, on_start=on_start, on_step=on_step, profile=profile)
+    except ValueError as err:       # inconsistent input or options
+        if not str(err).startswith('!!!'):
+            raise
+        for out in (outfile, pure_out, movie_out, wp_res_out):
+            out.close()
+        sys.exit(str(err))
+
+    if (args.binary and not wavepac_only):
+        in_out.close_binary('full', run['full_bin'], run['full_header'])
+
+    print('In order to process the wavepacket results, consider running res_wavepacket.py')
+
+    dt_end = datetime.now()
+    if (args.trace == 'json'):
+        profile.write_json('eldest_trace.json', infile=infile, start=str(dt_start), end=str(dt_end),
+                           workers=args.workers, integ_outer=config.integ_outer)
+    elif (args.trace == 'csv'):
+        profile.write_csv('eldest_trace.csv')
+    print('Total runtime:', str(dt_end - dt_start))
+    print(str(dt_end))
+    outfile.write('\n' + str(dt_end) + '\n')
+    outfile.write('Total runtime:' + ' ' + str(dt_end - dt_start))
+
+    for out in (outfile, pure_out, movie_out, wp_res_out):
+        out.close()
+
+
+if __name__ == '__main__':
+    main()
@@ -10,6 +10,8 @@
 ##########################################################################
 
 import scipy.constants as constants
+from collections import OrderedDict
+import hashlib
 import numpy as np
 import sciconv as sc
 #-------------------------------------------------------------------------
@@ -35,7 +37,91 @@ def gammar6(a,r_au):
     Gamma_au = a / r_au**6
     Vr_au = np.sqrt(Gamma_au / 2 / np.pi)
     return Vr_au
-    
+
+#-------------------------------------------------------------------------
+#   analytic derivatives dV/dR in atomic units (R in bohr)
+def expr6_grad(a,b,c,d,r_au):
+    r = sc.bohr_to_angstrom(r_au)
+    dV = -a*b* np.exp(-b*r) - 6 * c / r**7
+    dV_au = sc.ev_to_hartree(dV) * sc.bohr_to_angstrom(1.0)
+    return dV_au
+
+def hyperbel_grad(a,b,r_au):
+    r = sc.bohr_to_angstrom(r_au)
+    dV = - a / r**2
+    dV_au = sc.ev_to_hartree(dV) * sc.bohr_to_angstrom(1.0)
+    return dV_au
+
+def gammar6_grad(a,r_au):
+    dVr_au = -3 * gammar6(a,r_au) / r_au
+    return dVr_au
+
+
+#-------------------------------------------------------------------------
+#   potential curves: the units are converted once at construction,
+#   curve(R) and curve.grad(R) take whole arrays of R in bohr (a curve can
+#   be passed on as V_of_R), curve.tabulate(R_grid) returns (V, V') on a
+#   grid from a cache shared by all equal curves
+eV_au = sc.ev_to_hartree(1.0)
+AA_au = sc.bohr_to_angstrom(1.0)
+
+# least recently used tabulations: (curve key, grid) -> read-only (V, V')
+tabulations = OrderedDict()
+max_tabulations = 32
+
+class Curve(object):
+    # subclasses set self.key (name and parameters) and define __call__ and grad
+    def tabulate(self, R_grid):
+        R_grid = np.ascontiguousarray(R_grid, dtype=float)
+        key = (self.key, R_grid.shape, hashlib.sha1(R_grid.tobytes()).hexdigest())
+        if key in tabulations:
+            tab = tabulations.pop(key)
+        else:
+            tab = (np.array(self(R_grid), dtype=float), np.array(self.grad(R_grid), dtype=float))
+            for arr in tab:
+                arr.setflags(write=False)
+            if (len(tabulations) >= max_tabulations):
+                tabulations.popitem(last=False)
+        tabulations[key] = tab
+        return tab
+
+class Expr6Curve(Curve):
+    # expr6(a,b,c,d,R)
+    def __init__(self,a,b,c,d):
+        self.key = ('expr6',a,b,c,d)
+        self.a, self.b = a * eV_au, b * AA_au
+        self.c, self.d = c * eV_au / AA_au**6, d * eV_au
+
+    def __call__(self,r_au):
+        return self.a * np.exp(-self.b * r_au) + self.c / r_au**6 + self.d
+
+    def grad(self,r_au):
+        return -self.a * self.b * np.exp(-self.b * r_au) - 6 * self.c / r_au**7
+
+class HyperbelCurve(Curve):
+    # hyperbel(a,b,R)
+    def __init__(self,a,b):
+        self.key = ('hyperbel',a,b)
+        self.a, self.b = a * eV_au / AA_au, b * eV_au
+
+    def __call__(self,r_au):
+        return self.a / r_au + self.b
+
+    def grad(self,r_au):
+        return - self.a / r_au**2
+
+class Gammar6Curve(Curve):
+    # gammar6(a,R) = sqrt(Gamma(R) / 2 pi)
+    def __init__(self,a):
+        self.key = ('gammar6',a)
+        self.a = np.sqrt(a / 2 / np.pi)
+
+    def __call__(self,r_au):
+        return self.a / r_au**3
+
+    def grad(self,r_au):
+        return -3 * self.a / r_au**4
+
 
 ##-------------------------------------------------------------------------
 ##      Distances, Areas, Volume
@@ -0,0 +1,94 @@
+##########################################################################
+#                          STAGE PROFILING                               #
+##########################################################################
+# Purpose:                                                               #
+#          - Lightweight instrumentation of nuclear_dyn.simulate:        #
+#            wall times of the stages (setup, FC overlaps, W_lambda,     #
+#            time steps, output), numbers of integrand evaluations per   #
+#            integral type and an ETA for the remaining time steps.      #
+#          - The trace is written as JSON or CSV next to eldest.out.     #
+#                                                                        #
+##########################################################################
+
+from contextlib import contextmanager
+import csv
+import json
+import numpy as np
+import time
+
+#-------------------------------------------------------------------------
+def counted(evals, kind, func):
+    # func, but every call adds the number of values it returns to evals[kind]
+    # (for vectorized integrands and closed-form integrals: one per node / E_kin / ...)
+    def counting_func(*args):
+        result = func(*args)
+        evals[kind] = evals.get(kind, 0) + np.size(result)
+        return result
+    return counting_func
+
+def format_seconds(seconds):
+    seconds = int(round(seconds))
+    return '{:d}:{:02d}:{:02d}'.format(seconds // 3600, seconds // 60 % 60, seconds % 60)
+
+
+#-------------------------------------------------------------------------
+class Profile:
+    # Stage times are kept in two ways:
+    #   lap(stage) adds the time since the end of the previous stage (for the long sections of simulate),
+    #   with timer(stage): ... adds the time of the block.
+    # Every stage also leaves an event (stage, start, duration, info) in the trace.
+    def __init__(self):
+        self.t0 = time.perf_counter()
+        self.last = self.t0
+        self.totals = {}    # stage -> seconds
+        self.evals = {}     # integral type -> number of integrand evaluations
+        self.events = []
+
+    def add(self, stage, start, duration, **info):
+        self.totals[stage] = self.totals.get(stage, 0.) + duration
+        self.events.append(dict(stage=stage, start=start - self.t0, duration=duration, **info))
+
+    def lap(self, stage, **info):
+        now = time.perf_counter()
+        self.add(stage, self.last, now - self.last, **info)
+        self.last = now
+
+    @contextmanager
+    def timer(self, stage, **info):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.last = time.perf_counter()
+            self.add(stage, start, self.last - start, **info)
+
+    def add_evals(self, evals):
+        for kind, n in evals.items():
+            self.evals[kind] = self.evals.get(kind, 0) + n
+
+    def eta(self, done, total, stages):
+        # remaining time of total steps, of which done are finished, from the mean time per step in stages so far
+        # (during the pulse the steps get more expensive with t, so this is a lower bound there)
+        if (done == 0):
+            return None
+        return sum(self.totals.get(stage, 0.) for stage in stages) / done * (total - done)
+
+    #---------------------------------------------------------------------
+    def write_json(self, path, **meta):
+        with open(path, 'w') as f:
+            json.dump(dict(meta, totals=self.totals, evals=self.evals, events=self.events),
+                      f, indent=1, default=float)
+
+    def write_csv(self, path):
+        # one row per event; the integrand evaluations of the time steps in one column per integral type
+        kinds = sorted(self.evals)
+        infos = sorted(set(key for event in self.events for key in event
+                           if key not in ('stage', 'start', 'duration', 'evals')))
+        with open(path, 'w', newline='') as f:
+            writer = csv.writer(f)
+            writer.writerow(['stage', 'start_s', 'duration_s'] + infos + ['evals_' + kind for kind in kinds])
+            for event in self.events:
+                evals = event.get('evals', {})
+                writer.writerow([event['stage'], '{:.6f}'.format(event['start']), '{:.6f}'.format(event['duration'])]
+                                + [event.get(key, '') for key in infos]
+                                + [evals.get(kind, '') for kind in kinds])
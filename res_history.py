@@ -0,0 +1,83 @@
+##########################################################################
+#                  RESONANCE HISTORY OF TIME SLICES                      #
+##########################################################################
+# Purpose:                                                               #
+#          - Replaces the growing list res_tuples of measure_tmin.py and #
+#            measure_interfere.py, in which every past time slice n      #
+#            and E_kin stored (n, resstate1, resstate2, T_K + E_fin).    #
+#          - At time t every slice contributes                           #
+#              (resstate1 Ires - resstate2 Ires)                         #
+#                * exp(-i t (E_kin + T_K + E_fin)),                      #
+#            (slice n = 1 with I1 instead of Ires in the second term),   #
+#            so all slices with the same T_K + E_fin share the phase     #
+#            factor and are carried forward as one running sum per      #
+#            E_kin. As long as the nuclei do not move this is a single   #
+#            O(N_E) array; while they move, every step is a group of     #
+#            its own and the groups are summed vectorized.               #
+#          - Slices can be added up coherently (into J) or               #
+#            incoherently (sum of |new_part + dir_J1|**2).               #
+#          - Works with python 2 and 3 (used by the legacy scripts).     #
+#                                                                        #
+##########################################################################
+
+import numpy as np
+
+#-------------------------------------------------------------------------
+def new_history(n_E):
+    return {'n_E': n_E,
+            'n_groups': 0,
+            'e3': np.zeros(4),                  # T_K + E_fin of the group
+            'coherent': np.zeros(4, dtype=bool),
+            'count': np.zeros(4),               # number of slices in the group
+            'W': np.zeros((4, n_E), dtype=complex),     # sum of (resstate1 - resstate2)
+            'Q': np.zeros((4, n_E)),                    # sum of |resstate1 - resstate2|**2
+            'n_last': None,
+            'first': None}                      # slice n = 1: (e3, coherent, resstate1, resstate2)
+
+def open_group(hist, e3, coherent):
+    g = hist['n_groups']
+    if (g > 0 and hist['e3'][g-1] == e3 and hist['coherent'][g-1] == coherent):
+        return
+    if (g == len(hist['e3'])):          # grow the arrays by doubling
+        for key in ('e3', 'coherent', 'count', 'W', 'Q'):
+            hist[key] = np.concatenate((hist[key], np.zeros_like(hist[key])))
+    hist['e3'][g] = e3
+    hist['coherent'][g] = coherent
+    hist['n_groups'] = g + 1
+
+def add_slice(hist, n, E_index, resstate1, resstate2, e3, coherent=True):
+    # replaces res_tuples.append(tuple((n,resstate1, resstate2, e3)))
+    if (n == 1):
+        if hist['first'] is None:
+            hist['first'] = (e3, coherent, np.zeros(hist['n_E'], dtype=complex),
+                             np.zeros(hist['n_E'], dtype=complex))
+        hist['first'][2][E_index] = resstate1
+        hist['first'][3][E_index] = resstate2
+        return
+    if (n != hist['n_last']):
+        open_group(hist, e3, coherent)
+        hist['count'][hist['n_groups']-1] += 1
+        hist['n_last'] = n
+    g = hist['n_groups'] - 1
+    w = resstate1 - resstate2
+    hist['W'][g, E_index] += w
+    hist['Q'][g, E_index] += np.absolute(w)**2
+
+def contributions(hist, E_index, t_au, E_kin_au, Ires, I1, dir_J1):
+    # returns (sum of the coherent new_parts, sum of |new_part + dir_J1|**2 of the incoherent ones)
+    g = hist['n_groups']
+    coherent = hist['coherent'][:g]
+    parts = Ires * hist['W'][:g, E_index] * np.exp(-1j * t_au * (E_kin_au + hist['e3'][:g]))
+    J = np.sum(parts[coherent])
+    square = np.sum(np.absolute(Ires)**2 * hist['Q'][:g, E_index][~coherent]
+                    + hist['count'][:g][~coherent] * np.absolute(dir_J1)**2
+                    + 2 * np.real(np.conj(dir_J1) * parts[~coherent]))
+    if hist['first'] is not None:
+        e3, first_coherent, resstate1, resstate2 = hist['first']
+        new_part = ((resstate1[E_index] * Ires - resstate2[E_index] * I1)
+                    * np.exp(-1j * t_au * (E_kin_au + e3)))
+        if first_coherent:
+            J = J + new_part
+        else:
+            square = square + np.absolute(new_part + dir_J1)**2
+    return J, square
@@ -5,7 +5,6 @@
 # Alexander Riegel, 2024/2025.
 
 import argparse
-from contextlib import contextmanager
 import numpy as np
 import pandas as pd
 import os
@@ -21,16 +20,6 @@ warnings.filterwarnings(action='ignore', category=np.exceptions.ComplexWarning)
 import in_out
 import wellenfkt as wf
 
-@contextmanager
-def silence_print():
-    with open(os.devnull, 'w') as dummyout:
-        old_stdout = sys.stdout
-        sys.stdout = dummyout
-        try:
-            yield
-        finally:
-            sys.stdout = old_stdout
-
 #######################################
 # Prepare array with R values
 R_low = 5.8
@@ -66,10 +55,9 @@ if Path(settings).is_file():
 else:
     sys.exit('Input file for simulation and potential settings "%s" does not exist.' % settings)
 
-with open(os.devnull, 'w') as dummyfile, silence_print():
-    (_, _, _, _, _, _, _, _, _, _, _, _, _, _, _, _, _, _, _, _, _, _, _, _, _, _,
-     _, _, _, _, _, _, _, _, _, _, _, _, mass1, mass2, _, _, _, _, _, _, De, alpha, Req, _, _, _, _, _, _
-     ) = in_out.read_input(settings, dummyfile)
+config = in_out.parse_input(settings)
+mass1, mass2 = config.mass1, config.mass2
+De, alpha, Req = config.res_de, config.res_a, config.res_Req
 
 outfile=f'wf_{infile}'
 
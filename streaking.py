@@ -0,0 +1,56 @@
+##########################################################################
+#                     VOLKOV PHASES OF THE IR PULSE                      #
+##########################################################################
+# Purpose:                                                               #
+#          - Closed-form time integrals of the IR vector potential       #
+#            A_IR(t) = A0L sin(pi (t - delta_t + TL/2) / TL)**2          #
+#                          * cos(omega t + phi)                          #
+#            of the streaking scripts, so that the dressing phases       #
+#            int dt3 (p + A_IR(t3))**2 need no inner quadrature.         #
+#          - A_IR is written as a sum of cosines c cos(a t + b), then    #
+#            int A_IR and int A_IR**2 are sums of sines.                 #
+#          - Works with python 2 and 3 (used by the legacy scripts).     #
+#                                                                        #
+##########################################################################
+
+import numpy as np
+
+#-------------------------------------------------------------------------
+#   A_IR as a sum of cosines
+def sinsq_cos_terms(A0L, omega_au, TL_au, delta_t_au, phi):
+    # sin(k u)**2 cos(omega t + phi) with u = t - delta_t + TL/2, k = pi / TL:
+    # = 1/2 cos(omega t + phi) - 1/4 cos((2k + omega) t + 2k (TL/2 - delta_t) + phi)
+    #                          - 1/4 cos((2k - omega) t + 2k (TL/2 - delta_t) - phi)
+    k2 = 2. * np.pi / TL_au
+    shift = k2 * (TL_au / 2. - delta_t_au)
+    return [( A0L / 2., omega_au,      phi),
+            (-A0L / 4., k2 + omega_au, shift + phi),
+            (-A0L / 4., k2 - omega_au, shift - phi)]
+
+def cos_primitive(a, b, t):
+    # int dt cos(a t + b)
+    if (a == 0):
+        return t * np.cos(b)
+    return np.sin(a * t + b) / a
+
+def A_primitives(t, terms):
+    # int dt A_IR(t) and int dt A_IR(t)**2, with cos(x) cos(y) = 1/2 (cos(x+y) + cos(x-y))
+    SA = 0
+    SA2 = 0
+    for (c1, a1, b1) in terms:
+        SA = SA + c1 * cos_primitive(a1, b1, t)
+        for (c2, a2, b2) in terms:
+            SA2 = SA2 + c1 * c2 / 2. * (cos_primitive(a1 + a2, b1 + b2, t)
+                                        + cos_primitive(a1 - a2, b1 - b2, t))
+    return SA, SA2
+
+
+#-------------------------------------------------------------------------
+#   dressing phases
+def volkov_sinsq(p_au, t_a, t_b, A0L, omega_au, TL_au, delta_t_au, phi, shift=0):
+    # int_t_a^t_b dt3 (p + A_IR(t3) - shift)**2, all arguments may be NumPy arrays
+    terms = sinsq_cos_terms(A0L, omega_au, TL_au, delta_t_au, phi)
+    SA_a, SA2_a = A_primitives(t_a, terms)
+    SA_b, SA2_b = A_primitives(t_b, terms)
+    q = p_au - shift
+    return q**2 * (t_b - t_a) + 2 * q * (SA_b - SA_a) + (SA2_b - SA2_a)
@@ -0,0 +1,146 @@
+#!/usr/bin/python
+
+##########################################################################
+#                                    ELDEST                              #
+#        Investigating Electronic Decay Processes with Streaking         #
+##########################################################################
+# Purpose:                                                               #
+#          - Parameter sweep driver for nuclear_dyn.py: runs all         #
+#            combinations of values of some input parameters of a base   #
+#            input file (e.g. delta_t_s, I_X, n_X, tau_s, Omega_eV),     #
+#            each in its own directory, over a pool of processes.        #
+#          - The Franck-Condon overlaps are computed once and shared by  #
+#            all sweep points with the same nuclear parameters through   #
+#            the common FC cache (-c of nuclear_dyn.py), together with   #
+#            the continuum energies E_mu of hyperbel/hypfree states.     #
+#            Nothing else is shared: the Morse eigenvalues are closed    #
+#            expressions and the time and energy grids are a few loops   #
+#            that depend on the swept pulse parameters, both are         #
+#            negligible next to the FC overlaps and the time steps.      #
+#          - Sweep points that finished successfully are marked and      #
+#            skipped when the sweep is restarted.                        #
+#                                                                        #
+##########################################################################
+
+import argparse
+from datetime import datetime
+import functools
+import itertools
+from multiprocessing.pool import ThreadPool
+import numpy as np
+import os
+import subprocess
+import sys
+
+# set up argument parser
+parser = argparse.ArgumentParser(
+        description='''ELDEST -- sweep.py :
+        Runs nuclear_dyn.py for all combinations of the given parameter values.''',
+        epilog='''Example: python sweep.py photonucl.in -p delta_t_s=0,1E-15,2E-15 -p I_X=1E8:1E10:5 -w 8''')
+parser.add_argument('infile', help='Base input file for all sweep points, probably photonucl.in')
+parser.add_argument('-p', '--param', action='append', default=[], help='''Parameter of the input file and its values,
+                    either as a list NAME=v1,v2,... or as an evenly spaced range NAME=start:stop:num.
+                    Can be given several times, all combinations are run.''')
+parser.add_argument('-o', '--outdir', default='sweep', help='''Directory for the sweep (default: sweep).
+                    Every sweep point gets a subdirectory point_NNNNN with its input and output files.''')
+parser.add_argument('-w', '--workers', type=int, default=1, help='''Number of sweep points run at the same time (default: 1)''')
+parser.add_argument('-c', '--cache', help='''FC cache directory shared by all sweep points (default: OUTDIR/fc_cache)''')
+parser.add_argument('-g', '--gamma', help='''Gamma(R) file passed on to nuclear_dyn.py (see there)''')
+parser.add_argument('-s', '--script', default=os.path.join(os.path.dirname(os.path.abspath(__file__)), 'nuclear_dyn.py'),
+                    help='''Simulation script (default: nuclear_dyn.py next to sweep.py)''')
+
+#-------------------------------------------------------------------------
+# parameter grid
+def parse_param(param):
+    name, values = param.split('=', 1)
+    if (values.count(':') == 2):        # start:stop:num
+        start, stop, num = values.split(':')
+        values = [repr(float(x)) for x in np.linspace(float(start), float(stop), int(num))]
+    else:
+        values = values.split(',')
+    return name.strip(), [value.strip() for value in values]
+
+def make_input(base_lines, point):
+    # base input with the values of the sweep point; comments of the base file are kept
+    lines = []
+    for line in base_lines:
+        words = line.split()
+        if words and (words[0] in point):
+            comment = line[line.index('#'):] if ('#' in line) else '\n'
+            line = '{:13s} = {:16s} {}'.format(words[0], point[words[0]], comment)
+        lines.append(line)
+    return ''.join(lines)
+
+def run_point(n, outdir, script, cache_dir, gamma=None):
+    point_dir = os.path.join(outdir, 'point_{:05d}'.format(n))
+    command = [sys.executable, script, 'photonucl.in', '-c', cache_dir]
+    if gamma:
+        command = command + ['-g', os.path.abspath(gamma)]
+    with open(os.path.join(point_dir, 'run.log'), 'w') as log:
+        returncode = subprocess.call(command, cwd=point_dir, stdout=log, stderr=subprocess.STDOUT)
+    if (returncode == 0):
+        open(os.path.join(point_dir, 'done'), 'w').close()
+    return n, returncode
+
+def setup_points(base_lines, names, points, outdir):
+    # the point directories with their inputs; returns the points still to run
+    # (points with an unchanged input that finished before are skipped)
+    os.makedirs(outdir, exist_ok=True)
+    todo = []
+    with open(os.path.join(outdir, 'sweep.dat'), 'w') as index:
+        index.write('# point   ' + '   '.join(names) + '\n')
+        for n, point in enumerate(points):
+            index.write('{:7d}   '.format(n) + '   '.join(point[name] for name in names) + '\n')
+            point_dir = os.path.join(outdir, 'point_{:05d}'.format(n))
+            os.makedirs(point_dir, exist_ok=True)
+            point_in = os.path.join(point_dir, 'photonucl.in')
+            new_input = make_input(base_lines, point)
+            old_input = open(point_in).read() if os.path.isfile(point_in) else None
+            if (new_input != old_input):
+                with open(point_in, 'w') as f:
+                    f.write(new_input)
+                if os.path.isfile(os.path.join(point_dir, 'done')):
+                    os.remove(os.path.join(point_dir, 'done'))
+            if not os.path.isfile(os.path.join(point_dir, 'done')):
+                todo.append(n)
+    return todo
+
+
+#-------------------------------------------------------------------------
+def main(argv=None):
+    args = parser.parse_args(argv)
+    with open(args.infile, 'r') as f:
+        base_lines = f.readlines()
+    base_names = [line.split()[0] for line in base_lines if line.split()]
+
+    params = [parse_param(param) for param in args.param]
+    for name, values in params:
+        if name not in base_names:
+            sys.exit('!!! Parameter ' + name + ' is not set in ' + args.infile + '. Programme terminated.')
+    names = [name for name, values in params]
+    points = [dict(zip(names, values)) for values in itertools.product(*[values for name, values in params])]
+
+    cache_dir = os.path.abspath(args.cache if args.cache else os.path.join(args.outdir, 'fc_cache'))
+    todo = setup_points(base_lines, names, points, args.outdir)
+    print('{:d} sweep points, {:d} already done'.format(len(points), len(points) - len(todo)))
+
+    # run the sweep: the first point alone, so that the FC overlaps are in the cache before the others start
+    run = functools.partial(run_point, outdir=args.outdir, script=args.script, cache_dir=cache_dir, gamma=args.gamma)
+    dt_start = datetime.now()
+    failed = []
+    if todo:
+        results = [run(todo[0])]
+        pool = ThreadPool(max(args.workers, 1))    # every point is a separate nuclear_dyn.py process anyway
+        for n, returncode in itertools.chain(results, pool.imap_unordered(run, todo[1:])):
+            print('point {:5d}: '.format(n) + ('done' if returncode == 0 else 'failed (see run.log)'))
+            if (returncode != 0):
+                failed.append(n)
+        pool.close()
+        pool.join()
+
+    print('Total runtime:', str(datetime.now() - dt_start))
+    if failed:
+        sys.exit('!!! {:d} sweep points failed, rerun the sweep to retry them.'.format(len(failed)))
+
+if __name__ == '__main__':
+    main()
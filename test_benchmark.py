@@ -0,0 +1,22 @@
+##########################################################################
+#                  TESTS: BENCHMARK REFERENCES                           #
+##########################################################################
+# Purpose:                                                               #
+#          - Checks that the reference spectra of benchmarks/ref are     #
+#            reproduced by nuclear_dyn.simulate.                         #
+#                                                                        #
+##########################################################################
+
+import numpy as np
+import pytest
+
+import in_out
+import nuclear_dyn
+
+
+@pytest.mark.parametrize('case', ['small_morse_sinsq', 'small_morse_gauss', 'small_hypfree_gauss', 'large_morse_gauss'])
+def test_reference_spectra(case):
+    ref = np.load('benchmarks/ref/' + case + '.npz')
+    result = nuclear_dyn.simulate(in_out.parse_input('benchmarks/' + case + '.in'), quiet=True)
+    assert np.allclose(result['E_kin_au'], ref['E_kin_au']) and np.allclose(result['t_au'], ref['t_au'])
+    assert np.max(np.abs(result['spectrum'] - ref['spectrum'])) < 1e-10 * np.max(np.abs(ref['spectrum']))
@@ -0,0 +1,92 @@
+##########################################################################
+#                  TESTS: CLASSICAL NUCLEAR DYNAMICS                     #
+##########################################################################
+# Purpose:                                                               #
+#          - Checks of classical.verlet against the analytic harmonic    #
+#            oscillator and of the energy conservation on an expr6       #
+#            curve, and of the analytic gradients of potentials against  #
+#            finite differences.                                         #
+#          - Checks of the ensemble propagation against single           #
+#            trajectories and of the Wigner sampling.                    #
+#                                                                        #
+##########################################################################
+
+import numpy as np
+import pytest
+
+import classical
+import potentials
+import wellenfkt as wf
+
+red_mass = wf.red_mass_au(20.1797, 20.1797)
+expr6_params = (3000., 3.5, -40., 0.)         # eV and Angstrom, minimum near 7 bohr
+
+
+def test_verlet_against_harmonic_oscillator():
+    omega = 2e-4
+    grad = lambda R: red_mass * omega**2 * (R - 6.)
+    R0, v0 = np.array([6.3, 5.8]), np.array([0., 1e-5])
+    t = 4000.
+    R, v = classical.verlet(R0, v0, grad, red_mass, t, n_sub=2000)
+    R_ref = 6. + (R0 - 6.) * np.cos(omega * t) + v0 / omega * np.sin(omega * t)
+    v_ref = - (R0 - 6.) * omega * np.sin(omega * t) + v0 * np.cos(omega * t)
+    assert np.max(np.abs(R - R_ref)) < 1e-6
+    assert np.max(np.abs(v - v_ref)) < 1e-6 * omega
+
+
+def test_verlet_conserves_energy_on_expr6():
+    V = lambda R: potentials.expr6(*(expr6_params + (R,)))
+    grad = lambda R: potentials.expr6_grad(*(expr6_params + (R,)))
+    R, v = np.array([6.5, 7.5, 8.5]), np.zeros(3)
+    E0 = V(R) + 0.5 * red_mass * v**2
+    for n in range(0,50):
+        R, v = classical.verlet(R, v, grad, red_mass, 100., n_sub=20)
+    E = V(R) + 0.5 * red_mass * v**2
+    assert np.max(np.abs(E - E0)) < 1e-4 * np.max(np.abs(E0))
+
+
+@pytest.mark.parametrize('V, grad', [
+    (lambda R: potentials.expr6(*(expr6_params + (R,))),
+     lambda R: potentials.expr6_grad(*(expr6_params + (R,)))),
+    (lambda R: potentials.hyperbel(7.5, 2.1, R), lambda R: potentials.hyperbel_grad(7.5, 2.1, R)),
+    (lambda R: potentials.gammar6(120., R), lambda R: potentials.gammar6_grad(120., R)),
+])
+def test_grad_against_finite_differences(V, grad):
+    R = np.linspace(4., 14., 25)
+    h = 1e-4
+    ref = (V(R + h) - V(R - h)) / (2 * h)
+    assert np.max(np.abs(grad(R) - ref)) < 1e-7 * np.max(np.abs(ref))
+
+
+def test_ensemble_against_single_trajectories():
+    grad = lambda R: potentials.expr6_grad(*(expr6_params + (R,)))
+    omega = classical.harmonic_omega(grad, 6.975, red_mass)
+    R0, v0 = classical.wigner_sample(20, 6.975, red_mass, omega, seed=3)
+    Rs, vs = classical.trajectories(R0, v0, grad, red_mass, 50., 8, n_sub=5)
+    assert Rs.shape == vs.shape == (9, 20)
+    assert np.array_equal(Rs[0], R0) and np.array_equal(vs[0], v0)
+    for i in (0, 7, 19):
+        R, v = R0[i], v0[i]
+        for n in range(1,9):
+            R, v = classical.verlet(R, v, grad, red_mass, 50., n_sub=5)
+            assert abs(Rs[n,i] - R) < 1e-12 * R and abs(vs[n,i] - v) < 1e-12 * np.max(np.abs(vs))
+
+
+def test_harmonic_omega():
+    omega = 2e-4
+    grad = lambda R: red_mass * omega**2 * (R - 6.) + 3e-3 * (R - 6.)**2
+    assert abs(classical.harmonic_omega(grad, 6., red_mass) - omega) < 1e-10 * omega
+
+
+def test_wigner_sample_widths():
+    omega = 2e-4
+    R, v = classical.wigner_sample(200000, 6., red_mass, omega, seed=1)
+    sigma_R = 1. / np.sqrt(2 * red_mass * omega)
+    sigma_v = np.sqrt(red_mass * omega / 2) / red_mass
+    assert abs(np.mean(R) - 6.) < 0.01 * sigma_R and abs(np.mean(v)) < 0.01 * sigma_v
+    assert abs(np.std(R) / sigma_R - 1) < 0.01 and abs(np.std(v) / sigma_v - 1) < 0.01
+    # ground-state energy hbar omega / 2, half kinetic and half potential
+    E = np.mean(0.5 * red_mass * v**2 + 0.5 * red_mass * omega**2 * (R - 6.)**2)
+    assert abs(E / (omega / 2) - 1) < 0.01
+    assert np.array_equal(classical.wigner_sample(5, 6., red_mass, omega, seed=1)[0],
+                          classical.wigner_sample(5, 6., red_mass, omega, seed=1)[0])
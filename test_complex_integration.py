@@ -0,0 +1,83 @@
+##########################################################################
+#                  TESTS: COMPLEX INTEGRATION                            #
+##########################################################################
+# Purpose:                                                               #
+#          - Checks of the fixed-grid quadrature in complex_integration  #
+#            against the adaptive complex_quadrature.                    #
+#                                                                        #
+##########################################################################
+
+import numpy as np
+import pytest
+
+import complex_integration as ci
+
+# oscillating and decaying integrand of the type of the outer XUV integrals
+func = lambda t: np.exp(-t**2 / 50.) * np.exp(1j * 3.7 * t) * (1 + 0.3j * t)
+a, b = -12., 9.
+
+
+@pytest.mark.parametrize('rule', ['gauss_legendre', 'clenshaw_curtis'])
+def test_complex_fixed_quad_against_quadrature(rule):
+    ref = ci.complex_quadrature(func, a, b, epsabs=1e-13, epsrel=1e-13, limit=200)[0]
+    n = ci.nodes_for_bandwidth(3.7, a, b)
+    assert abs(ci.complex_fixed_quad(func, a, b, n=n, rule=rule) - ref) < 1e-10 * abs(ref)
+
+
+def test_complex_fixed_quad_broadcasts_over_leading_axes():
+    omegas = np.array([0.5, 2., 3.7])
+    I = ci.complex_fixed_quad(lambda t: np.exp(-t**2 / 50.) * np.exp(1j * omegas[:,None] * t), a, b, n=200)
+    for omega, value in zip(omegas, I):
+        ref = ci.complex_quadrature(lambda t: np.exp(-t**2 / 50.) * np.exp(1j * omega * t), a, b,
+                                    epsabs=1e-13, epsrel=1e-13, limit=200)[0]
+        assert abs(value - ref) < 1e-10 * abs(ref)
+
+
+@pytest.mark.parametrize('n', [9, 16, 33])
+def test_clenshaw_curtis_nodes_integrate_polynomials(n):
+    x, w = ci.fixed_nodes(n, 'clenshaw_curtis')
+    assert np.all(np.abs(x) <= 1)
+    for k in range(len(x)):         # exact up to the degree of the interpolating polynomial
+        assert abs(np.dot(x**k, w) - (2. / (k + 1) if k % 2 == 0 else 0.)) < 1e-13
+
+
+def test_fixed_nodes_unknown_rule():
+    with pytest.raises(ValueError):
+        ci.fixed_nodes(10, 'simpson')
+
+
+#-------------------------------------------------------------------------
+# Filon rule for int_a^b dt g(t) exp(i omega t) from samples of the envelope g
+envelope = lambda t: np.exp(-t**2 / 50.) * (1 + 0.3j * t)
+
+
+def filon_reference(omega):
+    return ci.complex_quadrature(lambda t: envelope(t) * np.exp(1j * omega * t), a, b,
+                                 epsabs=1e-13, epsrel=1e-13, limit=400)[0]
+
+
+def test_filon_fourier_against_quadrature():
+    g = envelope(np.linspace(a, b, 401))
+    omegas = np.array([[0., 0.3], [2.5 - 0.05j, 40.]])     # also complex and far beyond the sampling of g
+    I = ci.filon_fourier(g, a, b, omegas)
+    assert I.shape == omegas.shape
+    scale = abs(I[0,0])                 # int |g|, the integrals are of the order of it or smaller
+    for omega, value in zip(omegas.ravel(), I.ravel()):
+        assert abs(value - filon_reference(omega)) < 1e-8 * scale
+
+
+def test_filon_fourier_grid_against_filon_fourier():
+    g = envelope(np.linspace(a, b, 401))
+    omegas = 1.5 + 0.25 * np.arange(30)
+    grid = ci.filon_fourier_grid(g, a, b, 1.5, 0.25, 30)
+    assert np.max(np.abs(grid - ci.filon_fourier(g, a, b, omegas))) < 1e-12 * np.max(np.abs(grid))
+    assert abs(grid[4] - filon_reference(omegas[4])) < 1e-8 * abs(ci.filon_fourier(g, a, b, 0.))
+
+
+def test_filon_endpoint_against_quadrature():
+    # I(theta) = int_0^1 ds (1 - s) exp(i theta s), closed form and series on both sides of |theta| = 1
+    thetas = np.array([1e-3, 0.3 + 0.2j, 0.99, 1.01, -5., 2. - 1j])
+    I = ci.filon_endpoint(thetas)
+    for theta, value in zip(thetas, I):
+        ref = ci.complex_quadrature(lambda s: (1 - s) * np.exp(1j * theta * s), 0., 1., epsabs=1e-15, epsrel=1e-14)[0]
+        assert abs(value - ref) < 1e-14
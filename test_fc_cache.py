@@ -0,0 +1,49 @@
+##########################################################################
+#                  TESTS: FRANCK-CONDON CACHE                            #
+##########################################################################
+# Purpose:                                                               #
+#          - Checks of the keys and the round trip of fc_cache and of    #
+#            the spectra of nuclear_dyn.py with overlaps from the cache. #
+#                                                                        #
+##########################################################################
+
+import io
+import numpy as np
+
+import fc_cache
+import in_out
+import nuclear_dyn
+
+params = {'gs': [1.1E-4, 1.5, 6.0], 'n_gs_max': 0, 'red_mass': 18391.6, 'fc_method': 'grid'}
+V_of_R = lambda R: 2. / R
+
+
+def test_key_depends_on_parameters_V_and_format(monkeypatch):
+    key = fc_cache.fc_key(params, V_of_R, 3., 20.)
+    assert key == fc_cache.fc_key(dict(params), V_of_R, 3., 20.)
+    assert key != fc_cache.fc_key(dict(params, n_gs_max=1), V_of_R, 3., 20.)
+    assert key != fc_cache.fc_key(params, lambda R: 2. / R + 1E-12, 3., 20.)
+    # V(R) that is not vectorized (as Gamma(R) read by -g)
+    assert key == fc_cache.fc_key(params, lambda R: 2. / float(R), 3., 20.)
+    monkeypatch.setattr(fc_cache, 'fc_format', fc_cache.fc_format + 1)
+    assert key != fc_cache.fc_key(params, V_of_R, 3., 20.)
+
+
+def test_save_and_load(tmp_path):
+    key = fc_cache.fc_key(params, V_of_R, 3., 20.)
+    assert fc_cache.load_fc(str(tmp_path), key) is None
+    fcs = {'gs_res': [[0.1, -0.2], [0.3, 0.4]], 'E_mus': [0.01, 0.02, 0.03]}
+    fc_cache.save_fc(str(tmp_path), key, params, **fcs)
+    assert fc_cache.load_fc(str(tmp_path), key) == fcs
+
+
+def test_spectrum_with_cached_overlaps(tmp_path):
+    config = in_out.parse_input('benchmarks/small_morse_gauss.in')
+    ref = nuclear_dyn.simulate(config, quiet=True)['spectrum']
+    first = nuclear_dyn.simulate(config, cache_dir=str(tmp_path), quiet=True)
+    assert len(list(tmp_path.iterdir())) == 1
+    log = io.StringIO()
+    second = nuclear_dyn.simulate(config, cache_dir=str(tmp_path), quiet=True, outfile=log)
+    assert 'read from cache' in log.getvalue()
+    assert np.all(first['spectrum'] == ref)
+    assert np.all(second['spectrum'] == ref)
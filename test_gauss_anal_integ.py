@@ -0,0 +1,63 @@
+##########################################################################
+#                  TESTS: ANALYTIC INTEGRALS Gaussian XUV pulse          #
+##########################################################################
+# Purpose:                                                               #
+#          - Checks of the closed-form outer integrals against the       #
+#            adaptive complex_quadrature of the same integrands.         #
+#                                                                        #
+##########################################################################
+
+import numpy as np
+import pytest
+
+import complex_integration as ci
+import gauss_anal_integ as gai
+
+# XUV pulse of 10 cycles at 50 eV (as in the benchmark inputs), in atomic units
+A0X = 0.02
+Omega = 1.8375
+sigma = np.pi * 10 / (Omega * np.sqrt(np.log(2)))
+a = -5 * sigma / 2
+
+f = lambda t1: np.exp(-t1**2 / (2 * sigma**2)) / np.sqrt(2 * np.pi * sigma**2)
+fp = lambda t1: -t1 / sigma**2 * f(t1)
+FX = lambda t1: - A0X * np.cos(Omega * t1) * fp(t1) + A0X * Omega * np.sin(Omega * t1) * f(t1)
+
+
+def quad(func, b):
+    return ci.complex_quadrature(func, a, b, limit=500, epsabs=0)[0]
+
+
+@pytest.mark.parametrize('E_tot', [1.2, 1.83, 2.6])
+@pytest.mark.parametrize('T_up', [-10., 0., -a])
+def test_dir_integral(E_tot, T_up):
+    t = max(T_up, 30.)
+    ref = quad(lambda t1: FX(t1) * np.exp(1j * E_tot * (t1 - t)), T_up)
+    assert abs(gai.dir_integral(E_tot, t, a, T_up, A0X, Omega, sigma) - ref) < 1e-9 * abs(ref)
+
+
+@pytest.mark.parametrize('E_tot', [1.2, 1.83, 2.6])
+@pytest.mark.parametrize('T_up', [-10., 0., -a])
+def test_res_integral(E_tot, T_up):
+    E_res, W = 1.828, 2.0E-4
+    t = max(T_up, 30.)
+    D = 1j * (E_tot - E_res) - np.pi * W
+    res_inner = lambda t1: 1. / D * (np.exp(t * D) - np.exp(t1 * D)) * np.exp(-1j * t * E_tot)
+    ref = quad(lambda t1: FX(t1) * np.exp(t1 * (np.pi * W + 1j * E_res)) * res_inner(t1), T_up)
+    assert abs(gai.res_integral(E_tot, E_res, W, t, a, T_up, A0X, Omega, sigma) - ref) < 1e-9 * abs(ref)
+
+
+def test_FX_fourier_far_from_the_pulse_spectrum():
+    # exp(-sigma**2 kappa**2 / 2) underflows here, the Faddeeva form must stay finite and accurate
+    kappa = 12.
+    ref = quad(lambda t1: FX(t1) * np.exp(1j * kappa * t1), -a)
+    value = gai.FX_fourier(kappa, a, -a, A0X, Omega, sigma)
+    assert np.isfinite(value)
+    assert abs(value - ref) < 1e-8 * abs(ref)
+
+
+def test_integrals_broadcast_over_E_tot():
+    E_tot = np.array([1.2, 1.83, 2.6])
+    values = gai.res_integral(E_tot, 1.828, 2.0E-4, 30., a, 0., A0X, Omega, sigma)
+    for E, value in zip(E_tot, values):
+        assert abs(value - gai.res_integral(E, 1.828, 2.0E-4, 30., a, 0., A0X, Omega, sigma)) < 1e-13 * abs(value)
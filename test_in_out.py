@@ -0,0 +1,118 @@
+##########################################################################
+#                  TESTS: INPUT / OUTPUT                                 #
+##########################################################################
+# Purpose:                                                               #
+#          - Checks of the binary spectrum output of in_out.             #
+#          - Checks of parse_input against the lines of an input file,   #
+#            of config_hash and of the atomic-unit view.                 #
+#                                                                        #
+##########################################################################
+
+import io
+import os
+import subprocess
+import sys
+
+import numpy as np
+
+import in_out
+import sciconv
+
+E_kins_au = np.linspace(0.36, 0.39, 7)
+t_aus = np.linspace(-50., 400., 25)
+rows = np.random.default_rng(1).random((len(t_aus), len(E_kins_au)))
+
+
+def text_blocks(path):
+    with open(path) as f:
+        return [block for block in f.read().split('\n\n') if block.strip()]
+
+
+def test_binary_round_trip(tmp_path):
+    name = str(tmp_path / 'full')
+    data, header = in_out.open_binary(name, E_kins_au, t_aus)
+    for squares in rows:
+        in_out.doout_binary(name, data, header, squares)
+    in_out.close_binary(name, data, header)
+    in_out.binary_to_text(name, str(tmp_path / 'full.dat'), str(tmp_path / 'movie.dat'))
+    blocks = text_blocks(tmp_path / 'full.dat')
+    assert len(blocks) == len(t_aus)
+    assert blocks[3].split('\n') == [in_out.prep_output(I, E, t_aus[3]) for I, E in zip(rows[3], E_kins_au)]
+
+
+def test_binary_of_a_killed_run(tmp_path):
+    # close_binary is never called: the rows up to the last header update are recovered
+    name = str(tmp_path / 'full')
+    data, header = in_out.open_binary(name, E_kins_au, t_aus)
+    for squares in rows[:23]:
+        in_out.doout_binary(name, data, header, squares)
+    del data
+    in_out.binary_to_text(name, str(tmp_path / 'full.dat'), str(tmp_path / 'movie.dat'))
+    n_recovered = 23 // in_out.flush_rows * in_out.flush_rows
+    assert len(text_blocks(tmp_path / 'full.dat')) == n_recovered
+    assert np.all(np.load(name + '.npy')[:n_recovered] == rows[:n_recovered])
+
+
+#-------------------------------------------------------------------------
+# input parser
+input_text = """rdg_au        = 0.70             # comment
+
+tau_s         =  20E-15
+n_X           = 10
+X_shape       = sinsq            # options: gauss, sinsq
+integ_outer   = gauss_legendre
+partial_GamR  = prefactor
+fc_precalc    = True
+fin_pot_type  = hyperbel
+"""
+
+
+def test_parse_input(tmp_path):
+    path = tmp_path / 'test.in'
+    path.write_text(input_text)
+    config = in_out.parse_input(str(path))
+    defaults = dict((name, default) for (name, default, kind, echo_to) in in_out.input_fields)
+    expected = dict(defaults, rdg_au=0.7, tau_s=2e-14, n_X=10., X_sinsq=True, X_gauss=False,
+                    integ_outer='gauss_legendre', partial_GamR='pre', fc_precalc=True, fin_pot_type='hyperbel')
+    assert config._asdict() == expected
+    assert hash(config) == hash(in_out.parse_input(str(path)))
+    assert in_out.read_input(str(path), io.StringIO()) == tuple(config)
+
+
+def test_parse_input_echo(tmp_path, capsys):
+    path = tmp_path / 'test.in'
+    path.write_text(input_text)
+    in_out.parse_input(str(path))
+    assert capsys.readouterr().out == ''
+    outfile = io.StringIO()
+    in_out.parse_input(str(path), outfile)
+    assert 'X_shape = Sin**2' in outfile.getvalue()
+    assert 'rdg_au = 0.7' in outfile.getvalue()
+
+
+def test_config_hash(tmp_path):
+    path = tmp_path / 'test.in'
+    path.write_text(input_text)
+    config = in_out.parse_input(str(path))
+    assert in_out.config_hash(config) == in_out.config_hash(in_out.parse_input(str(path)))
+    assert in_out.config_hash(config._replace(n_X=11.)) != in_out.config_hash(config)
+    assert in_out.config_hash(config._replace(fin_pot_type='morse')) != in_out.config_hash(config)
+    # the same in another process with another str hash seed
+    code = 'import in_out; print(in_out.config_hash(in_out.parse_input(%r)))' % str(path)
+    env = dict(os.environ, PYTHONHASHSEED='12345')
+    other = subprocess.run([sys.executable, '-c', code], capture_output=True, text=True, env=env,
+                           cwd=os.path.dirname(os.path.abspath(in_out.__file__)))
+    assert other.stdout.strip() == in_out.config_hash(config)
+
+
+def test_atomic_units(tmp_path):
+    path = tmp_path / 'test.in'
+    path.write_text(input_text)
+    config = in_out.parse_input(str(path))
+    au = in_out.atomic_units(config)
+    assert abs(au.Gamma_au * sciconv.second_to_atu(config.tau_s) - 1) < 1e-14
+    assert abs(au.Omega_au - config.Omega_eV / 27.211386245988) < 1e-9 * au.Omega_au
+    assert abs(au.tmax_au - config.tmax_s / 2.4188843265857e-17) < 1e-9 * au.tmax_au
+    assert abs(au.A0X - np.sqrt(au.I_X_au) / au.Omega_au) < 1e-15 * au.A0X
+    assert in_out.atomic_units(config._replace(tau_s_2=0.)).Gamma_au_2 == 0.
+    assert in_out.atomic_units(config) == au
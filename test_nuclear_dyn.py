@@ -0,0 +1,145 @@
+##########################################################################
+#                  TESTS: NUCLEAR DYNAMICS                               #
+##########################################################################
+# Purpose:                                                               #
+#          - Checks of the spectra of nuclear_dyn.simulate for the       #
+#            outer-integration schemes and modes against the adaptive    #
+#            quadrature of the baseline code, on the pinned inputs of    #
+#            benchmarks/.                                                #
+#                                                                        #
+##########################################################################
+
+import io
+
+import numpy as np
+import pytest
+
+import in_out
+import nuclear_dyn
+
+sinsq_in = 'benchmarks/small_morse_sinsq.in'
+gauss_in = 'benchmarks/small_morse_gauss.in'
+hyperbel_in = 'benchmarks/small_hyperbel_gauss.in'
+hypfree_in = 'benchmarks/small_hypfree_gauss.in'
+
+
+def spectrum(infile, **options):
+    integ_outer = options.pop('integ_outer', None)
+    config = in_out.parse_input(infile)
+    if integ_outer:
+        config = config._replace(integ_outer=integ_outer)
+    return nuclear_dyn.simulate(config, quiet=True, **options)['spectrum']
+
+
+def max_rel_dev(spec, ref):
+    return np.max(np.abs(spec - ref)) / np.max(np.abs(ref))
+
+
+@pytest.fixture(scope='module')
+def sinsq_quadrature():
+    return spectrum(sinsq_in, integ_outer='quadrature')
+
+
+@pytest.fixture(scope='module')
+def gauss_quadrature():
+    return spectrum(gauss_in, integ_outer='quadrature')
+
+
+@pytest.mark.parametrize('integ_outer', ['gauss_legendre', 'clenshaw_curtis'])
+def test_fixed_grid_against_quadrature(sinsq_quadrature, integ_outer):
+    assert max_rel_dev(spectrum(sinsq_in, integ_outer=integ_outer), sinsq_quadrature) < 1e-8
+
+
+def test_fixed_grid_resolves_the_resonant_path():
+    # final states far below the resonance: the resonant integrand oscillates with Er + E_lambda > E_kin + E_fin + E_mu
+    config = in_out.parse_input(sinsq_in)._replace(E_fin_eV=20.)
+    ref = nuclear_dyn.simulate(config._replace(integ_outer='quadrature'), quiet=True)['spectrum']
+    spec = nuclear_dyn.simulate(config._replace(integ_outer='gauss_legendre'), quiet=True)['spectrum']
+    assert max_rel_dev(spec, ref) < 1e-10
+
+
+def test_analytic_against_quadrature(gauss_quadrature):
+    assert max_rel_dev(spectrum(gauss_in, integ_outer='analytic'), gauss_quadrature) < 1e-8
+
+
+def test_incremental_against_quadrature(sinsq_quadrature, gauss_quadrature):
+    assert max_rel_dev(spectrum(sinsq_in, incremental=True), sinsq_quadrature) < 1e-8
+    assert max_rel_dev(spectrum(gauss_in, incremental=True), gauss_quadrature) < 1e-8
+
+
+def test_refine_everywhere_equals_half_step():
+    # bisecting every R_start step once reproduces the continuum discretization with half the step width
+    config = in_out.parse_input(hyperbel_in)._replace(E_max_eV=10.0)
+    ref = nuclear_dyn.simulate(config, quiet=True)['spectrum']
+    spec = nuclear_dyn.simulate(config._replace(fin_c=2 * config.fin_c), quiet=True, refine=1, refine_tol=0.)['spectrum']
+    assert max_rel_dev(spec, ref) < 1e-7
+
+
+def test_quiet_prints_nothing(capsys):
+    outfile = io.StringIO()
+    nuclear_dyn.simulate(in_out.parse_input(sinsq_in), outfile=outfile, quiet=True)
+    assert capsys.readouterr().out == ''
+    assert 'Input fulfills requirements' in outfile.getvalue()
+
+
+def test_cumulative_against_quadrature(sinsq_quadrature, gauss_quadrature):
+    assert max_rel_dev(spectrum(sinsq_in, cumulative=True), sinsq_quadrature) < 1e-8
+    assert max_rel_dev(spectrum(gauss_in, cumulative=True), gauss_quadrature) < 1e-8
+
+
+def test_pulse_integrals_in_mu_chunks(monkeypatch):
+    # a chunk size of a single mu must not change the incremental and cumulative spectra
+    config = in_out.parse_input(sinsq_in)
+    ref = [nuclear_dyn.simulate(config, quiet=True, **{mode: True})['spectrum'] for mode in ('incremental', 'cumulative')]
+    monkeypatch.setattr(nuclear_dyn, 'max_chunk_size', 1)
+    for mode, spec in zip(('incremental', 'cumulative'), ref):
+        assert max_rel_dev(nuclear_dyn.simulate(config, quiet=True, **{mode: True})['spectrum'], spec) < 1e-13
+
+
+def test_shared_total_energies():
+    # the dense continuum of final states has many E_kin + E_mu within E_tol of each other
+    config = in_out.parse_input(hypfree_in)
+    ref = nuclear_dyn.simulate(config, quiet=True)
+    shared = nuclear_dyn.simulate(config, quiet=True, E_tol=1e-5)
+    assert shared['evals']['shared'] > 0
+    assert shared['evals']['dir'] < ref['evals']['dir']
+    assert max_rel_dev(shared['spectrum'], ref['spectrum']) < 1e-6
+
+
+def test_spectral_against_quadrature(sinsq_quadrature, gauss_quadrature):
+    assert max_rel_dev(spectrum(sinsq_in, integ_outer='spectral'), sinsq_quadrature) < 1e-8
+    assert max_rel_dev(spectrum(gauss_in, integ_outer='spectral'), gauss_quadrature) < 1e-8
+
+
+def test_tensor_assembly_in_mu_chunks(monkeypatch):
+    # 618 final states and several resonance states: the contraction over (E_kin, mu, lambda) one mu at a time
+    config = in_out.parse_input(hypfree_in)
+    ref = nuclear_dyn.simulate(config, quiet=True)['spectrum']
+    monkeypatch.setattr(nuclear_dyn, 'max_chunk_size', 1)
+    assert max_rel_dev(nuclear_dyn.simulate(config, quiet=True)['spectrum'], ref) < 1e-13
+
+
+@pytest.mark.parametrize('screen_tol', [1e-5, 1e-3])
+def test_screening(screen_tol):
+    # the skipped channels lie below screen_tol of the largest one, so the spectrum deviates by about screen_tol
+    config = in_out.parse_input(hypfree_in)
+    ref = nuclear_dyn.simulate(config, quiet=True)
+    screened = nuclear_dyn.simulate(config, quiet=True, screen_tol=screen_tol)
+    assert screened['evals']['screened'] > 0
+    assert screened['evals']['dir'] < ref['evals']['dir']
+    assert max_rel_dev(screened['spectrum'], ref['spectrum']) < screen_tol
+
+
+def test_process_pool_against_serial():
+    config = in_out.parse_input(sinsq_in)
+    ref = nuclear_dyn.simulate(config, quiet=True)
+    pool = nuclear_dyn.simulate(config, quiet=True, workers=2)
+    assert np.array_equal(pool['spectrum'], ref['spectrum'])
+    assert pool['evals'] == ref['evals']
+    assert not hasattr(nuclear_dyn, 'worker_step')     # the state of the pool lives in the workers only
+
+
+def test_input_check_raises():
+    config = in_out.parse_input(sinsq_in)
+    with pytest.raises(ValueError):
+        nuclear_dyn.simulate(config._replace(E_fin_eV=config.Omega_eV + 1.), quiet=True)
@@ -0,0 +1,60 @@
+##########################################################################
+#                  TESTS: POTENTIALS                                     #
+##########################################################################
+# Purpose:                                                               #
+#          - Checks of the curve objects of potentials against the       #
+#            scalar potential functions and their gradients, and of the  #
+#            cache of tabulations.                                       #
+#                                                                        #
+##########################################################################
+
+import numpy as np
+import pytest
+
+import potentials
+
+R = np.linspace(4., 14., 25)
+curves = [(potentials.Expr6Curve(3000., 3.5, -40., 0.2),
+           lambda r: potentials.expr6(3000., 3.5, -40., 0.2, r),
+           lambda r: potentials.expr6_grad(3000., 3.5, -40., 0.2, r)),
+          (potentials.HyperbelCurve(7.5, 2.1),
+           lambda r: potentials.hyperbel(7.5, 2.1, r),
+           lambda r: potentials.hyperbel_grad(7.5, 2.1, r)),
+          (potentials.Gammar6Curve(120.),
+           lambda r: potentials.gammar6(120., r),
+           lambda r: potentials.gammar6_grad(120., r))]
+
+
+@pytest.mark.parametrize('curve, V, grad', curves)
+def test_curve_against_scalar_functions(curve, V, grad):
+    V_ref = np.array([V(float(r)) for r in R])
+    grad_ref = np.array([grad(float(r)) for r in R])
+    assert np.max(np.abs(curve(R) - V_ref)) < 1e-14 * np.max(np.abs(V_ref))
+    assert np.max(np.abs(curve.grad(R) - grad_ref)) < 1e-14 * np.max(np.abs(grad_ref))
+    assert abs(curve(R[3]) - V_ref[3]) < 1e-14 * abs(V_ref[3])
+
+
+def test_tabulate_is_shared_and_read_only(monkeypatch):
+    monkeypatch.setattr(potentials, 'tabulations', potentials.OrderedDict())
+    V, dV = potentials.Expr6Curve(3000., 3.5, -40., 0.2).tabulate(R)
+    assert np.array_equal(V, curves[0][0](R)) and np.array_equal(dV, curves[0][0].grad(R))
+    with pytest.raises(ValueError):
+        V[0] = 0.
+    # an equal curve on an equal grid gets the same arrays, another grid or curve not
+    assert potentials.Expr6Curve(3000., 3.5, -40., 0.2).tabulate(R.copy())[0] is V
+    assert potentials.Expr6Curve(3000., 3.5, -40., 0.2).tabulate(R[1:])[0] is not V
+    assert potentials.Expr6Curve(3000., 3.6, -40., 0.2).tabulate(R)[0] is not V
+
+
+def test_tabulations_are_bounded(monkeypatch):
+    monkeypatch.setattr(potentials, 'tabulations', potentials.OrderedDict())
+    monkeypatch.setattr(potentials, 'max_tabulations', 2)
+    curve = potentials.HyperbelCurve(7.5, 2.1)
+    first = curve.tabulate(R)[0]
+    curve.tabulate(R[1:])
+    assert curve.tabulate(R)[0] is first       # least recently used is now R[1:]
+    third = curve.tabulate(R[2:])[0]          # evicts R[1:]
+    assert len(potentials.tabulations) == 2
+    assert curve.tabulate(R)[0] is first
+    curve.tabulate(R[1:])                       # evicts R[2:]
+    assert curve.tabulate(R[2:])[0] is not third
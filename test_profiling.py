@@ -0,0 +1,58 @@
+##########################################################################
+#                  TESTS: STAGE PROFILING                                #
+##########################################################################
+# Purpose:                                                               #
+#          - Checks of the stage timings, integrand counts and traces    #
+#            of profiling and of their return by nuclear_dyn.simulate.   #
+#                                                                        #
+##########################################################################
+
+import csv
+import json
+
+import numpy as np
+
+import in_out
+import nuclear_dyn
+import profiling
+
+
+def test_simulate_counts_and_timings():
+    result = nuclear_dyn.simulate(in_out.parse_input('benchmarks/small_morse_sinsq.in'), quiet=True)
+    assert set(['setup', 'fc', 'W_lambda', 'time_loop']) <= set(result['timings'])
+    assert all(seconds >= 0. for seconds in result['timings'].values())
+    # the resonant integrals are double integrals, their integrand is evaluated more often
+    assert result['evals']['res'] > result['evals']['dir'] > 0
+
+
+def test_counted():
+    evals = {}
+    square = profiling.counted(evals, 'dir', lambda x: x**2)
+    square(np.ones(5))
+    square(2.)
+    assert evals == {'dir': 6}
+
+
+def test_profile_trace(tmp_path):
+    profile = profiling.Profile()
+    profile.lap('setup')
+    for n in range(0,3):
+        with profile.timer('time_step', step=n):
+            pass
+    profile.add_evals({'dir': 4})
+    profile.add_evals({'dir': 1, 'res': 2})
+    assert profile.evals == {'dir': 5, 'res': 2}
+    assert abs(profile.eta(3, 7, ['time_step']) - profile.totals['time_step'] / 3 * 4) < 1e-12
+    assert profile.eta(0, 7, ['time_step']) is None
+
+    profile.write_json(str(tmp_path / 'trace.json'), case='test')
+    with open(str(tmp_path / 'trace.json')) as f:
+        trace = json.load(f)
+    assert trace['case'] == 'test' and trace['evals'] == profile.evals
+    assert [event['stage'] for event in trace['events']] == ['setup'] + 3 * ['time_step']
+
+    profile.write_csv(str(tmp_path / 'trace.csv'))
+    with open(str(tmp_path / 'trace.csv')) as f:
+        rows = list(csv.reader(f))
+    assert rows[0] == ['stage', 'start_s', 'duration_s', 'step', 'evals_dir', 'evals_res']
+    assert [row[3] for row in rows[1:]] == ['', '0', '1', '2']
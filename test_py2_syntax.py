@@ -0,0 +1,50 @@
+##########################################################################
+#                  TESTS: PYTHON 2 SYNTAX                                #
+##########################################################################
+# Purpose:                                                               #
+#          - The modules imported by the python 2 scripts (measure_*,    #
+#            streak*, ...) have to stay parsable by python 2.            #
+#          - Always checked against the python 3.4 grammar (no @, no     #
+#            f-strings), and with a python 2 interpreter if one is found #
+#            (environment variable PYTHON2, or python2 on the PATH).     #
+#                                                                        #
+##########################################################################
+
+import ast
+import os
+import subprocess
+
+import pytest
+
+py2_modules = ['sciconv', 'in_out', 'complex_integration', 'pulses', 'streaking', 'potentials', 'wellenfkt',
+               'res_anal_integ', 'dir_anal_integ', 'res_history', 'classical', 'gauss_anal_integ']
+here = os.path.dirname(os.path.abspath(__file__))
+
+
+def python2():
+    for command in (os.environ.get('PYTHON2'), 'python2', 'python2.7'):
+        if not command:
+            continue
+        try:
+            version = subprocess.run([command, '--version'], capture_output=True, text=True)
+        except OSError:
+            continue
+        if (version.returncode == 0 and 'Python 2' in version.stdout + version.stderr):
+            return command
+    return None
+
+
+@pytest.mark.parametrize('module', py2_modules)
+def test_no_python3_only_grammar(module):
+    with open(os.path.join(here, module + '.py')) as f:
+        ast.parse(f.read(), module + '.py', feature_version=(3, 4))
+
+
+def test_python2_parses_the_modules():
+    command = python2()
+    if command is None:
+        pytest.skip('no python 2 interpreter found')
+    files = [os.path.join(here, module + '.py') for module in py2_modules]
+    check = subprocess.run([command, '-c', 'import ast, sys\nfor name in sys.argv[1:]: ast.parse(open(name).read(), name)']
+                           + files, capture_output=True, text=True)
+    assert check.returncode == 0, check.stderr
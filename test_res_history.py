@@ -0,0 +1,64 @@
+##########################################################################
+#                  TESTS: RESONANCE HISTORY OF TIME SLICES               #
+##########################################################################
+# Purpose:                                                               #
+#          - Checks of the running sums of res_history against the loop  #
+#            over the list res_tuples of measure_tmin.py, which they     #
+#            replace.                                                    #
+#                                                                        #
+##########################################################################
+
+import numpy as np
+import pytest
+
+import res_history
+
+
+def legacy_contributions(res_tuples, n_E, E_index, n, t_au, E_kin_au, Ires, I1, dir_J1, n_limit):
+    # the loop over all past slices of measure_tmin.py
+    J = 0
+    square = 0
+    for time in range(0,n+1):
+        first = res_tuples[n_E*time + E_index][1] * Ires
+        if (time !=1):
+            sec = res_tuples[n_E*time + E_index][2] * Ires
+        else:
+            sec = res_tuples[n_E*time + E_index][2] * I1
+        new_part = (first - sec) * np.exp(-1j * t_au * (E_kin_au + res_tuples[n_E*time + E_index][3]))
+        if (time < n_limit):
+            J = J + new_part
+        else:
+            square = square + np.absolute(new_part + dir_J1)**2
+    return J, square
+
+
+@pytest.mark.parametrize('n_limit', [0, 7, 100])
+def test_contributions_against_res_tuples(n_limit):
+    rng = np.random.default_rng(0)
+    n_E = 5
+    E_kins = np.linspace(0.3, 0.4, n_E)
+    res_tuples = []
+    hist = res_history.new_history(n_E)
+    for n in range(0, 40):
+        # the nuclei move during the first slices, then T_K + E_fin stays constant
+        e3 = (1.2 + 0.01 * n if n < 15 else 1.35)
+        for E_index in range(0, n_E):
+            r1, r2 = rng.normal(size=2) + 1j * rng.normal(size=2)
+            res_tuples.append((n, r1, r2, e3))
+            res_history.add_slice(hist, n, E_index, r1, r2, e3, coherent=(n < n_limit))
+        t_au = 10. * n
+        Ires, I1, dir_J1 = rng.normal(size=3) + 1j * rng.normal(size=3)
+        for E_index in range(0, n_E):
+            J, square = res_history.contributions(hist, E_index, t_au, E_kins[E_index], Ires, I1, dir_J1)
+            J_ref, square_ref = legacy_contributions(res_tuples, n_E, E_index, n, t_au, E_kins[E_index],
+                                                     Ires, I1, dir_J1, n_limit)
+            assert abs(J - J_ref) <= 1e-12 * max(1., abs(J_ref))
+            assert abs(square - square_ref) <= 1e-12 * max(1., square_ref)
+
+
+def test_constant_phase_keeps_one_group():
+    hist = res_history.new_history(3)
+    for n in range(0, 50):
+        for E_index in range(0, 3):
+            res_history.add_slice(hist, n, E_index, 1.j, 0.5, 1.35)
+    assert hist['n_groups'] == 1
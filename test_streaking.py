@@ -0,0 +1,42 @@
+##########################################################################
+#                  TESTS: VOLKOV PHASES OF THE IR PULSE                  #
+##########################################################################
+# Purpose:                                                               #
+#          - Checks of the closed-form dressing phases of streaking      #
+#            against scipy quad of the integrand of the legacy scripts.  #
+#                                                                        #
+##########################################################################
+
+import numpy as np
+import pytest
+import scipy.integrate as integrate
+
+import streaking
+
+# IR pulse of the streaking scripts (atomic units)
+A0L = 0.3
+TL_au = 400.
+delta_t_au = 150.
+phi = 0.4
+p_au = 0.8
+
+
+def A_IR(t3, omega_au):
+    return A0L * np.sin(np.pi * (t3 - delta_t_au + TL_au/2) / TL_au)**2 * np.cos(omega_au * t3 + phi)
+
+
+@pytest.mark.parametrize('omega_au', [0.057, 2 * np.pi / TL_au])    # the second makes one cosine constant
+@pytest.mark.parametrize('shift', [0., 0.25])
+@pytest.mark.parametrize('t_a, t_b', [(-50., 10.), (delta_t_au - TL_au/2, delta_t_au + TL_au/2), (120., 121.)])
+def test_volkov_sinsq_against_quad(omega_au, shift, t_a, t_b):
+    ref = integrate.quad(lambda t3: (p_au + A_IR(t3, omega_au) - shift)**2, t_a, t_b,
+                         epsabs=0, epsrel=1e-13, limit=500)[0]
+    value = streaking.volkov_sinsq(p_au, t_a, t_b, A0L, omega_au, TL_au, delta_t_au, phi, shift)
+    assert abs(value - ref) < 1e-11 * abs(ref)
+
+
+def test_volkov_sinsq_broadcasts():
+    t_a = np.array([-50., 0., 120.])
+    values = streaking.volkov_sinsq(p_au, t_a, 200., A0L, 0.057, TL_au, delta_t_au, phi)
+    for t, value in zip(t_a, values):
+        assert value == streaking.volkov_sinsq(p_au, t, 200., A0L, 0.057, TL_au, delta_t_au, phi)
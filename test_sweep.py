@@ -0,0 +1,86 @@
+##########################################################################
+#                  TESTS: PARAMETER SWEEP                                #
+##########################################################################
+# Purpose:                                                               #
+#          - Checks of the parameter grid, the inputs of the sweep       #
+#            points and of resuming a sweep from the done markers.       #
+#                                                                        #
+##########################################################################
+
+import os
+
+import numpy as np
+import pytest
+
+import in_out
+import sweep
+
+base_in = 'benchmarks/small_morse_sinsq.in'
+
+# stands in for nuclear_dyn.py: logs the value of n_X and the arguments, fails for n_X = 13 while the file fail exists
+fake_script = '''import sys
+sys.path.insert(0, {here!r})
+import in_out
+import os
+n_X = in_out.parse_input(sys.argv[1]).n_X
+with open({calls!r}, 'a') as f:
+    f.write(repr(n_X) + ' ' + ' '.join(sys.argv[2:]) + '\\n')
+sys.exit(1 if (n_X == 13 and os.path.isfile({fail!r})) else 0)
+'''
+
+
+def test_parse_param():
+    assert sweep.parse_param('delta_t_s = 0,1E-15, 2E-15') == ('delta_t_s', ['0', '1E-15', '2E-15'])
+    name, values = sweep.parse_param('I_X=1E8:1E10:5')
+    assert name == 'I_X'
+    assert np.allclose([float(value) for value in values], np.linspace(1E8, 1E10, 5), rtol=1e-15)
+
+
+def test_make_input(tmp_path):
+    with open(base_in) as f:
+        base_lines = f.readlines()
+    text = sweep.make_input(base_lines, {'n_X': '13', 'I_X': '2.5E9'})
+    path = tmp_path / 'photonucl.in'
+    path.write_text(text)
+    config = in_out.parse_input(str(path))
+    assert config._replace(n_X=0., I_X=0.) == in_out.parse_input(base_in)._replace(n_X=0., I_X=0.)
+    assert (config.n_X, config.I_X) == (13., 2.5E9)
+    assert 'number of cycles' in [line for line in text.splitlines() if line.startswith('n_X')][0]
+
+
+def test_sweep_resumes(tmp_path, capsys):
+    calls = str(tmp_path / 'calls.log')
+    fail = tmp_path / 'fail'
+    fail.write_text('')
+    script = tmp_path / 'fake_nuclear_dyn.py'
+    script.write_text(fake_script.format(here=os.path.dirname(os.path.abspath(sweep.__file__)), calls=calls, fail=str(fail)))
+    outdir = str(tmp_path / 'sweep')
+    argv = [base_in, '-p', 'n_X=10,12,13', '-p', 'I_X=1E8,1E9', '-o', outdir, '-s', str(script), '-w', '2']
+
+    with pytest.raises(SystemExit):         # the two points with n_X = 13 fail
+        sweep.main(argv)
+    with open(calls) as f:
+        first = f.read().splitlines()
+    assert sorted(line.split()[0] for line in first) == ['10.0', '10.0', '12.0', '12.0', '13.0', '13.0']
+    assert all(line.split()[1:] == ['-c', os.path.join(os.path.abspath(outdir), 'fc_cache')] for line in first)
+    done = sorted(name for name in os.listdir(outdir) if os.path.isfile(os.path.join(outdir, name, 'done')))
+    assert done == ['point_00000', 'point_00001', 'point_00002', 'point_00003']
+
+    # a rerun only retries the failed points
+    os.remove(calls)
+    os.remove(str(fail))
+    sweep.main(argv)
+    with open(calls) as f:
+        assert sorted(line.split()[0] for line in f) == ['13.0', '13.0']
+
+    # a sweep extended by values of the first parameter only runs the new points
+    os.remove(calls)
+    sweep.main([base_in, '-p', 'n_X=10,12,13,14', '-p', 'I_X=1E8,1E9', '-o', outdir, '-s', str(script)])
+    with open(calls) as f:
+        assert sorted(line.split()[0] for line in f) == ['14.0', '14.0']
+    assert '8 sweep points, 6 already done' in capsys.readouterr().out
+
+
+def test_unknown_parameter(tmp_path):
+    with pytest.raises(SystemExit):
+        sweep.main([base_in, '-p', 'no_such_parameter=1,2', '-o', str(tmp_path / 'sweep')])
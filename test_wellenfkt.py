@@ -0,0 +1,110 @@
+##########################################################################
+#                  TESTS: WAVE FUNCTIONS                                 #
+##########################################################################
+# Purpose:                                                               #
+#          - Checks of the array-based wavefunctions of wellenfkt        #
+#            against the mpmath versions.                                #
+#                                                                        #
+##########################################################################
+
+import mpmath
+import numpy as np
+import pytest
+
+import wellenfkt as wf
+
+red_mass = wf.red_mass_au(20.1797, 20.1797)
+# Morse potential with about 50 bound states (De, alpha, Req in au)
+De, alpha, Req = 0.0183747, 0.5, 6.0
+R = np.linspace(3.5, 16., 60)
+
+
+@pytest.mark.parametrize('n', [0, 1, 7, 25, 45])
+def test_psi_n_grid_against_mpmath(n):
+    psis = wf.psi_n_grid(R, n, alpha, Req, red_mass, De)
+    with mpmath.workdps(40):
+        ref = np.array([float(wf.mp_psi_n(mpmath.mpf(x), n, mpmath.mpf(alpha), mpmath.mpf(Req),
+                                          mpmath.mpf(red_mass), mpmath.mpf(De)))
+                        for x in R])
+    assert np.max(np.abs(psis[n] - ref)) < 1e-9 * np.max(np.abs(ref))
+
+
+def test_psi_n_grid_against_psi_n():
+    psis = wf.psi_n_grid(R, 5, alpha, Req, red_mass, De)
+    for n in range(0, 6):
+        assert np.max(np.abs(psis[n] - wf.psi_n(R, n, alpha, Req, red_mass, De))) < 1e-10 * np.max(np.abs(psis[n]))
+
+
+#-------------------------------------------------------------------------
+# Franck-Condon overlaps on the common R grid
+De2, alpha2, Req2 = 0.0120, 0.6, 6.6
+R_min, R_max = 3., 20.
+V_of_R = lambda R: 1. / R**6
+
+
+def test_R_grid_integrates_smooth_functions():
+    nodes, weights = wf.R_grid(R_min, R_max)
+    assert abs(np.dot(np.exp(-nodes), weights) - (np.exp(-R_min) - np.exp(-R_max))) < 1e-14
+
+
+@pytest.mark.parametrize('V', [None, V_of_R])
+def test_FC_grid_against_quadrature(V):
+    nodes, weights = wf.R_grid(R_min, R_max)
+    psis1 = wf.psi_n_grid(nodes, 4, alpha, Req, red_mass, De)
+    psis2 = wf.psi_n_grid(nodes, 3, alpha2, Req2, red_mass, De2)
+    FCs = wf.FC_grid(psis1, psis2, weights, V=(1 if V is None else V(nodes)))
+    for (n1, n2) in [(0, 0), (4, 1), (2, 3)]:
+        kwargs = ({} if V is None else {'V_of_R': V})
+        ref = wf.FCmor_mor(n1, alpha, Req, De, red_mass, n2, alpha2, Req2, De2, R_min, R_max,
+                           epsabs=1e-14, limit=200, **kwargs)
+        assert abs(FCs[n1,n2] - ref) < 1e-10 * np.max(np.abs(FCs))
+
+
+def test_FC_grid_orthonormal():
+    nodes, weights = wf.R_grid(R_min, R_max)
+    psis = wf.psi_n_grid(nodes, 30, alpha, Req, red_mass, De)
+    assert np.max(np.abs(wf.FC_grid(psis, psis, weights) - np.eye(31))) < 1e-10
+
+
+def test_psi_freehyp_grid_against_psi_freehyp():
+    a, b = 0.0833354, 1.4699729
+    for R_start in (4.5, 6.):
+        grid = wf.psi_freehyp_grid(R, a, b, red_mass, R_start, phase=0.3)
+        ref = np.array([wf.psi_freehyp(x, a, b, red_mass, R_start, 0.3) for x in R])
+        assert np.max(np.abs(grid - ref)) < 1e-12 * np.max(np.abs(ref))
+    both = wf.psi_freehyp_grid(R, a, b, red_mass, np.array([4.5, 6.]), phase=0.3)
+    assert np.all(both[1] == wf.psi_freehyp_grid(R, a, b, red_mass, 6., phase=0.3))
+
+
+#-------------------------------------------------------------------------
+# hyperbolic continuum states from coulomb_f0
+a_hyp, b_hyp = 0.0833354, 1.4699729
+
+
+def test_coulomb_f0_against_mpmath():
+    etas = np.array([-3., 0.5, 4., 70.])
+    rho = np.linspace(0.1, 60., 25)
+    F = wf.coulomb_f0(etas, rho)
+    for eta, row in zip(etas, F):
+        ref = np.array([float(mpmath.coulombf(0, eta, x)) for x in rho])
+        assert np.max(np.abs(row - ref)) < 1e-6 * np.max(np.abs(ref))
+    assert np.max(np.abs(wf.coulomb_f0(4., rho) - F[2])) < 1e-6 * np.max(np.abs(F[2]))
+
+
+def test_psi_hyp_grid_against_psi_hyp():
+    R_coarse = R[::2]
+    both = wf.psi_hyp_grid(R_coarse, a_hyp, b_hyp, red_mass, np.array([4.5, 6.]))
+    for R_start, grid in zip((4.5, 6.), both):
+        ref = np.array([wf.psi_hyp(x, a_hyp, b_hyp, red_mass, R_start) for x in R_coarse])
+        assert np.max(np.abs(grid - ref)) < 1e-7 * np.max(np.abs(ref))
+
+
+def test_FC_grid_hyp_against_quadrature():
+    nodes, weights = wf.R_grid(R_min, R_max)
+    R_starts = np.array([5., 6.5])
+    psis1 = wf.psi_n_grid(nodes, 3, alpha, Req, red_mass, De)
+    FCs = wf.FC_grid(psis1, wf.psi_hyp_grid(nodes, a_hyp, b_hyp, red_mass, R_starts), weights)
+    for (n, k) in [(0, 1), (3, 0)]:
+        ref = wf.FCmor_hyp(n, alpha, Req, De, red_mass, a_hyp, b_hyp, R_starts[k], R_min, R_max,
+                           epsabs=1e-12, limit=200)
+        assert abs(FCs[n,k] - ref) < 1e-7 * np.max(np.abs(FCs))
@@ -14,7 +14,7 @@ import mpmath
 from mpmath import coulombf, coulombg
 import numpy as np
 import scipy.integrate as integrate
-from scipy.special import factorial
+from scipy.special import factorial, gammaln
 
 import complex_integration as ci
 import sciconv as sc
@@ -92,30 +92,26 @@ def sqrt_fact(real):
 
 def const_s_psi(R,n,s,alpha,Req,lambda_param):
     z = 2* lambda_param * np.exp(-alpha * (R - Req))
-    if (n == 0):
-        psi_0 = ( 1.0 
-                     * np.sqrt(alpha) # not mentioned part of norm. fact.
-                     # needed due to different type of Laguerre polyomials
-                     #/ sqrt_fact(2*lambda_param-2) alternative normalization
-                     # factor based on Eq. (41)
-                     * np.sqrt(s) * sqrt_fact(n) / sqrt_fact(s+n)
-                     * z**(s/4) #improves numerical stability to split
-                     * np.exp(-z / 2)
-                     * z**(s/4)
-                     )
-        return psi_0
-    elif (n == 1):
-        psi_1 = ( 1.0 
-                     * (2*n + s -1 -z)
-                     * np.sqrt(1./(n*(s + n)))
-                     )
-        return psi_1 * const_s_psi(R,n-1,s,alpha,Req,lambda_param)
-    else:
-        prefac  =  np.sqrt(1./(n*(s + n)))
-        prefac1 =  (2 * n + s -1 - z)
-        prefac2 = np.sqrt((n-1) * (n + s - 1))
-        return prefac * (  prefac1 * const_s_psi(R,n-1,s,alpha,Req,lambda_param)
-                         - prefac2 * const_s_psi(R,n-2,s,alpha,Req,lambda_param)  )
+    psi_0 = ( 1.0 
+                 * np.sqrt(alpha) # not mentioned part of norm. fact.
+                 # needed due to different type of Laguerre polyomials
+                 #/ sqrt_fact(2*lambda_param-2) alternative normalization
+                 # factor based on Eq. (41)
+                 * np.sqrt(s) / sqrt_fact(s)     # sqrt_fact(n) / sqrt_fact(s+n) at n = 0
+                 * z**(s/4) #improves numerical stability to split
+                 * np.exp(-z / 2)
+                 * z**(s/4)
+                 )
+    # upward recursion in n at constant s, every order is computed only once
+    psi_prev = 0
+    psi = psi_0
+    for k in range(1, n+1):
+        prefac  =  np.sqrt(1./(k*(s + k)))
+        prefac1 =  (2 * k + s -1 - z)
+        prefac2 = np.sqrt((k-1) * (k + s - 1))
+        psi_prev, psi = psi, prefac * (  prefac1 * psi
+                                       - prefac2 * psi_prev  )
+    return psi
 
 
 def psi_n(R,n,alpha,Req,red_mass,De):
@@ -125,6 +121,39 @@ def psi_n(R,n,alpha,Req,red_mass,De):
     return psi
     
 
+def psi_n_grid(R,n_max,alpha,Req,red_mass,De):
+    # psi_0 ... psi_n_max on a whole R grid in one call, returns array of shape (n_max+1, len(R)).
+    # Same functions as psi_n, but the recursion is carried out in log space:
+    # psi_n = q_n * exp(log(psi_0)), with the q_n rescaled after every step
+    # and the scale accumulated in log_scale, so that neither z**(s/2) nor exp(-z/2)
+    # nor the Laguerre recursion over- or underflows for high n and large lambda (no mpmath needed).
+    R = np.atleast_1d(np.asarray(R, dtype=float))
+    lambda_param = np.sqrt(2*red_mass*De) / alpha
+    log_z = np.minimum(np.log(2 * lambda_param) - alpha * (R - Req), 500.)    # psi vanishes long before
+    z = np.exp(log_z)
+    psis = np.zeros((n_max+1, len(R)))
+    for n in range(0, n_max+1):
+        s = 2*lambda_param - 2*n - 1
+        log_psi_0 = (0.5 * np.log(alpha) + 0.5 * np.log(s) - 0.5 * gammaln(s+1)
+                     + s/2 * log_z - z/2)
+        q_prev = np.zeros(len(R))
+        q = np.ones(len(R))
+        log_scale = np.zeros(len(R))
+        for k in range(1, n+1):
+            prefac  =  np.sqrt(1./(k*(s + k)))
+            prefac1 =  (2 * k + s -1 - z)
+            prefac2 = np.sqrt((k-1) * (k + s - 1))
+            q_prev, q = q, prefac * (prefac1 * q - prefac2 * q_prev)
+            scale = np.maximum(np.abs(q), np.abs(q_prev))
+            scale[scale == 0] = 1.
+            q = q / scale
+            q_prev = q_prev / scale
+            log_scale = log_scale + np.log(scale)
+        with np.errstate(under='ignore'):
+            psis[n] = q * np.exp(log_psi_0 + log_scale)
+    return psis
+    
+
 def psi_freehyp(R,a,b,red_mass,R_start,phase=0):    # model: free particle with energy corresponding to a point (at R_start) on a hyperbola, psi = 0 for section left of R_start
     a_eV = sc.hartree_to_ev(a)
     b_eV = sc.hartree_to_ev(b)
@@ -235,30 +264,26 @@ def mp_sqrt_fact(real):
 
 def mp_const_s_psi(R,n,s,alpha,Req,lambda_param):
     z = 2* lambda_param * mpmath.exp(-alpha * (R - Req))
-    if (n == 0):
-        psi_0 = ( 1.0 
-                     * mpmath.sqrt(alpha) # not mentioned part of norm. fact.
-                     # needed due to different type of Laguerre polyomials
-                     #/ sqrt_fact(2*lambda_param-2) alternative normalization
-                     # factor based on Eq. (41)
-                     * mpmath.sqrt(s) * mp_sqrt_fact(n) / mp_sqrt_fact(s+n)
-                     * z**(s/4) #improves numerical stability to split
-                     * mpmath.exp(-z / 2)
-                     * z**(s/4)
-                     )
-        return psi_0
-    elif (n == 1):
-        psi_1 = ( 1.0 
-                     * (2*n + s -1 -z)
-                     * mpmath.sqrt(1./(n*(s + n)))
-                     )
-        return psi_1 * mp_const_s_psi(R,n-1,s,alpha,Req,lambda_param)
-    else:
-        prefac  =  mpmath.sqrt(1./(n*(s + n)))
-        prefac1 =  (2 * n + s -1 - z)
-        prefac2 = mpmath.sqrt((n-1) * (n + s - 1))
-        return prefac * (  prefac1 * mp_const_s_psi(R,n-1,s,alpha,Req,lambda_param)
-                         - prefac2 * mp_const_s_psi(R,n-2,s,alpha,Req,lambda_param)  )
+    psi_0 = ( 1.0 
+                 * mpmath.sqrt(alpha) # not mentioned part of norm. fact.
+                 # needed due to different type of Laguerre polyomials
+                 #/ sqrt_fact(2*lambda_param-2) alternative normalization
+                 # factor based on Eq. (41)
+                 * mpmath.sqrt(s) / mp_sqrt_fact(s)     # mp_sqrt_fact(n) / mp_sqrt_fact(s+n) at n = 0
+                 * z**(s/4) #improves numerical stability to split
+                 * mpmath.exp(-z / 2)
+                 * z**(s/4)
+                 )
+    # upward recursion in n at constant s, every order is computed only once
+    psi_prev = 0
+    psi = psi_0
+    for k in range(1, n+1):
+        prefac  =  mpmath.sqrt(1./(k*(s + k)))
+        prefac1 =  (2 * k + s -1 - z)
+        prefac2 = mpmath.sqrt((k-1) * (k + s - 1))
+        psi_prev, psi = psi, prefac * (  prefac1 * psi
+                                       - prefac2 * psi_prev  )
+    return psi
 
 
 def mp_psi_n(R,n,alpha,Req,red_mass,De):
@@ -359,5 +384,124 @@ def mp_FCmor_hyp(n1,alpha1,Req1,De1,red_mass,V2a,V2b,R_start,R_min,R_max,**kwarg
     FC = tmp[0]
     return complex(FC)
 
+
+
+## Grid-based integrals
+# All wavefunctions are tabulated once on a common composite Gauss-Legendre grid in R;
+# the FC integrals between all pairs of states are then the matrix product
+# conj(Psi1) diag(w * V(R)) Psi2^T, with the weighting V(R) (Gamma(R) dependence)
+# folded into the quadrature weights w.
+
+def R_grid(R_min,R_max,dR=0.05,order=16):    # nodes and weights of composite Gauss-Legendre with panels of width <= dR
+    n_panels = max(1, int(np.ceil((R_max - R_min) / dR)))
+    x, w = ci.fixed_nodes(order)
+    edges = np.linspace(R_min, R_max, n_panels + 1)
+    half = (edges[1:] - edges[:-1]) / 2
+    mid = (edges[1:] + edges[:-1]) / 2
+    R = (mid[:,None] + half[:,None] * x[None,:]).ravel()
+    weights = (half[:,None] * w[None,:]).ravel()
+    return R, weights
+
+def bound_support(R,psis,eps=1.0E-10):    # (R_lo, R_hi) outside of which all |psi| < eps * max|psi| (per state)
+    mask = np.any(np.abs(psis) >= eps * np.max(np.abs(psis), axis=-1, keepdims=True), axis=0)
+    inside = np.nonzero(mask)[0]
+    i_lo = max(inside[0] - 1, 0)
+    i_hi = min(inside[-1] + 1, len(R) - 1)
+    return R[i_lo], R[i_hi]
+
+def FC_grid(psis1,psis2,weights,V=1):    # psis of shape (n_states, len(R)) -> matrix <psi1_i|V|psi2_j>
+    return np.dot(np.conj(psis1) * (weights * V), np.transpose(psis2))
+
+def coulomb_f0(eta,rho,kh=0.03):
+    # regular Coulomb function F_0(eta,rho) in double precision, for eta of shape (n,) (or scalar)
+    # and rho of shape (m,) or (n,m); returns shape (n,m) (or (m,)). Same function as mpmath.coulombf(0,eta,rho).
+    # Numerov integration of F'' = (2 eta/rho - 1) F outward from rho = 0 in the variable s = sqrt(rho),
+    # where u = F / sqrt(s) obeys u'' = (8 eta + 3/(4 s**2) - 4 s**2) u without the 1/rho singularity.
+    # All eta are integrated at once with their own step h = s_max / N, so that h * (local wave number) <= kh.
+    # Start values from the power series F_0 = C_0(eta) sum_k A_k rho**(k+1), the exponential growth
+    # in the classically forbidden region is rescaled on the fly and kept in log_scale (as in psi_n_grid).
+    scalar = (np.ndim(eta) == 0)
+    eta = np.atleast_1d(np.asarray(eta, dtype=float))
+    rho = np.atleast_1d(np.asarray(rho, dtype=float))
+    rho = np.broadcast_to(rho, (len(eta), rho.shape[-1]))
+    j0 = 40                                         # first Numerov step, series below
+    s_max = np.sqrt(np.max(rho, axis=1))
+    kappa = np.maximum(np.maximum(np.sqrt(8 * np.abs(eta)), 2 * s_max), 1.)
+    N = int(np.ceil(np.max(s_max * kappa) / kh)) + j0
+    h = s_max / (N - 5)                             # grid s_j = j h, j = 0 ... N, reaches s_max + 5 h
+    # log C_0(eta) = log sqrt(2 pi eta / (exp(2 pi eta) - 1)), without overflow for large |eta|
+    x = np.maximum(2 * np.pi * np.abs(eta), 1E-300)
+    log_C0 = 0.5 * np.log(x / -np.expm1(-x)) - np.pi * np.maximum(eta, 0)
+    u = np.zeros((N+1, len(eta)))
+    log_scale = np.zeros((N+1, len(eta)))
+    # power series for j <= j0, there 2 |eta| rho <= 1
+    s = np.arange(0, j0+1)[:,None] * h
+    r = s**2
+    A_prev = np.zeros(len(eta))
+    A = np.ones(len(eta))
+    term = r
+    series = term
+    for k in range(1,30):
+        A_prev, A = A, (2 * eta * A - A_prev) / (k * (k+1))
+        term = term * r
+        series = series + A * term
+    u[1:j0+1] = series[1:] / np.sqrt(s[1:])
+    # Numerov for u'' = g u
+    s = np.arange(1, N+1)[:,None] * h
+    h2g = h**2 * (8 * eta + 0.75 / s**2 - 4 * s**2)
+    c_out = np.vstack((np.ones(len(eta)), 1 - h2g / 12))     # c_out[j] = 1 - h**2 g_j / 12
+    c_mid = np.vstack((np.ones(len(eta)), 2 + 5 * h2g / 6))  # c_mid[j] = 2 (1 + 5 h**2 g_j / 12)
+    u_prev = u[j0-1]
+    u_j = u[j0]
+    scale = np.zeros(len(eta))
+    for j in range(j0, N):
+        u_next = (c_mid[j] * u_j - c_out[j-1] * u_prev) / c_out[j+1]
+        if (np.max(np.abs(u_next)) > 1E100):
+            factor = np.maximum(np.abs(u_next), 1.)
+            u_j = u_j / factor
+            u_next = u_next / factor
+            scale = scale + np.log(factor)
+        u[j+1] = u_next
+        log_scale[j+1] = scale
+        u_prev, u_j = u_j, u_next
+    with np.errstate(under='ignore'):
+        F = np.sqrt(np.arange(0, N+1)[:,None] * h) * u * np.exp(log_scale + log_C0)
+    # 6-point Lagrange interpolation to s = sqrt(rho)
+    x = np.sqrt(rho) / h[:,None]
+    j = np.clip(np.floor(x).astype(int) - 2, 0, N - 5)
+    x = x - j
+    rows = np.arange(len(eta))[:,None]
+    F_rho = np.zeros(rho.shape)
+    for m in range(0,6):
+        weight = np.ones(rho.shape)
+        for l in range(0,6):
+            if (l != m):
+                weight = weight * (x - l) / (m - l)
+        F_rho = F_rho + weight * F[j + m, rows]
+    if scalar:
+        return F_rho[0]
+    return F_rho
+
+def psi_hyp_grid(R,a,b,red_mass,R_start):    # same as psi_hyp, for an array of R; R_start scalar -> (len(R),), array -> (len(R_start), len(R))
+    a_eV = sc.hartree_to_ev(sc.bohr_to_angstrom(a))
+    b_eV = sc.hartree_to_ev(b)
+    E_au = potentials.hyperbel(a_eV,b_eV,np.asarray(R_start, dtype=float)) - b
+    K_au = np.sqrt(2 * red_mass * E_au)
+    norm = np.sqrt(2 * red_mass / (np.pi * K_au))
+    eta = a * red_mass / K_au
+    if (np.ndim(R_start) == 0):
+        return norm * coulomb_f0(eta, K_au * np.asarray(R))
+    return norm[:,None] * coulomb_f0(eta, K_au[:,None] * np.asarray(R)[None,:])
+
+def psi_freehyp_grid(R,a,b,red_mass,R_start,phase=0):    # same as psi_freehyp, for an array of R; R_start scalar -> (len(R),), array -> (len(R_start), len(R))
+    a_eV = sc.hartree_to_ev(a)
+    b_eV = sc.hartree_to_ev(b)
+    if (np.ndim(R_start) > 0):
+        R_start = np.asarray(R_start, dtype=float)[:,None]
+    E_au = potentials.hyperbel(a_eV,b_eV,R_start) - b 
+    K_au = np.sqrt(2 * red_mass * E_au)
+    norm = np.sqrt(red_mass / (2 * np.pi * K_au))
+    return np.where(R <= R_start, 0, norm * np.exp(1.j * (K_au * (R - R_start) + phase)))
+
 #R_min = sc.angstrom_to_bohr(1.5)
 #R_max = sc.angstrom_to_bohr(30.0)